@@ -0,0 +1,92 @@
+import queue
+import threading
+from time import perf_counter
+
+from GameState import GameState
+
+# requested actions
+REVEAL = "reveal"
+TOGGLE_FLAG = "toggle_flag"
+PLAY = "play"
+UNDO = "undo"
+
+
+class AIWorker():
+    """
+    Background thread, which makes all moves of the games shown in the window, so the window never waits for the AI.
+    Moves are requested through a queue and made in order, for every request (action, game, number of moves made by the AI,
+    if the game is over) is put into the results queue, so the window knows the game is over without reading it.
+    When there are no requests, the next AI move of the last game is prepared, so the AI Move button responds right away.
+    Game state is changed only while the lock is held, so it must be held while the game is read as well.
+    The AI of a game is only used by this thread, so the lock is not held while a move is prepared
+    and preparing stops between deduction steps, as soon as anything is requested.
+    """
+
+    def __init__(self):
+        self.requests: queue.Queue[tuple[str, GameState, tuple[int, int]]] = queue.Queue()
+        self.results: queue.Queue[tuple[str, GameState, int, bool]] = queue.Queue()
+        self.lock = threading.Lock()
+        self.__thread = threading.Thread(target=self.__run, name="AIWorker", daemon=True)
+        self.__thread.start()
+
+    def reveal(self, game_state: GameState, cell: tuple[int, int]):
+        self.requests.put((REVEAL, game_state, cell))
+
+    def toggle_flag(self, game_state: GameState, cell: tuple[int, int]):
+        self.requests.put((TOGGLE_FLAG, game_state, cell))
+
+    def undo(self, game_state: GameState):
+        """Requests taking back the last move, see GameState.undo"""
+        self.requests.put((UNDO, game_state, None))
+
+    def play(self, game_state: GameState, moves: int = None, seconds: float = None):
+        """
+        Requests AI moves until (moves) moves are made, (seconds) passed or the game is over, at least one move is made.
+        (PLAY, game_state, number of moves made, if the game is over) is put into results once the AI is done.
+        """
+        self.requests.put((PLAY, game_state, (moves, seconds)))
+
+    def close(self):
+        """Stops the thread after all requested moves are made"""
+        self.requests.put(None)
+        self.__thread.join()
+
+    def __run(self):
+        while True:
+            request = self.requests.get()
+            if request is None:
+                return
+            action, game_state, argument = request
+            moves_made = 0
+            with self.lock:
+                # moves are checked here, the game could have changed since they were requested
+                if action == REVEAL:
+                    cell = argument
+                    if not game_state.lost and cell not in game_state.revealed and cell not in game_state.flags:
+                        game_state.make_move(cell, False)
+                elif action == TOGGLE_FLAG:
+                    cell = argument
+                    if not game_state.lost and cell not in game_state.revealed:
+                        game_state.toggle_flag(cell)
+                elif action == UNDO:
+                    game_state.undo()
+                elif action == PLAY:
+                    moves_made = self.__play(game_state, *argument)
+                over = game_state.is_over()
+            self.results.put((action, game_state, moves_made, over))
+
+            # player is idle, next AI move is searched for meanwhile
+            if self.requests.empty() and not over:
+                game_state.ai.prepare(interrupted=lambda: not self.requests.empty())
+
+    def __play(self, game_state: GameState, moves: int, seconds: float) -> int:
+        deadline = None if seconds is None else perf_counter() + seconds
+        moves_made = 0
+        while not game_state.is_over():
+            move, _ = game_state.ai_move()
+            if move is None:
+                break
+            moves_made += 1
+            if (moves is not None and moves_made >= moves) or (deadline is not None and perf_counter() >= deadline):
+                break
+        return moves_made
@@ -0,0 +1,185 @@
+"""
+Reproducible benchmark of the board and the AI player on standard board presets.
+Every game is seeded, so runs with the same arguments play the same games and can be compared.
+Run `python Benchmark.py --help` to see all options.
+"""
+import argparse
+import json
+import platform
+import random
+import time
+import tracemalloc
+from dataclasses import dataclass
+
+from BoardTopology import get_topology
+from CellPool import identity_chunk
+from GameState import GameState
+from Minesweeper import Minesweeper, NumpyMinesweeper, load_numpy
+
+
+@dataclass
+class Preset():
+    height: int
+    width: int
+    mines: int
+    # number of games played in every AI mode
+    games: int
+    # large boards are only played up to this number of moves, None to play whole games
+    max_moves: int = None
+
+
+PRESETS = {
+    "beginner": Preset(9, 9, 10, games=200),
+    "intermediate": Preset(16, 16, 40, games=100),
+    "expert": Preset(16, 30, 99, games=50),
+    "stress-100": Preset(100, 100, 1500, games=3),
+    "stress-500": Preset(500, 500, 37500, games=1, max_moves=2000),
+}
+
+# (search_asap, ai_knows_number_of_mines)
+AI_MODES = [(True, True), (True, False), (False, True), (False, False)]
+
+
+def percentiles(samples: list[float]) -> dict:
+    """Returns percentiles of latencies in microseconds"""
+    if len(samples) == 0:
+        return {}
+    samples = sorted(samples)
+
+    def at(p):
+        return samples[min(len(samples) - 1, int(p / 100 * len(samples)))] * 1e6
+
+    return {
+        "count": len(samples),
+        "mean_us": sum(samples) / len(samples) * 1e6,
+        "p50_us": at(50),
+        "p90_us": at(90),
+        "p99_us": at(99),
+        "max_us": samples[-1] * 1e6,
+    }
+
+
+def bench_board(preset: Preset, seed: int, board_class) -> dict:
+    """Measures construction of the board and counting nearby mines of every cell"""
+    repeats = max(1, 20000 // (preset.height * preset.width))
+    construction = []
+    nearby = []
+    for repeat in range(repeats):
+        rng = random.Random(seed + repeat)
+        start = time.perf_counter()
+        game = board_class(preset.height, preset.width, preset.mines, rng)
+        construction.append(time.perf_counter() - start)
+
+        cells = [(i, j) for i in range(preset.height) for j in range(preset.width)]
+        start = time.perf_counter()
+        for cell in cells:
+            game.nearby_mines(cell)
+        nearby.append((time.perf_counter() - start) / len(cells))
+    return {
+        "construction": percentiles(construction),
+        "nearby_mines": percentiles(nearby),
+    }
+
+
+def play(preset: Preset, seed: int, search_asap: bool, ai_knows_number_of_mines: bool,
+         move_latencies: list[float], update_latencies: list[float]) -> tuple[bool, int]:
+    """Plays one seeded game, collecting latencies of AI moves and AI knowledge updates. Returns (won, moves)."""
+    game_state = GameState(preset.height, preset.width, preset.mines, ai_knows_number_of_mines, search_asap, seed=seed)
+    moves = 0
+    while not game_state.is_over() and (preset.max_moves is None or moves < preset.max_moves):
+        start = time.perf_counter()
+        move, place_flag = game_state.ai.move()
+        move_latencies.append(time.perf_counter() - start)
+        if move is None:
+            break
+        # revealing a cell updates AI knowledge
+        start = time.perf_counter()
+        game_state.make_move(move, place_flag, by_ai=True)
+        if not place_flag:
+            update_latencies.append(time.perf_counter() - start)
+        moves += 1
+    return game_state.is_won(), moves
+
+
+def bench_ai(preset: Preset, seed: int, search_asap: bool, ai_knows_number_of_mines: bool) -> dict:
+    move_latencies = []
+    update_latencies = []
+    wins = 0
+    moves = 0
+    start = time.perf_counter()
+    for game in range(preset.games):
+        won, game_moves = play(preset, seed + game, search_asap, ai_knows_number_of_mines, move_latencies, update_latencies)
+        wins += won
+        moves += game_moves
+    elapsed = time.perf_counter() - start
+
+    # peak memory is measured on a separate run of the first game, tracing slows the game down,
+    # shared caches are emptied first, so the memory the game needs for them is counted as well
+    get_topology.cache_clear()
+    identity_chunk.cache_clear()
+    tracemalloc.start()
+    play(preset, seed, search_asap, ai_knows_number_of_mines, [], [])
+    _, peak_memory = tracemalloc.get_traced_memory()
+    tracemalloc.stop()
+
+    return {
+        "search_asap": search_asap,
+        "ai_knows_number_of_mines": ai_knows_number_of_mines,
+        "games": preset.games,
+        "wins": wins,
+        "moves": moves,
+        "elapsed_s": elapsed,
+        "games_per_s": preset.games / elapsed,
+        "moves_per_s": moves / elapsed,
+        "move_latency": percentiles(move_latencies),
+        "update_latency": percentiles(update_latencies),
+        "peak_memory_bytes": peak_memory,
+    }
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Benchmarks the board and the AI player on standard board presets")
+    parser.add_argument("-p", "--presets", nargs="+", choices=PRESETS.keys(), default=list(PRESETS.keys()))
+    parser.add_argument("-s", "--seed", type=int, default=0, help="seed of the first game, game n uses seed + n")
+    parser.add_argument("--games-scale", type=float, default=1.0, help="multiplies number of games of every preset")
+    parser.add_argument("-o", "--output", default="benchmark.json", help="JSON file to write results to")
+    args = parser.parse_args()
+
+    board_classes = [Minesweeper] + ([NumpyMinesweeper] if load_numpy() is not None else [])
+    results = {
+        "seed": args.seed,
+        "python": platform.python_version(),
+        "platform": platform.platform(),
+        "presets": {},
+    }
+    for name in args.presets:
+        preset = PRESETS[name]
+        preset = Preset(preset.height, preset.width, preset.mines,
+                        max(1, round(preset.games * args.games_scale)), preset.max_moves)
+        result = {
+            "height": preset.height,
+            "width": preset.width,
+            "mines": preset.mines,
+            "max_moves": preset.max_moves,
+            "board": {board_class.__name__: bench_board(preset, args.seed, board_class) for board_class in board_classes},
+            "ai": [],
+        }
+        for search_asap, ai_knows_number_of_mines in AI_MODES:
+            ai_result = bench_ai(preset, args.seed, search_asap, ai_knows_number_of_mines)
+            result["ai"].append(ai_result)
+            print(
+                f"{name:>12} asap={int(search_asap)} knows_mines={int(ai_knows_number_of_mines)}: "
+                f"{ai_result['games_per_s']:8.2f} games/s, "
+                f"move p50 {ai_result['move_latency'].get('p50_us', 0):9.1f} us, "
+                f"p99 {ai_result['move_latency'].get('p99_us', 0):9.1f} us, "
+                f"peak memory {ai_result['peak_memory_bytes'] / 1024:9.1f} KiB"
+            )
+        results["presets"][name] = result
+
+    with open(args.output, 'w') as f:
+        json.dump(results, f, indent=2)
+    print(f"Results written to {args.output}")
+
+
+if __name__ == "__main__":
+    main()
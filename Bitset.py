@@ -0,0 +1,79 @@
+"""
+Sets of cells are stored as bits of a Python integer, where cell (i, j) of a board is the bit i * width + j.
+Union, intersection and difference of such sets are then single integer operations.
+"""
+import random
+from typing import Iterator
+
+# masks spanning more bits are walked through their binary string, because removing the lowest bit
+# from a wide integer copies the whole integer every time
+WIDE_MASK_BITS = 256
+
+
+def bits(mask: int) -> Iterator[int]:
+    """Yields indices of all set bits of a mask in ascending order"""
+    if mask == 0:
+        return
+    offset = (mask & -mask).bit_length() - 1
+    mask >>= offset
+    if mask.bit_length() <= WIDE_MASK_BITS:
+        while mask:
+            lowest = mask & -mask
+            yield offset + lowest.bit_length() - 1
+            mask ^= lowest
+    else:
+        binary = bin(mask)[:1:-1]
+        position = binary.find('1')
+        while position != -1:
+            yield offset + position
+            position = binary.find('1', position + 1)
+
+
+def lowest_bit(mask: int) -> int:
+    """Returns index of the lowest set bit of a non-empty mask"""
+    return (mask & -mask).bit_length() - 1
+
+
+def from_bits(indices: list[int]) -> int:
+    """Returns a mask with the given bits set"""
+    if len(indices) == 0:
+        return 0
+    # setting bits one by one in an integer would copy it every time
+    result = bytearray(max(indices) // 8 + 1)
+    for bit in indices:
+        result[bit >> 3] |= 1 << (bit & 7)
+    return int.from_bytes(result, 'little')
+
+
+def remap(mask: int, mapping: list[int]) -> int:
+    """Returns the mask with bit i moved to bit mapping[i], bits mapped to -1 are left out"""
+    moved = [mapping[bit] for bit in bits(mask)]
+    return from_bits([bit for bit in moved if bit >= 0])
+
+
+def pack_cells(cells, width: int, size: int) -> bytes:
+    """Packs (row, column) cells into a bitmap of size bits, one bit per cell of the board"""
+    bitmap = bytearray((size + 7) // 8)
+    for i, j in cells:
+        index = i * width + j
+        bitmap[index >> 3] |= 1 << (index & 7)
+    return bytes(bitmap)
+
+
+def unpack_cells(bitmap: bytes, width: int) -> set[tuple[int, int]]:
+    """Returns (row, column) cells of a bitmap packed by pack_cells"""
+    cells = set()
+    for byte_index, byte in enumerate(bitmap):
+        while byte:
+            lowest = byte & -byte
+            cells.add(divmod(byte_index * 8 + lowest.bit_length() - 1, width))
+            byte ^= lowest
+    return cells
+
+
+def random_bit(mask: int, rng: random.Random = random) -> int:
+    """Returns index of a randomly chosen set bit of a non-empty mask"""
+    n = rng.randrange(mask.bit_count())
+    for i, bit in enumerate(bits(mask)):
+        if i == n:
+            return bit
@@ -0,0 +1,43 @@
+import queue
+import threading
+from typing import Callable
+
+from GameState import GameState
+
+
+class BoardPool():
+    """
+    Bounded pool of ready game states, refilled by a background thread.
+    Taking a game from the pool is instant, unless the pool was emptied faster than the thread could refill it,
+    then the game is created right away.
+    """
+
+    def __init__(self, create_game_state: Callable[[], GameState], size: int = 4):
+        self.create_game_state = create_game_state
+        self.games: queue.Queue[GameState] = queue.Queue(maxsize=size)
+        self.__closed = threading.Event()
+        self.__thread = threading.Thread(target=self.__fill, name="BoardPool", daemon=True)
+        self.__thread.start()
+
+    def get(self) -> GameState:
+        """Returns a new game, that was not played yet"""
+        try:
+            return self.games.get_nowait()
+        except queue.Empty:
+            return self.create_game_state()
+
+    def close(self):
+        """Stops the background thread, games left in the pool are dropped"""
+        self.__closed.set()
+        self.__thread.join()
+
+    def __fill(self):
+        while not self.__closed.is_set():
+            game_state = self.create_game_state()
+            # waiting for a free place with a timeout, so closing the pool is noticed
+            while not self.__closed.is_set():
+                try:
+                    self.games.put(game_state, timeout=0.1)
+                    break
+                except queue.Full:
+                    continue
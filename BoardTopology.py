@@ -0,0 +1,194 @@
+import random
+from array import array
+from functools import lru_cache
+
+from Bitset import bits
+
+
+class BoardTopology():
+    """
+    Neighbourhood of every cell of a board with given dimensions.
+    Cells are numbered by linear index i * width + j (the same as bits in Bitset).
+    Neighbours of cell c are indices[offsets[c]:offsets[c + 1]] (compressed sparse rows),
+    so lookups in hot loops only walk the shared arrays and allocate nothing.
+    Use get_topology to get an instance, which is shared by all games with the same dimensions.
+    """
+    # every cell has an index and none is ever released (see SparseTopology)
+    untouched = 0
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.size = height * width
+        # all cells of the board as a bitmask
+        self.board_mask = (1 << self.size) - 1
+
+        self.offsets = array('i', [0])
+        self.indices = array('i')
+        for i in range(height):
+            for j in range(width):
+                for y in range(max(i - 1, 0), min(i + 2, height)):
+                    for x in range(max(j - 1, 0), min(j + 2, width)):
+                        if (y, x) != (i, j):
+                            self.indices.append(y * width + x)
+                self.offsets.append(len(self.indices))
+
+        # bitmasks of neighbourhoods relative to the top row of the neighbourhood,
+        # there are only a few distinct shapes per column, so they are created on first use
+        self.__patterns: dict[tuple[int, int, int], int] = {}
+
+    def index(self, cell: tuple[int, int]) -> int:
+        return cell[0] * self.width + cell[1]
+
+    def cell(self, index: int) -> tuple[int, int]:
+        return divmod(index, self.width)
+
+    def neighbours(self, index: int) -> array:
+        """Returns indices of all neighbours of a cell"""
+        return self.indices[self.offsets[index]:self.offsets[index + 1]]
+
+    def neighbour_cells(self, cell: tuple[int, int]) -> list[tuple[int, int]]:
+        """Returns all neighbours of a cell as (row, column) tuples"""
+        index = cell[0] * self.width + cell[1]
+        width = self.width
+        indices = self.indices
+        return [divmod(indices[k], width) for k in range(self.offsets[index], self.offsets[index + 1])]
+
+    def neighbour_mask(self, index: int) -> int:
+        """Returns all neighbours of a cell as a bitmask"""
+        y, x = divmod(index, self.width)
+        top = y - 1 if y > 0 else 0
+        rows = (y + 2 if y + 2 < self.height else self.height) - top
+        key = (rows, y - top, x)
+        pattern = self.__patterns.get(key)
+        if pattern is None:
+            pattern = 0
+            for k in range(self.offsets[index], self.offsets[index + 1]):
+                pattern |= 1 << (self.indices[k] - top * self.width)
+            self.__patterns[key] = pattern
+        # only this shift works with a board sized integer
+        return pattern << (top * self.width)
+
+
+@lru_cache(maxsize=8)
+def get_topology(height: int, width: int) -> BoardTopology:
+    """Returns topology of a board, computed once for every (height, width)"""
+    return BoardTopology(height, width)
+
+
+class SparseTopology():
+    """
+    Neighbourhood of cells of a huge board, for which tables of BoardTopology would not fit into memory.
+    Neighbours are computed from coordinates and only cells, that were touched, get an index (a bit in Bitset),
+    in order of their first use, so sets of cells grow with the explored area instead of the board area.
+    Cells, whose index is no longer needed, are released by compact and remembered as retired.
+    Indices are assigned as a game goes, so every player needs its own instance.
+    """
+
+    def __init__(self, height: int, width: int):
+        self.height = height
+        self.width = width
+        self.size = height * width
+        self.cells: list[tuple[int, int]] = []
+        self.indices: dict[tuple[int, int], int] = {}
+        # released cells and if they are mines
+        self.retired: dict[tuple[int, int], bool] = {}
+        # number of touched (indexed or retired) cells in every row, so random untouched cells are found without
+        # walking the board, cells keep being touched, when they are retired, so only indexing and truncating change it
+        self.touched_in_row: dict[int, int] = {}
+
+    @property
+    def board_mask(self) -> int:
+        """All cells with an index as a bitmask"""
+        return (1 << len(self.cells)) - 1
+
+    @property
+    def untouched(self) -> int:
+        """Number of cells, that have no index and were never retired"""
+        return self.size - len(self.cells) - len(self.retired)
+
+    def index(self, cell: tuple[int, int]) -> int:
+        index = self.indices.get(cell)
+        if index is None:
+            index = len(self.cells)
+            self.cells.append(cell)
+            self.indices[cell] = index
+            if cell not in self.retired:
+                self.touched_in_row[cell[0]] = self.touched_in_row.get(cell[0], 0) + 1
+        return index
+
+    def cell(self, index: int) -> tuple[int, int]:
+        return self.cells[index]
+
+    def truncate(self, count: int):
+        """Takes back indices given after the first (count) ones, e.g. when a move is undone"""
+        for cell in self.cells[count:]:
+            del self.indices[cell]
+            if cell not in self.retired:
+                self.touched_in_row[cell[0]] -= 1
+        del self.cells[count:]
+
+    def neighbour_cells(self, cell: tuple[int, int]) -> list[tuple[int, int]]:
+        """Returns all neighbours of a cell as (row, column) tuples"""
+        i, j = cell
+        return [
+            (y, x)
+            for y in range(max(i - 1, 0), min(i + 2, self.height))
+            for x in range(max(j - 1, 0), min(j + 2, self.width))
+            if (y, x) != cell
+        ]
+
+    def neighbour_mask(self, index: int) -> int:
+        """Returns all neighbours of a cell as a bitmask, retired neighbours are left out"""
+        mask = 0
+        for neighbour in self.neighbour_cells(self.cells[index]):
+            if neighbour not in self.retired:
+                mask |= 1 << self.index(neighbour)
+        return mask
+
+    def retired_mines_around(self, index: int) -> int:
+        """Returns number of retired mines among neighbours of a cell"""
+        retired = self.retired
+        return sum(retired.get(neighbour, False) for neighbour in self.neighbour_cells(self.cells[index]))
+
+    def random_untouched(self, rng: random.Random) -> tuple[int, int]:
+        """Returns a random cell, that has no index and was never retired"""
+        untouched = self.untouched
+        if untouched * 8 >= self.size:
+            # most of the board is untouched, so a few random tries find such cell
+            while True:
+                cell = (rng.randrange(self.height), rng.randrange(self.width))
+                if cell not in self.indices and cell not in self.retired:
+                    return cell
+        # n-th untouched cell is found by counts of rows and then in its row, which takes O(height + width)
+        n = rng.randrange(untouched)
+        touched_in_row = self.touched_in_row
+        for i in range(self.height):
+            row_untouched = self.width - touched_in_row.get(i, 0)
+            if n >= row_untouched:
+                n -= row_untouched
+                continue
+            for j in range(self.width):
+                cell = (i, j)
+                if cell not in self.indices and cell not in self.retired:
+                    if n == 0:
+                        return cell
+                    n -= 1
+
+    def compact(self, keep: int, mines: int) -> list[int]:
+        """
+        Releases indices of all cells, which are not in keep, cells in mines are retired as mines, others as safes.
+        Kept cells get new indices in the same order. Returns new index of every old index, -1 for released ones.
+        """
+        mapping = [-1] * len(self.cells)
+        cells = []
+        for index in bits(keep):
+            mapping[index] = len(cells)
+            cells.append(self.cells[index])
+        mines = set(bits(mines))
+        for index, cell in enumerate(self.cells):
+            if mapping[index] == -1:
+                self.retired[cell] = index in mines
+        self.cells = cells
+        self.indices = {cell: index for index, cell in enumerate(cells)}
+        return mapping
@@ -0,0 +1,136 @@
+import random
+from array import array
+from functools import lru_cache
+
+# arrays of the pool are split into chunks of 2^CHUNK_BITS entries
+CHUNK_BITS = 12
+CHUNK_SIZE = 1 << CHUNK_BITS
+CHUNK_MASK = CHUNK_SIZE - 1
+
+
+@lru_cache(maxsize=None)
+def identity_chunk(k: int) -> array:
+    """Returns chunk k of the array 0, 1, 2, ... (shared by all pools, it is never changed)"""
+    return array('l', range(k * CHUNK_SIZE, (k + 1) * CHUNK_SIZE))
+
+
+class CellPool():
+    """
+    Set of cells (indices of bits, see Bitset), in which adding, removing and drawing a random cell take O(1).
+    Cells are kept in an array, removed cell is replaced by the last one, so the array has no holes,
+    and position of every cell in the array is kept in a second array indexed by cells (-1 if the cell is not in the pool).
+    Both arrays are lists of chunks, a new pool of a whole board shares identity chunks with all other pools
+    and copies a chunk only when it is changed first, so a new game doesn't allocate anything of the size of the board.
+    Adding a cell is undone by removing it again, it is the last cell then. Removing a cell is undone by moving the cell,
+    which took its place, back to the end and the removed cell back to its position, so after an undo
+    the array is the same as before and the same random cells are drawn.
+    """
+
+    def __init__(self, size: int = 0):
+        """Creates a pool with cells 0, 1, ..., size - 1"""
+        chunks = -(-size // CHUNK_SIZE)
+        self.length = size
+        # cells at positions past the length are never read, so the last chunk of cells can be shared as well
+        self.cell_chunks = [identity_chunk(k) for k in range(chunks)]
+        self.position_chunks = list(self.cell_chunks)
+        # chunks of this pool, which can be changed in place
+        self.owned_cells = [False] * chunks
+        self.owned_positions = [False] * chunks
+        if size % CHUNK_SIZE:
+            # cells past the size of the last chunk are not in the pool
+            last = array('l', range((chunks - 1) * CHUNK_SIZE, size))
+            last.extend([-1] * (CHUNK_SIZE - len(last)))
+            self.position_chunks[-1] = last
+            self.owned_positions[-1] = True
+        # undo log of changes, None if changes are not recorded
+        self.trail: list[tuple] = None
+
+    def __len__(self):
+        return self.length
+
+    def __iter__(self):
+        for position in range(self.length):
+            yield self.cell_chunks[position >> CHUNK_BITS][position & CHUNK_MASK]
+
+    def __contains__(self, cell: int):
+        k = cell >> CHUNK_BITS
+        return k < len(self.position_chunks) and self.position_chunks[k][cell & CHUNK_MASK] != -1
+
+    def add(self, cell: int):
+        if cell in self:
+            return
+        self.__add(cell)
+        if self.trail is not None:
+            self.trail.append((self.__discard, cell))
+
+    def discard(self, cell: int):
+        if cell not in self:
+            return
+        position = self.__discard(cell)
+        if self.trail is not None:
+            self.trail.append((self.__undo_discard, cell, position))
+
+    def __cell(self, position: int) -> int:
+        return self.cell_chunks[position >> CHUNK_BITS][position & CHUNK_MASK]
+
+    def __set_cell(self, position: int, cell: int):
+        k = position >> CHUNK_BITS
+        if k == len(self.cell_chunks):
+            self.cell_chunks.append(array('l', [-1]) * CHUNK_SIZE)
+            self.owned_cells.append(True)
+        elif not self.owned_cells[k]:
+            self.cell_chunks[k] = array('l', self.cell_chunks[k])
+            self.owned_cells[k] = True
+        self.cell_chunks[k][position & CHUNK_MASK] = cell
+
+    def __set_position(self, cell: int, position: int):
+        k = cell >> CHUNK_BITS
+        if k >= len(self.position_chunks):
+            # positions grow with the highest cell
+            for _ in range(k + 1 - len(self.position_chunks)):
+                self.position_chunks.append(array('l', [-1]) * CHUNK_SIZE)
+                self.owned_positions.append(True)
+        elif not self.owned_positions[k]:
+            self.position_chunks[k] = array('l', self.position_chunks[k])
+            self.owned_positions[k] = True
+        self.position_chunks[k][cell & CHUNK_MASK] = position
+
+    def __add(self, cell: int):
+        self.__set_position(cell, self.length)
+        self.__set_cell(self.length, cell)
+        self.length += 1
+
+    def __discard(self, cell: int) -> int:
+        position = self.position_chunks[cell >> CHUNK_BITS][cell & CHUNK_MASK]
+        self.length -= 1
+        last = self.cell_chunks[self.length >> CHUNK_BITS][self.length & CHUNK_MASK]
+        if last != cell:
+            self.__set_cell(position, last)
+            self.__set_position(last, position)
+        self.__set_position(cell, -1)
+        return position
+
+    def __undo_discard(self, cell: int, position: int):
+        # the cell, that took the place of the removed one, goes back to the end, so the order is the same as before
+        if position < self.length:
+            moved = self.__cell(position)
+            self.__set_position(moved, self.length)
+            self.__set_cell(self.length, moved)
+            self.__set_cell(position, cell)
+        else:
+            self.__set_cell(position, cell)
+        self.length += 1
+        self.__set_position(cell, position)
+
+    def random(self, rng: random.Random = random) -> int:
+        """Returns a random cell of a non-empty pool"""
+        return self.__cell(rng.randrange(self.length))
+
+    def remap(self, mapping: list[int]):
+        """Moves cell i to cell mapping[i], cells mapped to -1 are removed"""
+        cells = [cell for cell in (mapping[cell] for cell in self) if cell >= 0]
+        self.length = 0
+        self.cell_chunks, self.owned_cells = [], []
+        self.position_chunks, self.owned_positions = [], []
+        for cell in cells:
+            self.__add(cell)
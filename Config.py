@@ -1,4 +1,6 @@
-import re
+import logging
+
+logger = logging.getLogger(__name__)
 
 WINDOW_WIDTH_KEY = "WINDOW_WIDTH"
 WINDOW_HEIGHT_KEY = "WINDOW_HEIGHT"
@@ -7,11 +9,15 @@ WIDTH_KEY = "WIDTH_TILES"
 MINES_KEY = "MINE_TILES"
 AI_KNOWS_NUMBER_OF_MINES_KEY = "AI_KNOWS_NUMBER_OF_MINES"
 AI_SEARCH_ASAP_KEY = "AI_SEARCH_ASAP"
+AI_MAX_COMPONENT_SIZE_KEY = "AI_MAX_COMPONENT_SIZE"
+NUMPY_BOARD_KEY = "NUMPY_BOARD"
+SPARSE_BOARD_KEY = "SPARSE_BOARD"
+NO_GUESS_KEY = "NO_GUESS"
+AUTO_PLAY_SPEED_KEY = "AUTO_PLAY_SPEED"
+AI_STRATEGY_KEY = "AI_STRATEGY"
 
 
 class Config():
-    __config_line_regex = re.compile(r"(.*)\s=\s?(\d+)")
-
     window_width: int = None
     window_height: int = None
     height: int = None
@@ -19,39 +25,81 @@ class Config():
     mines: int = None
     ai_knows_number_of_mines: bool = None
     ai_search_asap: bool = None
+    # optional settings
+    ai_max_component_size: int = None
+    numpy_board: bool = False
+    sparse_board: bool = False
+    no_guess: bool = False
+    # AI moves per second when it plays by itself, 0 means as fast as possible
+    auto_play_speed: int = 10
+    # how the AI combines its knowledge, 0 = subset reduction, 1 = Gaussian elimination (see DeductionStrategy)
+    ai_strategy: int = 0
 
     def __init__(self) -> None:
         pass
 
-    def set_from_file(self, line: str):
-        match = re.search(self.__config_line_regex, line)
-        if match:
-            key = match.group(1)
-            value = int(match.group(2))
-            if key == WINDOW_WIDTH_KEY:
-                self.window_width = value
-            elif key == WINDOW_HEIGHT_KEY:
-                self.window_height = value
-            elif key == HEIGHT_KEY:
-                self.height = value
-            elif key == WIDTH_KEY:
-                self.width = value
-            elif key == MINES_KEY:
-                self.mines = value
-            elif key == AI_KNOWS_NUMBER_OF_MINES_KEY:
-                self.ai_knows_number_of_mines = bool(value)
-            elif key == AI_SEARCH_ASAP_KEY:
-                self.ai_search_asap = bool(value)
-            else:
-                print(f"Unknown config key: '{key}'")
-
-    def is_setup(self) -> bool:
+    def set_from_file(self, line: str, line_number: int = None):
+        """
+        Sets a value from a line of the config file in format KEY = value, where value is a non-negative integer.
+        Empty lines are skipped, other lines are skipped with a warning.
+        """
+        if not line.strip():
+            return
+        key, separator, value = line.partition('=')
+        value = value.strip()
+        if separator and value.isdigit():
+            self.set(key.strip(), int(value))
+        else:
+            where = f"line {line_number}" if line_number is not None else "line"
+            logger.warning(f"Skipped config {where}, expected KEY = non-negative integer: '{line.strip()}'")
+
+    def set(self, key: str, value: int):
+        """Sets a value of a config key"""
+        if key == WINDOW_WIDTH_KEY:
+            self.window_width = value
+        elif key == WINDOW_HEIGHT_KEY:
+            self.window_height = value
+        elif key == HEIGHT_KEY:
+            self.height = value
+        elif key == WIDTH_KEY:
+            self.width = value
+        elif key == MINES_KEY:
+            self.mines = value
+        elif key == AI_KNOWS_NUMBER_OF_MINES_KEY:
+            self.ai_knows_number_of_mines = bool(value)
+        elif key == AI_SEARCH_ASAP_KEY:
+            self.ai_search_asap = bool(value)
+        elif key == AI_MAX_COMPONENT_SIZE_KEY:
+            self.ai_max_component_size = value
+        elif key == NUMPY_BOARD_KEY:
+            self.numpy_board = bool(value)
+        elif key == SPARSE_BOARD_KEY:
+            self.sparse_board = bool(value)
+        elif key == NO_GUESS_KEY:
+            self.no_guess = bool(value)
+        elif key == AUTO_PLAY_SPEED_KEY:
+            self.auto_play_speed = value
+        elif key == AI_STRATEGY_KEY:
+            self.ai_strategy = value
+        else:
+            logger.warning(f"Unknown config key: '{key}'")
+
+    @staticmethod
+    def from_file(path: str) -> 'Config':
+        config = Config()
+        with open(path, 'r') as f:
+            for line_number, line in enumerate(f, 1):
+                config.set_from_file(line, line_number)
+        return config
+
+    def is_setup(self, window: bool = True) -> bool:
+        """Returns True if all required values are set, window size is not required for games without a window"""
         return (
             self.height is not None and
             self.width is not None and
             self.mines is not None and
-            self.window_width is not None and
-            self.window_height is not None and
+            (not window or self.window_width is not None) and
+            (not window or self.window_height is not None) and
             self.ai_knows_number_of_mines is not None and
             self.ai_search_asap is not None
         )
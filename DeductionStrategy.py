@@ -0,0 +1,218 @@
+from math import gcd
+from time import perf_counter
+
+from Bitset import bits
+from Instrumentation import Instrumentation
+from KnowledgeBase import KnowledgeBase
+from Sentence import Sentence
+
+# strategies selectable by a number, e.g. from the AI_STRATEGY config key
+SUBSET_STRATEGY = 0
+GAUSSIAN_STRATEGY = 1
+
+
+class DeductionStrategy():
+    """
+    Finds new safes and mines by combining sentences of the knowledge base.
+    Known safes and mines are already removed from the sentences, when the strategy is asked.
+    """
+
+    def deduce(self, knowledge: KnowledgeBase, instrumentation: Instrumentation = None) -> tuple[int, int]:
+        """Returns newly found safes and mines, sentences can be replaced or removed by the strategy"""
+        raise NotImplementedError
+
+    def deduce_when_stuck(self, knowledge: KnowledgeBase, instrumentation: Instrumentation = None) -> tuple[int, int]:
+        """
+        Returns safes and mines found by a deeper (more expensive) deduction,
+        it is only asked when deduce found nothing and there is no safe move left.
+        """
+        return 0, 0
+
+
+class SubsetStrategy(DeductionStrategy):
+    """
+    When all cells of a sentence are in another sentence, they are removed from the other one together with their mines.
+    Finds everything, that follows from pairs of nested sentences.
+    """
+
+    def deduce(self, knowledge: KnowledgeBase, instrumentation: Instrumentation = None) -> tuple[int, int]:
+        if instrumentation is not None:
+            start = perf_counter()
+            superset_comparisons = knowledge.subset_comparisons
+        comparisons = 0
+        reductions = 0
+        found = [0, 0]
+
+        # only sentences, that were added or changed, can form new subset combinations
+        # and they can only form them with sentences sharing a cell with them
+        while len(knowledge.dirty) > 0:
+            sentence = knowledge.pop_dirty()
+            for superset in knowledge.supersets_of(sentence):
+                self.__minus_subset(knowledge, superset, sentence, found)
+                reductions += 1
+            for other in knowledge.overlapping(sentence):
+                # sentence was replaced, the shrunk one is compared again later
+                if sentence not in knowledge:
+                    break
+                comparisons += 1
+                if other in knowledge and other.is_subset(sentence):
+                    self.__minus_subset(knowledge, sentence, other, found)
+                    reductions += 1
+
+        if instrumentation is not None:
+            instrumentation.add_time("reduce_supersets", perf_counter() - start)
+            comparisons += knowledge.subset_comparisons - superset_comparisons
+            instrumentation.count("subset_comparisons", comparisons)
+            instrumentation.count("subset_reductions", reductions)
+        return found[0], found[1]
+
+    @staticmethod
+    def __minus_subset(knowledge: KnowledgeBase, superset: Sentence, subset: Sentence, found: list[int]):
+        superset = knowledge.minus_subset(superset, subset)
+        if superset.cells == 0:
+            # sentence had the same cells as the subset, so it brings no new information
+            knowledge.remove(superset)
+        elif superset.is_resolved():
+            knowledge.remove(superset)
+            found[0] |= superset.known_safes()
+            found[1] |= superset.known_mines()
+
+
+class GaussianStrategy(SubsetStrategy):
+    """
+    Subset reduction first, when the AI is stuck, every component of the frontier (sentences connected by shared cells)
+    is taken as a system of linear equations over cells with values 0 or 1 and solved by Gaussian elimination.
+    Every reduced equation is then checked with bounds: if a cell being a mine (or safe) would make the equation
+    impossible to satisfy with the other cells, the cell is safe (or a mine).
+    This also finds conclusions from overlapping sentences, that are not nested.
+    Elimination is not incremental: a changed component is eliminated again from its sentences, only components,
+    in which nothing changed since elimination found nothing, are skipped.
+    """
+
+    def __init__(self):
+        # components, in which elimination found nothing, they are skipped until any of their sentences changes
+        self.__exhausted: set[frozenset[Sentence]] = set()
+
+    def deduce_when_stuck(self, knowledge: KnowledgeBase, instrumentation: Instrumentation = None) -> tuple[int, int]:
+        if instrumentation is not None:
+            start = perf_counter()
+        safes = mines = 0
+        eliminations = 0
+        exhausted = set()
+        for component in self.__components(knowledge):
+            key = frozenset(component)
+            if key in self.__exhausted:
+                exhausted.add(key)
+                continue
+            eliminations += 1
+            component_safes, component_mines = eliminate(component)
+            if component_safes or component_mines:
+                safes |= component_safes
+                mines |= component_mines
+            else:
+                exhausted.add(key)
+        # components, that no longer exist, are forgotten
+        self.__exhausted = exhausted
+
+        if instrumentation is not None:
+            instrumentation.add_time("eliminate", perf_counter() - start)
+            instrumentation.count("eliminations", eliminations)
+        return safes, mines
+
+    @staticmethod
+    def __components(knowledge: KnowledgeBase) -> list[list[Sentence]]:
+        """Splits sentences into groups connected by shared cells"""
+        components = []
+        visited = set()
+        for sentence in knowledge:
+            if sentence in visited:
+                continue
+            visited.add(sentence)
+            component = [sentence]
+            for member in component:
+                for cell in bits(member.cells):
+                    for other in knowledge.containing(cell):
+                        if other not in visited:
+                            visited.add(other)
+                            component.append(other)
+            components.append(component)
+        return components
+
+
+def create_strategy(strategy: int) -> DeductionStrategy:
+    """Returns a new strategy by its number, SUBSET_STRATEGY or GAUSSIAN_STRATEGY"""
+    if strategy == SUBSET_STRATEGY:
+        return SubsetStrategy()
+    if strategy == GAUSSIAN_STRATEGY:
+        return GaussianStrategy()
+    raise ValueError(f"Unknown deduction strategy {strategy}")
+
+
+def eliminate(sentences: list[Sentence]) -> tuple[int, int]:
+    """
+    Returns safes and mines, that follow from the sentences by Gaussian elimination with bounds.
+    Equations are rows {cell: coefficient} with a constant, integer coefficients are kept small by their common divisor.
+    """
+    rows: list[tuple[dict[int, int], int]] = []
+    pivots: list[int] = []
+    for sentence in sentences:
+        row = dict.fromkeys(bits(sentence.cells), 1)
+        constant = sentence.count
+        for (pivot_row, pivot_constant), pivot in zip(rows, pivots):
+            if pivot in row:
+                row, constant = eliminate_cell(row, constant, pivot_row, pivot_constant, pivot)
+        if not row:
+            # sentence follows from the previous ones
+            continue
+        pivot = min(row)
+        for i, (other_row, other_constant) in enumerate(rows):
+            if pivot in other_row:
+                rows[i] = eliminate_cell(other_row, other_constant, row, constant, pivot)
+        rows.append((row, constant))
+        pivots.append(pivot)
+
+    safes = mines = 0
+    for row, constant in rows:
+        low = sum(coefficient for coefficient in row.values() if coefficient < 0)
+        high = sum(coefficient for coefficient in row.values() if coefficient > 0)
+        if low == constant or high == constant:
+            # the quick case: every cell is decided by the sign of its coefficient
+            positive = (high == constant)
+            for cell, coefficient in row.items():
+                if (coefficient > 0) == positive:
+                    mines |= 1 << cell
+                else:
+                    safes |= 1 << cell
+            continue
+        for cell, coefficient in row.items():
+            if coefficient > 0:
+                # being a mine raises the lowest possible sum, being safe lowers the highest possible one
+                if low + coefficient > constant:
+                    safes |= 1 << cell
+                elif high - coefficient < constant:
+                    mines |= 1 << cell
+            else:
+                if high + coefficient < constant:
+                    safes |= 1 << cell
+                elif low - coefficient > constant:
+                    mines |= 1 << cell
+    return safes, mines
+
+
+def eliminate_cell(row: dict[int, int], constant: int, pivot_row: dict[int, int], pivot_constant: int,
+              pivot: int) -> tuple[dict[int, int], int]:
+    """Returns a multiple of the row minus a multiple of the pivot row, in which the pivot cell has coefficient 0"""
+    a, b = pivot_row[pivot], row[pivot]
+    result = {cell: a * coefficient for cell, coefficient in row.items()}
+    for cell, coefficient in pivot_row.items():
+        value = result.get(cell, 0) - b * coefficient
+        if value:
+            result[cell] = value
+        else:
+            result.pop(cell, None)
+    constant = a * constant - b * pivot_constant
+    divisor = gcd(constant, *result.values())
+    if divisor > 1:
+        result = {cell: coefficient // divisor for cell, coefficient in result.items()}
+        constant //= divisor
+    return result, constant
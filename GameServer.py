@@ -0,0 +1,412 @@
+"""
+Server hosting many games at once for bots and load tests, it speaks JSON lines on a local TCP or Unix socket.
+Every request is a JSON object on its own line, with a command, a session (except for "new") and an optional id,
+which is copied to the response, e.g.
+    {"id": 1, "command": "new", "config": {"HEIGHT_TILES": 16, "WIDTH_TILES": 30, "MINE_TILES": 99}}
+    {"id": 1, "session": 1, "height": 16, "width": 30, "mines": 99}
+    {"id": 2, "command": "reveal", "session": 1, "cell": [3, 4]}
+    {"id": 2, "cells": [[3, 4, "1"]], "lost": false, "won": false}
+Run `python GameServer.py --help` to see all options.
+"""
+import argparse
+import asyncio
+import copy
+import itertools
+import json
+import logging
+from typing import Callable
+
+from Config import AI_MAX_COMPONENT_SIZE_KEY, Config
+from DeductionStrategy import create_strategy
+from GameState import GameState
+from NoGuessGenerator import check_size
+from ProbabilityEngine import DEFAULT_MAX_COMPONENT_SIZE
+from Replay import Replay
+from runner import CONFIG_FILE_PATH, CONFIG_OPTIONS, add_config_options, game_state_factory, load_config
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_HOST = "127.0.0.1"
+DEFAULT_PORT = 8765
+# games kept in memory, games of other sessions are packed into replays
+DEFAULT_MAX_LIVE_SESSIONS = 256
+# largest game a client can create, a dense board and its AI take memory proportional to the number of cells
+DEFAULT_MAX_BOARD_CELLS = 1000 * 1000
+DEFAULT_MAX_MINES = 100 * 1000
+# enumeration of a component takes time exponential in its size, so clients can only lower the default
+MAX_AI_COMPONENT_SIZE = DEFAULT_MAX_COMPONENT_SIZE
+
+# config keys, that can be set for a new game
+CONFIG_KEYS = {key for _, key in CONFIG_OPTIONS}
+
+# symbols of cells in responses
+HIDDEN = "."
+FLAG = "F"
+MINE = "*"
+
+
+class RequestError(Exception):
+    """Invalid request of a client, its message is sent back in the response"""
+
+
+def is_integer(value) -> bool:
+    """Returns True if a JSON value is an integer, true and false are not (bool is a subclass of int)"""
+    return isinstance(value, int) and not isinstance(value, bool)
+
+
+class Session():
+    """
+    One game of the server. Only recently used games are kept as GameState,
+    others are packed into a replay (mines and moves, about 100 bytes for an expert board) and replayed when used again,
+    so even thousands of idle sessions take little memory. A new game is not created until its first command.
+    Game is only used under the lock, in the executor, because creating, replaying and playing it can take long.
+    """
+    __slots__ = ("create_game_state", "seed", "height", "width", "mines", "game_state", "replay", "lock")
+
+    def __init__(self, create_game_state: Callable[[int], GameState], seed: int, config: Config):
+        self.create_game_state = create_game_state
+        self.seed = seed
+        self.height = config.height
+        self.width = config.width
+        self.mines = config.mines
+        self.game_state: GameState = None
+        self.replay: bytes = None
+        self.lock = asyncio.Lock()
+
+    def get_game_state(self) -> GameState:
+        """Returns the game, it is created or replayed, if it is not in memory"""
+        if self.game_state is None:
+            if self.replay is None:
+                try:
+                    game_state = self.create_game_state(self.seed)
+                except ValueError as e:
+                    # e.g. no layout of a no-guess game could be solved without guessing
+                    raise RequestError(str(e))
+            else:
+                game_state = Replay.from_bytes(self.replay).replay(verify=False)
+                self.replay = None
+            # responses contain cells changed by the command
+            game_state.watch_changes()
+            self.game_state = game_state
+        return self.game_state
+
+    def compact(self):
+        """Packs the game into a replay, if it is in memory"""
+        if self.game_state is not None:
+            self.replay = Replay.from_game_state(self.game_state).to_bytes()
+            self.game_state = None
+
+
+class GameServer():
+    """
+    Asyncio server of game sessions. Connections are handled on the event loop, commands of different sessions
+    run concurrently in the default executor, so a long AI search on a large board doesn't stall other sessions.
+    Commands of one session are made in the order they arrived, responses on one connection can come in
+    a different order than the requests, they are matched by id.
+    """
+
+    def __init__(self, config: Config, max_live_sessions: int = DEFAULT_MAX_LIVE_SESSIONS,
+                 max_board_cells: int = DEFAULT_MAX_BOARD_CELLS, max_mines: int = DEFAULT_MAX_MINES):
+        # defaults of new games, overridden by config of the "new" command
+        self.config = config
+        self.max_live_sessions = max_live_sessions
+        # limits of games created by clients
+        self.max_board_cells = max_board_cells
+        self.max_mines = max_mines
+        self.sessions: dict[int, Session] = {}
+        # sessions, whose games are in memory, the least recently used first (dict keeps order of insertion)
+        self.live: dict[int, None] = {}
+        # background task packing games of idle sessions, None if it was never started
+        self.compaction: asyncio.Task = None
+        # games with the same config share the factory, e.g. no-guess boards are loaded once
+        self.factories: dict[tuple, Callable[[int], GameState]] = {}
+        self.next_session = 1
+        self.commands = {
+            "new": self.new,
+            "reveal": self.reveal,
+            "flag": self.flag,
+            "ai_move": self.ai_move,
+            "state": self.state,
+            "close": self.close,
+        }
+
+    async def serve(self, host: str = DEFAULT_HOST, port: int = DEFAULT_PORT, unix_path: str = None):
+        """Serves connections until cancelled, on the Unix socket, if its path is given"""
+        if unix_path is not None:
+            server = await asyncio.start_unix_server(self.handle_connection, unix_path)
+        else:
+            server = await asyncio.start_server(self.handle_connection, host, port)
+        async with server:
+            print(f"Serving on {', '.join(str(socket.getsockname()) for socket in server.sockets)}", flush=True)
+            await server.serve_forever()
+
+    async def handle_connection(self, reader: asyncio.StreamReader, writer: asyncio.StreamWriter):
+        write_lock = asyncio.Lock()
+        tasks = set()
+
+        async def respond(line: bytes):
+            response = await self.handle_line(line)
+            async with write_lock:
+                writer.write(json.dumps(response, separators=(',', ':')).encode() + b'\n')
+                await writer.drain()
+
+        try:
+            while line := await reader.readline():
+                if not line.strip():
+                    continue
+                # requests are handled concurrently, commands of a session wait for each other on its lock
+                task = asyncio.create_task(respond(line))
+                tasks.add(task)
+                task.add_done_callback(tasks.discard)
+            if tasks:
+                await asyncio.gather(*tasks)
+        except ConnectionError:
+            pass
+        finally:
+            for task in tasks:
+                task.cancel()
+            writer.close()
+
+    async def handle_line(self, line: bytes) -> dict:
+        """Returns the response to one line of a client"""
+        try:
+            request = json.loads(line)
+        except ValueError:
+            return {"error": "Request is not valid JSON"}
+        if not isinstance(request, dict):
+            return {"error": "Request must be a JSON object"}
+        response = {"id": request["id"]} if "id" in request else {}
+        try:
+            command = self.commands.get(request.get("command"))
+            if command is None:
+                raise RequestError(f"Unknown command {request.get('command')!r}")
+            response.update(await command(request))
+        except RequestError as e:
+            response["error"] = str(e)
+        except Exception:
+            logger.exception(f"Request {request} failed")
+            response["error"] = "Internal error"
+        return response
+
+    async def new(self, request: dict) -> dict:
+        config = copy.copy(self.config)
+        overrides = request.get("config", {})
+        if not isinstance(overrides, dict):
+            raise RequestError("Config must be an object of config keys and integer values")
+        for key, value in overrides.items():
+            if key not in CONFIG_KEYS:
+                raise RequestError(f"Unknown config key {key!r}")
+            if not is_integer(value) or value < 0:
+                raise RequestError(f"Value of {key} must be a non-negative integer")
+            config.set(key, value)
+        if not config.is_setup(window=False):
+            raise RequestError("Config is not complete, board size, mines and AI settings are required")
+        if config.height == 0 or config.width == 0 or config.mines >= config.height * config.width:
+            raise RequestError("Board must have at least one cell without a mine")
+        if config.height * config.width > self.max_board_cells:
+            raise RequestError(f"Board must have at most {self.max_board_cells} cells")
+        if config.mines > self.max_mines:
+            raise RequestError(f"Board must have at most {self.max_mines} mines")
+        if overrides.get(AI_MAX_COMPONENT_SIZE_KEY, 0) > MAX_AI_COMPONENT_SIZE:
+            raise RequestError(f"Value of AI_MAX_COMPONENT_SIZE must be at most {MAX_AI_COMPONENT_SIZE}")
+        try:
+            create_strategy(config.ai_strategy)
+            if config.no_guess:
+                check_size(config.height, config.width, config.mines)
+        except ValueError as e:
+            raise RequestError(str(e))
+        # a game without a seed is random, a no-guess game without a seed takes an unused board of the cache
+        seed = request.get("seed")
+        if seed is not None and not is_integer(seed):
+            raise RequestError("Seed must be an integer")
+
+        key = tuple(sorted(vars(config).items()))
+        create_game_state = self.factories.get(key)
+        if create_game_state is None:
+            create_game_state = self.factories[key] = game_state_factory(config)
+        session = self.next_session
+        self.next_session += 1
+        self.sessions[session] = Session(create_game_state, seed, config)
+        return {"session": session, "height": config.height, "width": config.width, "mines": config.mines}
+
+    async def reveal(self, request: dict) -> dict:
+        """Reveals a cell, that is not flagged"""
+        def reveal(game_state: GameState, cell: tuple[int, int]) -> dict:
+            if cell in game_state.revealed or cell in game_state.flags:
+                raise RequestError("Cell is already revealed or flagged")
+            game_state.make_move(cell, False)
+            return changes(game_state)
+
+        return await self.__play(request, reveal, self.__cell(request))
+
+    async def flag(self, request: dict) -> dict:
+        """Places or removes a flag"""
+        def flag(game_state: GameState, cell: tuple[int, int]) -> dict:
+            if cell in game_state.revealed:
+                raise RequestError("Cell is already revealed")
+            game_state.toggle_flag(cell)
+            return changes(game_state)
+
+        return await self.__play(request, flag, self.__cell(request))
+
+    async def ai_move(self, request: dict) -> dict:
+        """Lets the AI make (moves) moves, 1 by default, it stops early when the game is over or AI has no move"""
+        moves = request.get("moves", 1)
+        if not is_integer(moves) or moves < 1:
+            raise RequestError("Moves must be a positive integer")
+
+        def ai_move(game_state: GameState, moves: int) -> dict:
+            made = []
+            while len(made) < moves and not game_state.is_over():
+                move, place_flag = game_state.ai_move()
+                if move is None:
+                    break
+                made.append([*move, place_flag])
+            response = changes(game_state)
+            response["moves"] = made
+            return response
+
+        return await self.__play(request, ai_move, moves)
+
+    async def state(self, request: dict) -> dict:
+        """Returns all cells, that are not hidden, and the progress of the game"""
+        def state(game_state: GameState) -> dict:
+            cells = set(game_state.revealed) | game_state.flags
+            if game_state.lost:
+                cells.update(game_state.game.mines)
+            response = result(game_state, cells)
+            response["moves"] = len(game_state.history)
+            response["guesses"] = game_state.ai.guesses
+            return response
+
+        return await self.__run(request, state, check_over=False)
+
+    async def close(self, request: dict) -> dict:
+        """Ends the session, its game is dropped"""
+        session = self.__session(request)
+        async with self.sessions[session].lock:
+            self.sessions.pop(session, None)
+            self.live.pop(session, None)
+        return {}
+
+    async def __play(self, request: dict, function: Callable, *args) -> dict:
+        return await self.__run(request, function, *args, check_over=True)
+
+    async def __run(self, request: dict, function: Callable, *args, check_over: bool) -> dict:
+        """Calls function(game state, *args) of the session in the executor and returns its response"""
+        session_id = self.__session(request)
+        session = self.sessions[session_id]
+
+        def run() -> dict:
+            game_state = session.get_game_state()
+            if check_over and game_state.is_over():
+                raise RequestError("Game is over")
+            return function(game_state, *args)
+
+        try:
+            async with session.lock:
+                # session might have been closed, while waiting for the lock
+                if session_id not in self.sessions:
+                    raise RequestError(f"Unknown session {session_id}")
+                self.live.pop(session_id, None)
+                self.live[session_id] = None
+                return await asyncio.get_running_loop().run_in_executor(None, run)
+        finally:
+            # the response doesn't wait for games of other sessions to be packed
+            if len(self.live) > self.max_live_sessions and (self.compaction is None or self.compaction.done()):
+                self.compaction = asyncio.create_task(self.__compact_least_recent())
+
+    async def __compact_least_recent(self):
+        """
+        Packs games of the least recently used sessions, until at most (max_live_sessions) games are in memory.
+        Sessions running a command and the most recently used session are skipped, they stay in memory.
+        """
+        try:
+            while len(self.live) > self.max_live_sessions:
+                idle = itertools.islice(self.live, len(self.live) - 1)
+                session_id = next((other for other in idle if other not in self.sessions
+                                   or not self.sessions[other].lock.locked()), None)
+                if session_id is None:
+                    break
+                del self.live[session_id]
+                session = self.sessions.get(session_id)
+                if session is None:
+                    continue
+                # the lock is free, so it is taken right away and no command of the session runs meanwhile
+                async with session.lock:
+                    await asyncio.get_running_loop().run_in_executor(None, session.compact)
+        except Exception:
+            logger.exception("Packing games of idle sessions failed")
+
+    def __session(self, request: dict) -> int:
+        session = request.get("session")
+        # true would find session 1
+        if not is_integer(session) or session not in self.sessions:
+            raise RequestError(f"Unknown session {session}")
+        return session
+
+    def __cell(self, request: dict) -> tuple[int, int]:
+        session = self.sessions[self.__session(request)]
+        cell = request.get("cell")
+        if (not isinstance(cell, list) or len(cell) != 2 or not all(is_integer(x) for x in cell)
+                or not (0 <= cell[0] < session.height and 0 <= cell[1] < session.width)):
+            raise RequestError(f"Cell must be [row, column] inside the {session.height}x{session.width} board")
+        return cell[0], cell[1]
+
+
+def symbol(game_state: GameState, cell: tuple[int, int]) -> str:
+    """Returns how the cell looks to the player: number of nearby mines, flag, mine (once the game is lost) or hidden"""
+    if game_state.lost and game_state.game.is_mine(cell):
+        return MINE
+    if cell in game_state.flags:
+        return FLAG
+    if cell in game_state.revealed:
+        return str(game_state.game.nearby_mines(cell))
+    return HIDDEN
+
+
+def result(game_state: GameState, cells) -> dict:
+    """Returns the cells as [row, column, symbol] and if the game is over"""
+    response = {
+        "cells": [[i, j, symbol(game_state, (i, j))] for i, j in sorted(cells)],
+        "lost": game_state.lost,
+        "won": game_state.is_won(),
+    }
+    if game_state.lost:
+        response["losing_move"] = list(game_state.losing_move)
+    return response
+
+
+def changes(game_state: GameState) -> dict:
+    """Returns the cells changed since the last command"""
+    return result(game_state, game_state.pop_changed())
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minesweeper game server speaking JSON lines, e.g. for bots and load tests")
+    parser.add_argument("-c", "--config", default=CONFIG_FILE_PATH, help="config file with defaults of new games")
+    add_config_options(parser)
+    parser.add_argument("--host", default=DEFAULT_HOST, help="address to listen on")
+    parser.add_argument("--port", type=int, default=DEFAULT_PORT, help="TCP port to listen on")
+    parser.add_argument("--unix", default=None, help="path of a Unix socket to listen on instead of TCP")
+    parser.add_argument("--max-live-sessions", type=int, default=DEFAULT_MAX_LIVE_SESSIONS,
+                        help="number of games kept in memory, games of other sessions are packed into replays")
+    parser.add_argument("--max-board-cells", type=int, default=DEFAULT_MAX_BOARD_CELLS,
+                        help="largest number of cells of a board a client can create")
+    parser.add_argument("--max-mines", type=int, default=DEFAULT_MAX_MINES,
+                        help="largest number of mines of a board a client can create")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show AI log messages (e.g. about random moves)")
+    args = parser.parse_args()
+
+    config = load_config(args)
+
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+    try:
+        server = GameServer(config, args.max_live_sessions, args.max_board_cells, args.max_mines)
+        asyncio.run(server.serve(args.host, args.port, args.unix))
+    except KeyboardInterrupt:
+        pass
+
+
+if __name__ == "__main__":
+    main()
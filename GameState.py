@@ -1,5 +1,13 @@
-from Minesweeper import Minesweeper
+import random
+from collections import deque
+
+from DeductionStrategy import SUBSET_STRATEGY
+from Minesweeper import Minesweeper, NumpyMinesweeper, SparseMinesweeper
 from MinesweeperAI import MinesweeperAI
+from ProbabilityEngine import DEFAULT_MAX_COMPONENT_SIZE
+
+# number of last moves, that can be taken back, every move keeps a snapshot of the AI (see MinesweeperAI.snapshot)
+DEFAULT_UNDO_DEPTH = 100
 
 class GameState():
     game: Minesweeper
@@ -9,12 +17,190 @@ class GameState():
     flags: set
     lost: bool
     losing_move: tuple[int, int]
+    # cells, which changed since the user interface last drew them (None if nobody watches)
+    changed: set
+    # seed of the AI random generator, together with the mines and the history it reproduces the whole game
+    ai_seed: int
+    # every move made in the game, encoded by encode_move
+    history: list[int]
+    # for every move, that can be taken back: AI snapshot, length of history, lost, losing move,
+    # revealed cells and cells with toggled flags (None if moves can't be taken back)
+    undo_log: deque[tuple]
+    # number of last moves, that can be taken back
+    undo_depth: int
 
-    def __init__(self, height, width, mines, ai_knows_number_of_mines, ai_search_asap) -> None:
-        self.game = Minesweeper(height, width, mines)
-        ai_mines = mines if ai_knows_number_of_mines else 0
-        self.ai = MinesweeperAI(height, width, ai_mines, ai_search_asap)
+    def __init__(self, height, width, mines, ai_knows_number_of_mines, ai_search_asap,
+                 ai_max_component_size=DEFAULT_MAX_COMPONENT_SIZE, numpy_board=False,
+                 seed: int = None, game: Minesweeper = None, ai_seed: int = None, sparse_board=False,
+                 ai_strategy: int = SUBSET_STRATEGY) -> None:
+        """
+        Game with the same seed places the same mines and the AI makes the same random moves.
+        A prepared game (e.g. loaded from a replay) can be passed instead of creating a new one.
+        Sparse board stores only mines and the AI only cells it explored, for huge boards.
+        AI strategy selects how the AI combines its knowledge (see DeductionStrategy).
+        """
+        rng = random.Random(seed)
+        if game is None:
+            board_class = SparseMinesweeper if sparse_board else NumpyMinesweeper if numpy_board else Minesweeper
+            game = board_class(height, width, mines, rng)
+        self.game = game
+        self.ai_knows_number_of_mines = ai_knows_number_of_mines
+        self.ai_seed = ai_seed if ai_seed is not None else rng.getrandbits(64)
+        ai_mines = len(game.mines) if ai_knows_number_of_mines else 0
+        self.ai = MinesweeperAI(height, width, ai_mines, ai_search_asap, ai_max_component_size,
+                                rng=random.Random(self.ai_seed), sparse=isinstance(game, SparseMinesweeper),
+                                strategy=ai_strategy)
+        self.history = []
         self.revealed = set()
         self.flags = set()
         self.lost = False
-        self.losing_move = None
\ No newline at end of file
+        self.losing_move = None
+        self.changed = None
+        self.undo_log = None
+        self.undo_depth = DEFAULT_UNDO_DEPTH
+
+    def enable_undo(self, depth: int = DEFAULT_UNDO_DEPTH):
+        """
+        Starts keeping what is needed to take moves back, moves made before can't be taken back.
+        Only the last (depth) moves can be taken back, so memory doesn't grow during a long game.
+        """
+        self.undo_log = deque()
+        self.undo_depth = depth
+
+    def __begin_move(self):
+        if self.undo_log is not None:
+            self.undo_log.append((self.ai.snapshot(), len(self.history), self.lost, self.losing_move, [], []))
+            if len(self.undo_log) > self.undo_depth:
+                self.ai.release(self.undo_log.popleft()[0])
+
+    def undo(self) -> bool:
+        """
+        Takes back the last move, of the player or AI, even the one, which lost the game. Returns False if there is none.
+        Only cells changed by the move are touched, so it is fast even on huge boards.
+        """
+        if not self.undo_log:
+            return False
+        snapshot, history_length, lost, losing_move, revealed, toggled = self.undo_log.pop()
+        self.ai.restore(snapshot)
+        self.ai.release(snapshot)
+        self.revealed.difference_update(revealed)
+        self.flags.symmetric_difference_update(toggled)
+        if self.lost and not lost:
+            self.__mark_changed(self.game.mines)
+        self.lost = lost
+        self.losing_move = losing_move
+        del self.history[history_length:]
+        self.__mark_changed(revealed)
+        self.__mark_changed(toggled)
+        return True
+
+    def watch_changes(self):
+        """Starts keeping track of cells, that changed since last call of pop_changed"""
+        self.changed = set()
+
+    def pop_changed(self) -> set[tuple[int, int]]:
+        """Returns cells, that changed since the last call"""
+        changed = self.changed
+        self.changed = set()
+        return changed
+
+    def __mark_changed(self, cells):
+        if self.changed is not None:
+            self.changed.update(cells)
+
+    def is_won(self) -> bool:
+        """Returns True if all mines are flagged or all safe cells are revealed"""
+        mines = self.game.mines
+        if len(self.flags) == len(mines) and all(flag in mines for flag in self.flags):
+            return True
+        return (self.game.width * self.game.height - len(mines)) == len(self.revealed)
+
+    def is_over(self) -> bool:
+        return self.lost or self.is_won()
+
+    def toggle_flag(self, cell: tuple[int, int]):
+        """Places or removes a flag on a cell and notifies AI about it"""
+        self.__begin_move()
+        self.history.append(encode_move(self.game.width, cell, True, False))
+        self.__toggle_flag(cell)
+
+    def __toggle_flag(self, cell: tuple[int, int]):
+        if self.undo_log:
+            self.undo_log[-1][5].append(cell)
+        if cell in self.flags:
+            self.flags.remove(cell)
+            self.ai.flag_removed(cell)
+        else:
+            self.flags.add(cell)
+            self.ai.flag_placed(cell)
+        self.__mark_changed((cell,))
+
+    def reveal(self, cell: tuple[int, int]) -> bool:
+        """
+        Reveals a cell and updates AI knowledge. Returns False if a mine was hit.
+        If the cell has no nearby mines, all connected cells without nearby mines and their neighbours are revealed as well.
+        """
+        if cell in self.flags:
+            self.__toggle_flag(cell)
+        if self.game.is_mine(cell):
+            self.lost = True
+            self.losing_move = cell
+            # all mines are shown when the game is lost
+            self.__mark_changed(self.game.mines)
+            return False
+
+        # breadth first search over cells without nearby mines, one layer of cells at a time
+        cells_and_counts = []
+        layer = [cell]
+        self.revealed.add(cell)
+        while len(layer) > 0:
+            next_layer = []
+            for revealed_cell, count in zip(layer, self.game.nearby_mines_many(layer)):
+                cells_and_counts.append((revealed_cell, count))
+                if count != 0:
+                    continue
+                for neighbour in self.game.topology.neighbour_cells(revealed_cell):
+                    if neighbour not in self.revealed and neighbour not in self.flags:
+                        self.revealed.add(neighbour)
+                        next_layer.append(neighbour)
+            layer = next_layer
+
+        self.__mark_changed(cell for cell, _ in cells_and_counts)
+        if self.undo_log:
+            self.undo_log[-1][4].extend(cell for cell, _ in cells_and_counts)
+        self.ai.add_knowledge_many(cells_and_counts)
+        return True
+
+    def make_move(self, move: tuple[int, int], place_flag: bool, by_ai: bool = False):
+        """Makes a move returned by AI (or player), which either places a flag or reveals a cell"""
+        self.__begin_move()
+        self.__make_move(move, place_flag, by_ai)
+
+    def __make_move(self, move: tuple[int, int], place_flag: bool, by_ai: bool):
+        self.history.append(encode_move(self.game.width, move, place_flag, by_ai))
+        if place_flag:
+            if move not in self.flags:
+                self.__toggle_flag(move)
+        else:
+            self.reveal(move)
+
+    def ai_move(self) -> tuple[tuple[int, int], bool]:
+        """Lets AI make a move. Returns the move and if it placed a flag, the move is None if AI has no move left."""
+        # AI searching for the move is taken back together with the move
+        self.__begin_move()
+        move, place_flag = self.ai.move()
+        if move is not None:
+            self.__make_move(move, place_flag, by_ai=True)
+        elif self.undo_log:
+            self.ai.release(self.undo_log.pop()[0])
+        return move, place_flag
+
+
+def encode_move(width: int, cell: tuple[int, int], place_flag: bool, by_ai: bool) -> int:
+    """Encodes a move into one integer: linear index of the cell, if it was made by AI and if it placed a flag"""
+    return (cell[0] * width + cell[1]) << 2 | by_ai << 1 | place_flag
+
+
+def decode_move(width: int, move: int) -> tuple[tuple[int, int], bool, bool]:
+    """Returns (cell, place_flag, by_ai) of an encoded move"""
+    return divmod(move >> 2, width), bool(move & 1), bool(move & 2)
@@ -0,0 +1,372 @@
+import sys
+
+import pygame
+
+from AIWorker import AIWorker, PLAY
+from BoardPool import BoardPool
+from Config import Config
+from GameState import GameState
+
+# Colors
+BLACK = (0, 0, 0)
+GRAY = (180, 180, 180)
+WHITE = (255, 255, 255)
+
+# Rules
+RULES = [
+    "Click a cell to reveal it.",
+    "Right-click a cell to mark it as a mine.",
+    "Mark all mines successfully to win!"
+]
+
+OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
+FLAG_IMAGE = "assets/images/flag.png"
+MINE_IMAGE = "assets/images/mine.png"
+
+BOARD_PADDING = 20
+
+# Limit the loop, so an idle game doesn't keep the CPU busy
+FPS = 60
+
+THINKING = "Thinking..."
+
+
+class GameWindow():
+    """
+    Window with the game board and buttons for the player.
+    Pygame is initialized and fonts and images are loaded only when the window is created.
+    """
+
+    def __init__(self, config: Config, pool: BoardPool):
+        self.config = config
+        # games are created ahead in the background, so Reset doesn't wait for mines to be placed
+        self.pool = pool
+        # all moves are made by the worker, so the window keeps responding while the AI searches for a move
+        self.worker = AIWorker()
+
+        # Create game
+        pygame.init()
+        self.size = self.width, self.height = width, height = config.window_width, config.window_height
+        self.screen = pygame.display.set_mode(self.size)
+
+        # Fonts
+        self.smallFont = pygame.font.Font(OPEN_SANS, 20)
+        self.mediumFont = pygame.font.Font(OPEN_SANS, 28)
+        self.largeFont = pygame.font.Font(OPEN_SANS, 40)
+
+        # Compute board size
+        board_width = ((2 / 3) * width) - (BOARD_PADDING * 2)
+        board_height = height - (BOARD_PADDING * 2)
+        self.cell_size = cell_size = int(min(board_width / config.width, board_height / config.height))
+        self.board_origin = (BOARD_PADDING, BOARD_PADDING)
+
+        # Add images
+        self.flag = pygame.transform.scale(pygame.image.load(FLAG_IMAGE), (cell_size, cell_size))
+        self.mine = pygame.transform.scale(pygame.image.load(MINE_IMAGE), (cell_size, cell_size))
+
+        # Red background of the mine, that was hit
+        self.red_background = self.mine.copy()  # just for size
+        self.red_background.fill((255, 0, 0, 100))
+
+        self.clock = pygame.time.Clock()
+
+        # Pre-rendered numbers of nearby mines and texts, so they are not rendered on every frame
+        self.number_glyphs = [self.smallFont.render(str(n), True, BLACK) for n in range(9)]
+        self.status_glyphs = {text: self.mediumFont.render(text, True, WHITE) for text in ("Lost", "Won", THINKING, "")}
+
+        # Buttons with pre-rendered labels
+        self.playButton = self.render_button(pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50), "Play Game")
+        self.undoButton = self.render_button(pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 120,
+            (width / 3) - BOARD_PADDING * 2, 50
+        ), "Undo")
+        self.aiButton = self.render_button(pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
+            (width / 3) - BOARD_PADDING * 2, 50
+        ), "AI Move")
+        self.resetButton = self.render_button(pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
+            (width / 3) - BOARD_PADDING * 2, 50
+        ), "Reset")
+        # same button with a different label while the AI is playing
+        autoPlayRect = pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 90,
+            (width / 3) - BOARD_PADDING * 2, 50
+        )
+        self.autoPlayButton = self.render_button(autoPlayRect, "Auto Play")
+        self.stopButton = self.render_button(autoPlayRect, "Stop")
+
+        # Area of the "Lost" / "Won" text
+        self.statusRect = pygame.Rect(
+            (2 / 3) * width + BOARD_PADDING, (5 / 6) * height - 25,
+            (width / 3) - BOARD_PADDING * 2, 50
+        )
+
+        # Rectangles of all cells, they don't change during the game
+        self.cells = []
+        for i in range(config.height):
+            row = []
+            for j in range(config.width):
+                row.append(pygame.Rect(
+                    self.board_origin[0] + j * cell_size,
+                    self.board_origin[1] + i * cell_size,
+                    cell_size, cell_size
+                ))
+            self.cells.append(row)
+
+        self.gameState = self.create_watched_game_state()
+        self.status = ""
+        # requests of AI moves of the current game, that the worker didn't finish yet
+        self.pending_ai_moves = 0
+        # the game is read only by drawing, while the worker is not changing it,
+        # otherwise the window knows if it is over from the results of the worker
+        self.game_over = False
+        # AI keeps playing the current game, moves are requested every frame
+        self.auto_play = False
+        # moves per second owed to auto play at a limited speed, part of a move is kept for the next frame
+        self.auto_play_moves = 0.0
+
+    def render_button(self, rect: pygame.Rect, text: str) -> tuple[pygame.Rect, pygame.Surface, pygame.Rect]:
+        label = self.mediumFont.render(text, True, BLACK)
+        labelRect = label.get_rect()
+        labelRect.center = rect.center
+        return rect, label, labelRect
+
+    def draw_button(self, button: tuple[pygame.Rect, pygame.Surface, pygame.Rect]):
+        rect, label, labelRect = button
+        pygame.draw.rect(self.screen, WHITE, rect)
+        self.screen.blit(label, labelRect)
+
+    def create_watched_game_state(self) -> GameState:
+        gameState = self.pool.get()
+        gameState.watch_changes()
+        gameState.enable_undo()
+        return gameState
+
+    def draw_instructions(self):
+        self.screen.fill(BLACK)
+
+        # Title
+        title = self.largeFont.render("Play Minesweeper", True, WHITE)
+        titleRect = title.get_rect()
+        titleRect.center = ((self.width / 2), 50)
+        self.screen.blit(title, titleRect)
+
+        # Rules
+        for i, rule in enumerate(RULES):
+            line = self.smallFont.render(rule, True, WHITE)
+            lineRect = line.get_rect()
+            lineRect.center = ((self.width / 2), 150 + 30 * i)
+            self.screen.blit(line, lineRect)
+
+        # Play game button
+        self.draw_button(self.playButton)
+
+    def draw_cell(self, cell: tuple[int, int]) -> pygame.Rect:
+        """Draws a cell and returns its rectangle"""
+        i, j = cell
+        rect = self.cells[i][j]
+        gameState = self.gameState
+        pygame.draw.rect(self.screen, GRAY, rect)
+        pygame.draw.rect(self.screen, WHITE, rect, 3)
+
+        # Add a mine, flag, or number if needed
+        if gameState.lost and gameState.game.is_mine(cell):
+            if cell == gameState.losing_move:
+                self.screen.blit(self.red_background, rect)
+            self.screen.blit(self.mine, rect)
+        elif cell in gameState.flags:
+            self.screen.blit(self.flag, rect)
+        elif cell in gameState.revealed:
+            neighbors = self.number_glyphs[gameState.game.nearby_mines(cell)]
+            neighborsTextRect = neighbors.get_rect()
+            neighborsTextRect.center = rect.center
+            self.screen.blit(neighbors, neighborsTextRect)
+        return rect
+
+    def current_status(self) -> str:
+        gameState = self.gameState
+        if gameState.lost:
+            return "Lost"
+        if gameState.is_won():
+            return "Won"
+        return THINKING if self.pending_ai_moves > 0 and not self.auto_play else ""
+
+    def draw_status(self) -> pygame.Rect:
+        """Draws "Lost" / "Won" / "Thinking..." text and returns its area"""
+        text = self.status_glyphs[self.status]
+        textRect = text.get_rect()
+        textRect.center = ((5 / 6) * self.width, (5 / 6) * self.height)
+        pygame.draw.rect(self.screen, BLACK, self.statusRect)
+        self.screen.blit(text, textRect)
+        return self.statusRect
+
+    def draw_game(self):
+        self.screen.fill(BLACK)
+        for i in range(self.config.height):
+            for j in range(self.config.width):
+                self.draw_cell((i, j))
+        self.draw_button(self.undoButton)
+        self.draw_button(self.aiButton)
+        self.draw_button(self.resetButton)
+        self.draw_auto_play_button()
+        self.draw_status()
+
+    def draw_auto_play_button(self) -> pygame.Rect:
+        button = self.stopButton if self.auto_play else self.autoPlayButton
+        self.draw_button(button)
+        return button[0]
+
+    def set_auto_play(self, auto_play: bool) -> pygame.Rect:
+        """Starts or stops auto play and returns area of its button, which has to be drawn again"""
+        self.auto_play = auto_play
+        self.auto_play_moves = 0.0
+        return self.autoPlayButton[0]
+
+    def request_auto_play_moves(self, frame_time: float):
+        """Asks the worker for moves of one frame, once it made the moves asked for in the previous frame"""
+        if self.pending_ai_moves > 0:
+            return
+        # one request takes at most most of a frame, so the board is drawn at a steady rate even on huge boards
+        seconds = 0.8 / FPS
+        speed = self.config.auto_play_speed
+        if speed <= 0:
+            self.worker.play(self.gameState, seconds=seconds)
+        else:
+            # owed moves are limited, so a slow AI doesn't catch up with a burst of moves
+            self.auto_play_moves = min(self.auto_play_moves + speed * frame_time, max(speed / FPS, 1))
+            moves = int(self.auto_play_moves)
+            if moves == 0:
+                return
+            self.auto_play_moves -= moves
+            self.worker.play(self.gameState, moves=moves, seconds=seconds)
+        self.pending_ai_moves += 1
+
+    def cell_at(self, pos: tuple[int, int]) -> tuple[int, int]:
+        """Returns the cell under a pixel position or None, if the position is outside of the board"""
+        i = (pos[1] - self.board_origin[1]) // self.cell_size
+        j = (pos[0] - self.board_origin[0]) // self.cell_size
+        if 0 <= i < self.config.height and 0 <= j < self.config.width:
+            return (i, j)
+        return None
+
+    def run(self):
+        # Show instructions initially
+        instructions = True
+        # Whole window has to be drawn, e.g. after switching screens or resetting the game
+        full_redraw = True
+
+        # areas outside of the board, that have to be drawn in the next frame
+        dirty_buttons = []
+
+        while True:
+            frame_time = self.clock.tick(FPS) / 1000
+
+            for event in pygame.event.get():
+                # Check if game quit
+                if event.type == pygame.QUIT:
+                    sys.exit()
+
+                if event.type != pygame.MOUSEBUTTONDOWN:
+                    continue
+
+                # Check if play button clicked
+                if instructions:
+                    if event.button == 1 and self.playButton[0].collidepoint(event.pos):
+                        instructions = False
+                        full_redraw = True
+                    continue
+
+                # Moves are only requested here, the worker checks them and makes them, while nobody else reads the game
+                gameState = self.gameState
+                cell = self.cell_at(event.pos)
+
+                # Check for a right-click to toggle flagging
+                if event.button == 3 and not self.game_over:
+                    if cell is not None:
+                        self.worker.toggle_flag(gameState, cell)
+
+                elif event.button == 1:
+
+                    # Take back the last move, auto play would make it again right away
+                    if self.undoButton[0].collidepoint(event.pos):
+                        if self.auto_play:
+                            dirty_buttons.append(self.set_auto_play(False))
+                        self.worker.undo(gameState)
+
+                    # If AI button clicked, make an AI move
+                    elif self.aiButton[0].collidepoint(event.pos) and not self.game_over:
+                        self.worker.play(gameState, moves=1)
+                        self.pending_ai_moves += 1
+
+                    # Start or stop playing by AI until the game is over
+                    elif self.autoPlayButton[0].collidepoint(event.pos):
+                        if self.auto_play or not self.game_over:
+                            dirty_buttons.append(self.set_auto_play(not self.auto_play))
+
+                    # Reset game state
+                    elif self.resetButton[0].collidepoint(event.pos):
+                        self.gameState = self.create_watched_game_state()
+                        self.pending_ai_moves = 0
+                        self.game_over = False
+                        self.set_auto_play(False)
+                        full_redraw = True
+
+                    # User-made move
+                    elif not self.game_over and cell is not None:
+                        self.worker.reveal(gameState, cell)
+
+            # Results of AI moves of previous games are ignored
+            while not self.worker.results.empty():
+                action, gameState, _, over = self.worker.results.get()
+                if gameState is self.gameState:
+                    self.game_over = over
+                    if action == PLAY:
+                        self.pending_ai_moves -= 1
+
+            if self.auto_play and not instructions:
+                if self.game_over:
+                    dirty_buttons.append(self.set_auto_play(False))
+                else:
+                    self.request_auto_play_moves(frame_time)
+
+            # Show game instructions
+            if instructions:
+                if full_redraw:
+                    self.draw_instructions()
+                    pygame.display.flip()
+                    full_redraw = False
+                continue
+
+            # Game can't be read while the worker makes a move, it is drawn in one of the next frames
+            if not self.worker.lock.acquire(blocking=False):
+                continue
+            try:
+                # Draw board, only cells that changed since the last frame, unless everything has to be drawn
+                gameState = self.gameState
+                dirty_rects = []
+                if full_redraw:
+                    self.status = self.current_status()
+                    gameState.pop_changed()
+                    self.draw_game()
+                else:
+                    for cell in gameState.pop_changed():
+                        dirty_rects.append(self.draw_cell(cell))
+
+                    # Display text
+                    current_status = self.current_status()
+                    if current_status != self.status:
+                        self.status = current_status
+                        dirty_rects.append(self.draw_status())
+
+                    if dirty_buttons:
+                        dirty_rects.append(self.draw_auto_play_button())
+                dirty_buttons.clear()
+            finally:
+                self.worker.lock.release()
+
+            if full_redraw:
+                pygame.display.flip()
+                full_redraw = False
+            elif dirty_rects:
+                pygame.display.update(dirty_rects)
@@ -0,0 +1,76 @@
+import json
+from time import perf_counter
+
+
+class MetricsSink():
+    """Receives one record (dictionary) of metrics for every AI update or move"""
+
+    def record(self, record: dict):
+        raise NotImplementedError
+
+    def close(self):
+        pass
+
+
+class MemorySink(MetricsSink):
+    """Keeps all records in memory"""
+
+    def __init__(self):
+        self.records: list[dict] = []
+
+    def record(self, record: dict):
+        self.records.append(record)
+
+
+class JsonLinesSink(MetricsSink):
+    """Writes every record as one line of JSON into a file, which is overwritten unless append is True"""
+
+    def __init__(self, path: str, append: bool = False):
+        self.file = open(path, 'a' if append else 'w')
+
+    def record(self, record: dict):
+        self.file.write(json.dumps(record) + '\n')
+
+    def close(self):
+        self.file.close()
+
+
+class Instrumentation():
+    """
+    Collects metrics of MinesweeperAI: wall time of every phase and counters.
+    Every public call of the AI (adding knowledge, making a move) produces one record, that is passed to the sink.
+    AI without instrumentation only checks it is None, so disabled instrumentation costs next to nothing.
+    """
+
+    def __init__(self, sink: MetricsSink):
+        self.sink = sink
+        self.current: dict = None
+        self.__depth = 0
+        self.__start = 0.0
+
+    def begin(self, event: str):
+        """Starts a record of a public call, nested calls are added to the outer record"""
+        self.__depth += 1
+        if self.__depth == 1:
+            self.current = {"event": event, "time": {}, "counters": {}}
+            self.__start = perf_counter()
+
+    def end(self, **values):
+        """Finishes the record with final values (e.g. size of the knowledge base) and passes it to the sink"""
+        self.__depth -= 1
+        if self.__depth == 0:
+            self.current["time"]["total"] = perf_counter() - self.__start
+            self.current.update(values)
+            self.sink.record(self.current)
+            self.current = None
+
+    def add_time(self, phase: str, seconds: float):
+        times = self.current["time"]
+        times[phase] = times.get(phase, 0.0) + seconds
+
+    def count(self, counter: str, n: int = 1):
+        counters = self.current["counters"]
+        counters[counter] = counters.get(counter, 0) + n
+
+    def set(self, name: str, value):
+        self.current[name] = value
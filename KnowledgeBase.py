@@ -0,0 +1,163 @@
+from Bitset import bits, lowest_bit, remap
+from Sentence import Sentence
+
+
+class KnowledgeBase():
+    """
+    Set of sentences together with an index from a cell to all sentences containing it.
+    Sentences can't be changed, they are replaced by shrunk sentences through methods of the knowledge base,
+    so the index stays up to date. Equal sentences are stored only once.
+    Sets of sentences are dictionaries, so they are iterated in insertion order and a seeded game is always solved the same way.
+    Values are None, except in the set of all sentences, where they are insertion numbers,
+    by which a removed sentence brought back by an undo is put back to its place (see restore_order).
+    While the trail is set (see MinesweeperAI.snapshot), every change is recorded in it together with its undo function.
+    """
+
+    def __init__(self):
+        self.sentences: dict[Sentence, int] = {}
+        # insertion number of the next added sentence
+        self.added = 0
+        self.index: dict[int, dict[Sentence, None]] = {}
+        # sentences that were added or changed since they were last compared with their neighbours
+        self.dirty: dict[Sentence, None] = {}
+        # number of subset tests made, for instrumentation
+        self.subset_comparisons = 0
+        # undo log of changes, None if changes are not recorded
+        self.trail: list[tuple] = None
+        # cells of sentences brought back by an undo, whose sets of sentences are out of order
+        self.unordered = 0
+
+    def __len__(self):
+        return len(self.sentences)
+
+    def __iter__(self):
+        return iter(self.sentences)
+
+    def __contains__(self, sentence: Sentence):
+        return sentence in self.sentences
+
+    def add(self, sentence: Sentence) -> bool:
+        """Adds a sentence, returns False if an equal sentence is already known"""
+        if sentence in self.sentences:
+            return False
+        self.sentences[sentence] = self.added
+        self.added += 1
+        self.dirty[sentence] = None
+        self.__index(sentence)
+        if self.trail is not None:
+            self.trail.append((self.__undo_add, sentence))
+        return True
+
+    def __undo_add(self, sentence: Sentence):
+        del self.sentences[sentence]
+        self.added -= 1
+        self.dirty.pop(sentence, None)
+        self.__unindex(sentence, sentence.cells)
+
+    def __index(self, sentence: Sentence):
+        for cell in bits(sentence.cells):
+            containing = self.index.get(cell)
+            if containing is None:
+                self.index[cell] = {sentence: None}
+            else:
+                containing[sentence] = None
+
+    def remove(self, sentence: Sentence) -> bool:
+        """Removes a sentence, returns False if it is not in the knowledge base"""
+        if sentence not in self.sentences:
+            return False
+        number = self.sentences.pop(sentence)
+        was_dirty = self.dirty.pop(sentence, False) is None
+        self.__unindex(sentence, sentence.cells)
+        if self.trail is not None:
+            self.trail.append((self.__undo_remove, sentence, number, was_dirty))
+        return True
+
+    def __undo_remove(self, sentence: Sentence, number: int, was_dirty: bool):
+        # the sentence is appended, restore_order moves it back to its place
+        self.sentences[sentence] = number
+        if was_dirty:
+            self.dirty[sentence] = None
+        self.__index(sentence)
+        self.unordered |= sentence.cells
+
+    def restore_order(self):
+        """
+        Puts sentences brought back by undo functions of the trail to their places,
+        so sentences are iterated in the same order as before they were removed.
+        Every set of sentences is in the order of insertion, so it is sorted by insertion numbers.
+        """
+        if not self.unordered:
+            return
+        self.sentences = dict(sorted(self.sentences.items(), key=lambda item: item[1]))
+        number = self.sentences.__getitem__
+        self.dirty = dict.fromkeys(sorted(self.dirty, key=number))
+        for cell in bits(self.unordered):
+            if cell in self.index:
+                self.index[cell] = dict.fromkeys(sorted(self.index[cell], key=number))
+        self.unordered = 0
+
+    def pop_dirty(self) -> Sentence:
+        """Returns and forgets the most recently changed sentence"""
+        sentence = self.dirty.popitem()[0]
+        if self.trail is not None:
+            self.trail.append((self.__undo_pop_dirty, sentence))
+        return sentence
+
+    def __undo_pop_dirty(self, sentence: Sentence):
+        # the popped sentence was the last one, so it goes back to the end
+        self.dirty[sentence] = None
+
+    def __unindex(self, sentence: Sentence, cells: int):
+        for cell in bits(cells):
+            containing = self.index[cell]
+            containing.pop(sentence, None)
+            if len(containing) == 0:
+                del self.index[cell]
+
+    def __replace(self, sentence: Sentence, new: Sentence) -> Sentence:
+        # a sentence, that was already removed, is not brought back
+        if new is not sentence and self.remove(sentence):
+            self.add(new)
+        return new
+
+    def mark_known(self, sentence: Sentence, safes: int, mines: int) -> Sentence:
+        """Replaces a sentence of the knowledge base by one without safes and mines. Returns the new sentence."""
+        return self.__replace(sentence, sentence.mark_safes(safes).mark_mines(mines))
+
+    def minus_subset(self, sentence: Sentence, subset: Sentence) -> Sentence:
+        """Replaces a sentence of the knowledge base by one without the subset. Returns the new sentence."""
+        return self.__replace(sentence, sentence.minus_subset(subset))
+
+    def renumber(self, mapping: list[int]):
+        """Moves cell i of every sentence to cell mapping[i], no sentence may contain a cell mapped to -1"""
+        renumbered = {sentence: Sentence(remap(sentence.cells, mapping), sentence.count) for sentence in self.sentences}
+        self.sentences = {renumbered[sentence]: number for sentence, number in self.sentences.items()}
+        self.dirty = {renumbered[sentence]: None for sentence in self.dirty}
+        self.index = {}
+        for sentence in self.sentences:
+            self.__index(sentence)
+
+    def containing(self, cell: int) -> dict[Sentence, None]:
+        """Returns all sentences containing a cell"""
+        return self.index.get(cell, {})
+
+    def supersets_of(self, sentence: Sentence) -> list[Sentence]:
+        """Returns all other sentences, which contain every cell of the sentence"""
+        if sentence.cells == 0:
+            return []
+        # only sentences containing the lowest cell of the sentence can be supersets
+        candidates = self.index[lowest_bit(sentence.cells)]
+        self.subset_comparisons += len(candidates)
+        return [other for other in candidates if other is not sentence and sentence.is_subset(other)]
+
+    def overlapping(self, sentence: Sentence) -> dict[Sentence, None]:
+        """Returns all other sentences, which share at least one cell with the sentence"""
+        if len(sentence) > len(self.sentences):
+            # sentence is wider than the whole knowledge base, so it is cheaper to test every sentence
+            return {other: None for other in self.sentences if other.cells & sentence.cells and other is not sentence}
+        overlapping = {}
+        for cell in bits(sentence.cells):
+            overlapping.update(self.index[cell])
+        overlapping.pop(sentence, None)
+        return overlapping
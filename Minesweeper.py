@@ -0,0 +1,246 @@
+import random
+
+from BoardTopology import SparseTopology, get_topology
+
+# NumPy takes longer to import than the whole game, so it is imported only when a NumPy board is created
+numpy = None
+
+
+def load_numpy():
+    """Imports NumPy on first use. Returns the module or None, if it is not installed."""
+    global numpy
+    if numpy is None:
+        try:
+            import numpy as module
+        except ImportError:
+            return None
+        numpy = module
+    return numpy
+
+
+class Minesweeper():
+    """
+    Minesweeper game representation
+    """
+
+    def __init__(self, height=8, width=8, mines=8, rng: random.Random = None):
+
+        # Set initial width, height, and number of mines
+        self.height = height
+        self.width = width
+        self.topology = get_topology(height, width)
+        self.mines = set()
+
+        # Mines are placed by given random generator, so a game can be reproduced from a seed
+        if rng is None:
+            rng = random
+
+        # Add mines randomly, positions are sampled without replacement,
+        # so even a board full of mines takes one draw per mine
+        for index in rng.sample(range(height * width), mines):
+            self.mines.add(divmod(index, width))
+
+        # Initialize the field with placed mines
+        self.board = self.create_board()
+
+        # At first, player has found no mines
+        self.mines_found = set()
+
+    @classmethod
+    def from_mines(cls, height, width, mines):
+        """Creates a game with mines placed at given cells (e.g. loaded from a replay)"""
+        game = cls(height, width, 0)
+        game.mines = set(mines)
+        game.board = game.create_board()
+        return game
+
+    def create_board(self):
+        """Returns the field, where board[i][j] is True if cell (i, j) is a mine"""
+        board = []
+        for i in range(self.height):
+            row = []
+            for j in range(self.width):
+                row.append(False)
+            board.append(row)
+        # the same field indexed by linear index of a cell, to count nearby mines through the board topology
+        self.flat_board = bytearray(self.height * self.width)
+        for i, j in self.mines:
+            board[i][j] = True
+            self.flat_board[i * self.width + j] = 1
+        return board
+
+    
+    def print(self):
+        """
+        Prints a text-based representation
+        of where mines are located.
+        """
+        for i in range(self.height):
+            print("--" * self.width + "-")
+            for j in range(self.width):
+                if self.board[i][j]:
+                    print("|X", end="")
+                else:
+                    print("| ", end="")
+            print("|")
+        print("--" * self.width + "-")
+
+    def is_mine(self, cell):
+        i, j = cell
+        return self.board[i][j]
+
+    def nearby_mines(self, cell):
+        """
+        Returns the number of mines that are
+        within one row and column of a given cell,
+        not including the cell itself.
+        """
+
+        # Keep count of nearby mines
+        count = 0
+
+        # Loop over all neighbours of the cell, the topology already left out the cell itself and cells out of bounds
+        index = cell[0] * self.width + cell[1]
+        indices = self.topology.indices
+        for k in range(self.topology.offsets[index], self.topology.offsets[index + 1]):
+            count += self.flat_board[indices[k]]
+
+        return count
+
+    def nearby_mines_many(self, cells):
+        """
+        Returns the number of nearby mines
+        for every cell in a list of cells.
+        """
+        return [self.nearby_mines(cell) for cell in cells]
+
+
+class NumpyMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation backed by NumPy arrays.
+    Numbers of nearby mines are computed for the whole board once,
+    so every query is a single array lookup.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, rng: random.Random = None):
+        if load_numpy() is None:
+            raise ImportError("NumPy board requires numpy, run `pip3 install numpy`")
+        super().__init__(height, width, mines, rng)
+
+    def create_board(self):
+        board = numpy.zeros((self.height, self.width), dtype=bool)
+        if self.mines:
+            rows, cols = zip(*self.mines)
+            board[list(rows), list(cols)] = True
+
+        # Sum the board shifted in all 8 directions, padding keeps shifted cells inside the array
+        padded = numpy.pad(board, 1).astype(numpy.uint8)
+        self.nearby = numpy.zeros((self.height, self.width), dtype=numpy.uint8)
+        for di in range(3):
+            for dj in range(3):
+                if (di, dj) != (1, 1):
+                    self.nearby += padded[di:di + self.height, dj:dj + self.width]
+        return board
+
+    def is_mine(self, cell):
+        return bool(self.board[cell])
+
+    def nearby_mines(self, cell):
+        return int(self.nearby[cell])
+
+    def nearby_mines_many(self, cells):
+        if len(cells) == 0:
+            return []
+        rows, cols = zip(*cells)
+        return self.nearby[list(rows), list(cols)].tolist()
+
+
+class PermutedMines():
+    """
+    Mines of a huge board, which are not stored at all: cells are shuffled by a pseudorandom permutation
+    (a Feistel network keyed by the random generator) and the first (count) cells of the shuffled order are mines.
+    A cell is a mine, if the inverse permutation puts it before (count), so memory is constant
+    and every query takes a few multiplications, however large the board or the number of mines is.
+    Cell (i, j) is the index i * width + j.
+    """
+    ROUNDS = 4
+    # odd 64 bit constant of multiplicative hashing (2^64 / golden ratio), high bits of the product are mixed the best
+    MULTIPLIER = 0x9E3779B97F4A7C15
+    MASK_64 = (1 << 64) - 1
+
+    def __init__(self, height: int, width: int, mines: int, rng: random.Random):
+        self.width = width
+        self.size = height * width
+        self.count = mines
+        # the network permutes numbers of 2 * half_bits bits, numbers outside of the board are permuted again
+        # (cycle walking), the domain is less than 4 times the board, so it takes a few steps at most
+        self.half_bits = max(1, ((self.size - 1).bit_length() + 1) // 2)
+        self.keys = [rng.getrandbits(64) for _ in range(self.ROUNDS)]
+        self.shift = 64 - self.half_bits
+
+    def __permute(self, index: int) -> int:
+        half_bits = self.half_bits
+        mask = (1 << half_bits) - 1
+        shift = self.shift
+        while True:
+            left, right = index >> half_bits, index & mask
+            for key in self.keys:
+                left, right = right, left ^ (((right ^ key) * self.MULTIPLIER & self.MASK_64) >> shift)
+            index = left << half_bits | right
+            if index < self.size:
+                return index
+
+    def __inverse(self, index: int) -> int:
+        half_bits = self.half_bits
+        mask = (1 << half_bits) - 1
+        shift = self.shift
+        while True:
+            left, right = index >> half_bits, index & mask
+            for key in reversed(self.keys):
+                left, right = right ^ (((left ^ key) * self.MULTIPLIER & self.MASK_64) >> shift), left
+            index = left << half_bits | right
+            if index < self.size:
+                return index
+
+    def __contains__(self, cell: tuple[int, int]) -> bool:
+        return self.__inverse(cell[0] * self.width + cell[1]) < self.count
+
+    def __len__(self):
+        return self.count
+
+    def __iter__(self):
+        for k in range(self.count):
+            yield divmod(self.__permute(k), self.width)
+
+
+class SparseMinesweeper(Minesweeper):
+    """
+    Minesweeper game representation for huge boards (e.g. 10000 x 10000).
+    Mines are computed from a permutation of cells instead of being placed (see PermutedMines)
+    and neighbours are computed from coordinates, so nothing of the size of the board or of the number of mines is allocated.
+    """
+
+    def __init__(self, height=8, width=8, mines=8, rng: random.Random = None):
+        self.height = height
+        self.width = width
+        self.topology = SparseTopology(height, width)
+        self.mines = PermutedMines(height, width, mines, rng if rng is not None else random)
+        self.board = self.mines
+        self.mines_found = set()
+
+    def create_board(self):
+        """Mines set by from_mines (e.g. from a replay) are kept in a set, which is the whole board"""
+        return self.mines
+
+    def print(self):
+        for i in range(self.height):
+            print("--" * self.width + "-")
+            print("".join("|X" if (i, j) in self.mines else "| " for j in range(self.width)) + "|")
+        print("--" * self.width + "-")
+
+    def is_mine(self, cell):
+        return cell in self.mines
+
+    def nearby_mines(self, cell):
+        mines = self.mines
+        return sum(neighbour in mines for neighbour in self.topology.neighbour_cells(cell))
@@ -1,170 +1,536 @@
+import logging
+import random
+from time import perf_counter
+from typing import Callable
+
 from Sentence import Sentence
-from collections import deque
+from KnowledgeBase import KnowledgeBase
+from Instrumentation import Instrumentation
+from ProbabilityEngine import ProbabilityEngine, DEFAULT_MAX_COMPONENT_SIZE
+from Bitset import bits, from_bits, lowest_bit, remap
+from BoardTopology import SparseTopology, get_topology
+from CellPool import CellPool
+from DeductionStrategy import SUBSET_STRATEGY, create_strategy
+
+logger = logging.getLogger(__name__)
+
+# sparse AI releases indices of cells it no longer needs, when the number of indexed cells doubles (at least this many)
+MIN_COMPACTED_CELLS = 4096
+
+
+class PrepareInterrupted(Exception):
+    """Raised between deduction steps, when preparing a move is no longer wanted"""
+
 
 class MinesweeperAI():
 
     # if AI shouldn't know about number of mines, pass 0
-    def __init__(self, height: int, width: int, mines: int, search_asap: bool):
+    def __init__(self, height: int, width: int, mines: int, search_asap: bool,
+                 max_component_size: int = DEFAULT_MAX_COMPONENT_SIZE, instrumentation: Instrumentation = None,
+                 rng: random.Random = None, sparse: bool = False, strategy: int = SUBSET_STRATEGY):
         # Set initial width and height of the board and optional number of mines
         self.height = height
         self.width = width
         self.num_of_mines = mines
+        # neighbours of cells, shared by all games with the same dimensions,
+        # sparse AI for huge boards only gives indices to cells it touched, so it needs its own
+        self.sparse = sparse
+        self.topology = SparseTopology(height, width) if sparse else get_topology(height, width)
+        # number of indexed cells, when the sparse topology was compacted the last time
+        self.compacted_cells = 0
+
+        # all sets of cells are stored as bits of an integer, cell (i, j) is the bit topology.index((i, j)),
+        # which is i * width + j, unless the AI is sparse
 
         # to keep track of moves made and flags placed
-        self.moves_made = set()
-        self.flags_placed = set()
+        self.moves_made = 0
+        self.flags_placed = 0
 
         # discovered mines and safes
-        self.mines = set()
-        self.safes = set()
+        self.mines = 0
+        self.safes = 0
+        # discovered mines and safes, that were not yet removed from the knowledge base
+        self.pending_mines = 0
+        self.pending_safes = 0
 
-        # knowledge base -> set of sentences
-        self.knowledge : set[Sentence] = set()
+        # knowledge base -> set of sentences indexed by cells
+        self.knowledge = KnowledgeBase()
+        # combines sentences to find new safes and mines (see DeductionStrategy)
+        self.strategy_number = strategy
+        self.strategy = create_strategy(strategy)
 
         # if True, calculation of safe moves happens as soon as possible
         self.search_asap = search_asap
 
-        # initialize board, so we can access random moves faster
-        self.board = set()
-        for i in range(self.height):
-            for j in range(self.width):
-                self.board.add((i, j))
-        
-        # if we know number of mines, add sentence with all cells and number of mines
-        if self.num_of_mines > 0:
-            self.knowledge.add(Sentence(self.board.copy(), self.num_of_mines))
-
-    def __get_neighbours(self, cell: tuple[int, int]) -> set[tuple[int, int]]:
-        """Returns a set of all neighbours of a cell"""
-        neighbours = set()
-        y, x = cell
-        for i in range(y - 1, y + 2):
-            for j in range(x - 1, x + 2):
-                if (i, j) in self.board and (i, j) != cell:
-                    neighbours.add((i, j))
-        return neighbours
+        # number of random moves, that had to be made without certain knowledge
+        self.guesses = 0
+        # calculates probabilities of cells being mines, when a random move has to be made
+        self.probability_engine = ProbabilityEngine(max_component_size)
+        # optionally collects timings and counters of every update and move
+        self.instrumentation = instrumentation
+        # random generator for random moves, seeded generator makes the AI play the same game the same way
+        self.rng = rng if rng is not None else random.Random()
+        # move found ahead of time by prepare, (None, False) if a random move has to be made,
+        # then probabilities for it are prepared as well, both are dropped when the AI learns anything new
+        self.__prepared_move = None
+        self.__prepared_probabilities = None
+        # snapshot taken before the move was prepared, changes made by prepare are taken back, unless the move is made
+        self.__prepared_snapshot = None
+        # called between deduction steps of prepare, returns True if preparing should stop
+        self.__interrupted: Callable[[], bool] = None
+
+        # if we know number of mines, remaining mines are spread over cells, that are neither known safes nor known mines,
+        # both numbers are kept as counters instead of a sentence with all cells, which would take part in every reduction
+        self.mines_left = self.num_of_mines
+        self.unknown_cells = height * width
+
+        # unknown cells, that are in no sentence and not flagged, random moves outside of the frontier are drawn from them,
+        # cells leave sentences only once they are known, so a cell never comes back to the pool, unless its flag is removed,
+        # cells of the sparse AI enter the pool only once they get an index, until then they are untouched
+        self.unknown_pool = CellPool(0 if sparse else height * width)
+
+        # undo log of the knowledge base and the pool, it is kept only while a snapshot is held (see snapshot)
+        self.__trail: list[tuple] = None
+        # number of held snapshots by their position in the trail
+        self.__snapshots: dict[int, int] = {}
+        # position of the first entry of the trail, entries before the oldest held snapshot are dropped
+        self.__trail_start = 0
+
+    def __to_bit(self, cell: tuple[int, int]) -> int:
+        return self.topology.index(cell)
+
+    def __to_cell(self, bit: int) -> tuple[int, int]:
+        return self.topology.cell(bit)
 
     def add_knowledge(self, cell: tuple[int, int], count: int):
         """Notify AI that cell is a neighbour of (count) mines"""
-        self.moves_made.add(cell)
-        self.safes.add(cell)
-        neighbours = self.__get_neighbours(cell)
-        sentence = Sentence(neighbours, count)
-        sentence.mark_safes(self.safes)
-        sentence.mark_mines(self.mines)
-        if not len(sentence.cells) == 0:
-            self.knowledge.add(sentence)
+        self.add_knowledge_many(((cell, count),))
+
+    def add_knowledge_many(self, cells_and_counts: list[tuple[tuple[int, int], int]]):
+        """Notify AI about many revealed cells at once, knowledge is propagated only once after all of them are added"""
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            instrumentation.begin("add_knowledge")
+            start = perf_counter()
+        self.__drop_prepared()
+
+        # all revealed cells are safe, so they are left out of new sentences right away
+        revealed_bits = [self.__to_bit(cell) for cell, _ in cells_and_counts]
+        revealed = from_bits(revealed_bits)
+        self.moves_made |= revealed
+
+        # safes and mines of resolved cells are collected and learned once after the loop, every board sized operation
+        # per cell would make a large cascade cost O(revealed cells * board), only unresolved cells become sentences
+        known_safes = self.safes | revealed
+        known_mines = self.mines
+        found_safes = found_mines = 0
+        # inside of a cascade, every neighbour was revealed as well, such cells are skipped without touching a mask
+        revealed_cells = {cell for cell, _ in cells_and_counts} if len(cells_and_counts) > 1 else ()
+        for bit, (cell, count) in zip(revealed_bits, cells_and_counts):
+            if revealed_cells and all(neighbour in revealed_cells for neighbour in self.topology.neighbour_cells(cell)):
+                continue
+            if self.sparse:
+                # retired neighbours are left out of the mask
+                count -= self.topology.retired_mines_around(bit)
+            cells = self.topology.neighbour_mask(bit)
+            cells ^= cells & known_safes
+            mines = cells & known_mines
+            if mines:
+                cells ^= mines
+                count -= mines.bit_count()
+            if cells == 0:
+                continue
+            if count == 0:
+                found_safes |= cells
+            elif count == cells.bit_count():
+                found_mines |= cells
+            elif self.knowledge.add(Sentence(cells, count)):
+                for cell in bits(cells):
+                    self.unknown_pool.discard(cell)
+        self.__learn(revealed | found_safes, found_mines)
+
+        if instrumentation is not None:
+            instrumentation.add_time("add_knowledge", perf_counter() - start)
+            instrumentation.count("revealed", len(cells_and_counts))
 
         if self.search_asap:
             self.__find_safes()
 
+        # compaction renumbers all cells, so it waits until no snapshot is held
+        if self.sparse and self.__trail is None and len(self.topology.cells) >= max(2 * self.compacted_cells, MIN_COMPACTED_CELLS):
+            self.__compact()
+
+        if instrumentation is not None:
+            self.__end_record()
+
+    def __compact(self):
+        """
+        Releases indices of revealed cells and flagged mines, that are in no sentence.
+        They can't tell anything new, apart from being left out of sentences of their neighbours,
+        so all sets of cells shrink back to the frontier and the cells around it.
+        """
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = perf_counter()
+
+        in_sentences = 0
+        for sentence in self.knowledge:
+            in_sentences |= sentence.cells
+        done = self.moves_made | (self.mines & self.flags_placed)
+        keep = self.topology.board_mask & ~(done & ~(in_sentences | self.pending_safes | self.pending_mines))
+        mapping = self.topology.compact(keep, self.mines)
+
+        self.moves_made = remap(self.moves_made, mapping)
+        self.flags_placed = remap(self.flags_placed, mapping)
+        self.mines = remap(self.mines, mapping)
+        self.safes = remap(self.safes, mapping)
+        self.pending_mines = remap(self.pending_mines, mapping)
+        self.pending_safes = remap(self.pending_safes, mapping)
+        self.knowledge.renumber(mapping)
+        self.unknown_pool.remap(mapping)
+        self.compacted_cells = len(self.topology.cells)
+
+        if instrumentation is not None:
+            instrumentation.add_time("compact", perf_counter() - start)
+            instrumentation.count("retired_cells", len(mapping) - self.compacted_cells)
+
+    def __end_record(self, **values):
+        """Finishes instrumentation record with the current size of the knowledge base"""
+        self.instrumentation.end(
+            knowledge_size=len(self.knowledge),
+            knowledge_cells=sum(len(sentence) for sentence in self.knowledge),
+            safes=self.safes.bit_count(),
+            mines=self.mines.bit_count(),
+            **values
+        )
+
+    def __learn(self, safes: int, mines: int):
+        """Adds newly found safes and mines and queues them to be removed from the knowledge base"""
+        new_safes = safes & ~self.safes
+        new_mines = mines & ~self.mines
+        new_mines_count = new_mines.bit_count()
+        self.mines_left -= new_mines_count
+        self.unknown_cells -= new_safes.bit_count() + new_mines_count
+        for cell in bits(new_safes | new_mines):
+            self.unknown_pool.discard(cell)
+        self.safes |= new_safes
+        self.mines |= new_mines
+        self.pending_safes |= new_safes
+        self.pending_mines |= new_mines
+
     def __find_safes(self):
         """Attempts to find new safes and mines using the knowledge base"""
-        subset_any_last_run = True
-        while (self.search_asap or (len(self.__get_safe_moves()) == 0)) and subset_any_last_run:
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = perf_counter()
+        iterations = 0
+
+        while self.search_asap or self.__get_safe_moves() == 0:
+            if self.__interrupted is not None and self.__interrupted():
+                raise PrepareInterrupted()
+            iterations += 1
             self.__remove_known()
+            self.__learn(*self.strategy.deduce(self.knowledge, self.instrumentation))
+            if self.pending_safes == 0 and self.pending_mines == 0:
+                # reduction found nothing new to propagate, deeper deduction and the number of mines left
+                # are only needed, when there is no safe move
+                if self.__get_safe_moves() or not self.__deduce_when_stuck():
+                    break
 
-            if self.search_asap or (len(self.__get_safe_moves()) == 0):
-                subset_any_last_run = self.__reduce_supersets()
+        if instrumentation is not None:
+            instrumentation.add_time("find_safes", perf_counter() - start)
+            instrumentation.count("find_safes_iterations", iterations)
+
+    def __deduce_when_stuck(self) -> bool:
+        """Returns True if deeper deduction of the strategy or the number of mines left found anything new"""
+        self.__learn(*self.strategy.deduce_when_stuck(self.knowledge, self.instrumentation))
+        return bool(self.pending_safes or self.pending_mines) or self.__use_mines_left()
+
+    def __use_mines_left(self) -> bool:
+        """
+        Deduces from the number of remaining mines, which is only useful when sentences can't tell more (mostly in the endgame).
+        Sentences not sharing a cell are taken together, if they hold all remaining mines, other unknown cells are safe,
+        if the other cells need all of the rest of the mines, they are all mines. Returns True if anything new was found.
+        """
+        if self.num_of_mines == 0:
+            return False
+        covered = 0
+        covered_cells = 0
+        covered_mines = 0
+        for sentence in self.knowledge:
+            if sentence.cells & covered == 0:
+                covered |= sentence.cells
+                covered_cells += len(sentence)
+                covered_mines += sentence.count
+        rest_cells = self.unknown_cells - covered_cells
+        rest_mines = self.mines_left - covered_mines
+        if rest_cells == 0 or 0 < rest_mines < rest_cells:
+            return False
+
+        # cells without an index (only in sparse AI) can't be learned, they stay unknown
+        rest = self.topology.board_mask & ~(self.safes | self.mines | covered)
+        if rest == 0:
+            return False
+        if rest_mines == 0:
+            self.__learn(rest, 0)
+        else:
+            self.__learn(0, rest)
+        if self.instrumentation is not None:
+            self.instrumentation.count("mines_left_deductions")
+        return True
 
     def __remove_known(self) -> bool:
         """Resolves sentences by removing known safes and mines from them"""
-        # store sentences, that were not traversed with current known set of mines and safes in a deque
-        # so they can be traversed in an order
-        to_traverse = deque(self.knowledge)
-        traversed = set()
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = perf_counter()
+        rounds = 0
+        revisited = 0
+
         resolved_any = False
+        while self.pending_safes or self.pending_mines:
+            rounds += 1
+            safes, mines = self.pending_safes, self.pending_mines
+            self.pending_safes = self.pending_mines = 0
+            # only sentences containing a newly known cell can change
+            to_traverse = {}
+            for cell in bits(safes | mines):
+                to_traverse.update(self.knowledge.containing(cell))
+            revisited += len(to_traverse)
 
-        while len(to_traverse) > 0:
-            sentence = to_traverse.pop()
-            sentence.mark_safes(self.safes)
-            sentence.mark_mines(self.mines)
-            if sentence.is_resolved():
-                # if sentence is resolved, we do not wish to add it to the knowledge base
-                # but we do wish to update the knowledge base with the new safes and mines
-                resolved_any = True
-                self.safes.update(sentence.known_safes())
-                self.mines.update(sentence.known_mines())
-                # since we updated known mines and safes, we need to recheck all previously traversed sentences
-                # so we add them to the deque and reset the traversed set
-                to_traverse.extendleft(traversed)
-                traversed = set()
-            else:
-                traversed.add(sentence)
+            for sentence in to_traverse:
+                sentence = self.knowledge.mark_known(sentence, safes, mines)
+                if sentence.is_resolved():
+                    # if sentence is resolved, we do not wish to keep it in the knowledge base
+                    # but we do wish to propagate its safes and mines in the next round
+                    resolved_any = True
+                    self.__resolve(sentence)
 
-        self.knowledge = set(traversed)
+        if instrumentation is not None:
+            instrumentation.add_time("remove_known", perf_counter() - start)
+            instrumentation.count("propagation_rounds", rounds)
+            instrumentation.count("sentences_revisited", revisited)
         return resolved_any
 
-    def __reduce_supersets(self) -> bool:
-        """Finds superset and subset combinations and removes subset cells from the superset"""
-        subset_any_last_run = False
-        for sentence_i in self.knowledge:
-            for sentence_j in self.knowledge:
-                # iterate through all combinations of sentences and check for subsets
-                if not sentence_j == sentence_i and sentence_i.is_subset(sentence_j):
-                    sentence_j.minus_subset(sentence_i)
-                    subset_any_last_run = True
-        # reassign knowledge to rehash the set
-        self.knowledge = set(self.knowledge)
-        return subset_any_last_run
-
-
-    def __get_safe_moves(self) -> set[tuple[int, int]]:
+    def __resolve(self, sentence: Sentence):
+        self.knowledge.remove(sentence)
+        self.__learn(sentence.known_safes(), sentence.known_mines())
+
+    def __get_safe_moves(self) -> int:
         """Returns known safe moves that have not been made yet"""
-        return self.safes - self.moves_made
+        return self.safes & ~self.moves_made
     
-    def move(self) -> tuple[tuple[int, int], bool]:
-        """Returns a move to be made and a boolean indicating if it should be flag placing move"""
-        return self.__move(True)
+    def move(self, guess: bool = True) -> tuple[tuple[int, int], bool]:
+        """
+        Returns a move to be made and a boolean indicating if it should be flag placing move.
+        If guess is False and no move is known to be safe, None is returned instead of a random move.
+        """
+        if self.instrumentation is None:
+            return self.__prepared_or_new_move(guess)
+        self.instrumentation.begin("move")
+        move, place_flag = self.__prepared_or_new_move(guess)
+        self.__end_record(move=move, flag=place_flag)
+        return move, place_flag
+
+    def prepare(self, interrupted: Callable[[], bool] = None) -> bool:
+        """
+        Finds the next move ahead of time, e.g. while the player is thinking, so the next call of move returns right away.
+        The prepared move is the same one move would return, random move is only chosen when move is called.
+        Deductions made meanwhile are kept only if the move is made, any other change (e.g. a move of the player)
+        takes them back first, so the game is played the same way, whether a move was prepared or not.
+        Preparing stops between deduction steps, once interrupted returns True. Returns True if the move was prepared.
+        """
+        if self.__prepared_move is not None:
+            return True
+        if self.instrumentation is not None:
+            self.instrumentation.begin("prepare")
+        snapshot = self.snapshot()
+        self.__interrupted = interrupted
+        try:
+            prepared_move = self.__move(True, guess=False)
+            prepared_probabilities = self.__guess_probabilities() if prepared_move[0] is None else None
+        except PrepareInterrupted:
+            self.restore(snapshot)
+            self.release(snapshot)
+            return False
+        finally:
+            self.__interrupted = None
+            if self.instrumentation is not None:
+                self.__end_record()
+        self.__prepared_move = prepared_move
+        self.__prepared_probabilities = prepared_probabilities
+        self.__prepared_snapshot = snapshot
+        return True
+
+    def __prepared_or_new_move(self, guess: bool) -> tuple[tuple[int, int], bool]:
+        prepared_move = self.__prepared_move
+        if prepared_move is None:
+            return self.__move(True, guess)
+        self.__prepared_move = None
+        # the move is made, so deductions made by prepare are kept
+        self.release(self.__prepared_snapshot)
+        self.__prepared_snapshot = None
+        if prepared_move[0] is None and guess:
+            return self.__get_random_move(), False
+        return prepared_move
+
+    def __drop_prepared(self):
+        self.__prepared_move = None
+        self.__prepared_probabilities = None
+        snapshot = self.__prepared_snapshot
+        if snapshot is not None:
+            self.__prepared_snapshot = None
+            self.restore(snapshot)
+            self.release(snapshot)
 
-    def __move(self, try_again: bool) -> tuple[tuple[int, int], bool]:
+    def __move(self, try_again: bool, guess: bool) -> tuple[tuple[int, int], bool]:
         """Can be called recursively, so if there are no safe moves, it will try to find new safes and mines"""
-        non_marked_mines = self.mines - self.flags_placed
-        if len(non_marked_mines) > 0:
-            return non_marked_mines.pop(), True
+        non_marked_mines = self.mines & ~self.flags_placed
+        if non_marked_mines:
+            return self.__to_cell(lowest_bit(non_marked_mines)), True
         safe_moves = self.__get_safe_moves()
-        if len(safe_moves) > 0:
-            return safe_moves.pop(), False
+        if safe_moves:
+            return self.__to_cell(lowest_bit(safe_moves)), False
         else:
             self.__find_safes()
             if try_again:
-                return self.__move(False)
-            else:
+                return self.__move(False, guess)
+            elif guess:
                 return self.__get_random_move(), False
+            else:
+                return None, False
             
 
     def __get_random_move(self) -> tuple[int, int]:
         """Returns a random move that has not been made yet"""
-        available_moves = self.board - self.moves_made - self.mines - self.flags_placed
+        instrumentation = self.instrumentation
+        if instrumentation is not None:
+            start = perf_counter()
 
-        if len(available_moves) == 0:
-            # in case flags were placed where they shouldn't be
-            available_moves = self.board - self.moves_made - self.mines
-        if len(available_moves) == 0:
+        if self.unknown_cells == 0:
             return None
-        
-        # if we know number of mines, we can calculate the probability of getting a mine when making a random move without any knowledge
-        number_of_mines = len(available_moves) if self.num_of_mines == 0 else self.num_of_mines - len(self.mines)
-        safest_sentence = Sentence(available_moves, number_of_mines)
-        safest_sentence_probability = safest_sentence.mine_probability()
+        self.guesses += 1
+        if self.__trail is not None:
+            self.__trail.append((self.rng.setstate, self.rng.getstate()))
 
-        for sentence in self.knowledge:
-            if len(sentence.cells) == 0:
-                print("empty sentence in making random move -> shouldn't happen")
-                continue
-            current_sentence_probability = sentence.mine_probability()
-            if current_sentence_probability < safest_sentence_probability:
-                safest_sentence = sentence
-                safest_sentence_probability = current_sentence_probability
-        
-        if (safest_sentence_probability == 1):
-            print("Making a random move, but can't calculate probability, because of unknown number of mines")
+        probabilities, others_probability = self.__prepared_probabilities or self.__guess_probabilities()
+        self.__prepared_probabilities = None
+        # flagged cells are only guessed, when all unknown cells are flagged (some of the flags must be wrong)
+        flagged = set(bits(self.flags_placed & ~(self.safes | self.mines)))
+
+        safest_cell, safest_probability = None, 1
+        for cell, probability in probabilities.items():
+            if cell not in flagged and (safest_cell is None or probability < safest_probability):
+                safest_cell, safest_probability = cell, probability
+
+        # cells outside of the frontier are all equally likely to be mines
+        # cells without an index (only in sparse AI) are all unknown
+        others = len(self.unknown_pool)
+        untouched = self.topology.untouched
+        if (others or untouched) and (safest_cell is None or (others_probability is not None and others_probability < safest_probability)):
+            if untouched and self.rng.randrange(others + untouched) >= others:
+                safest_cell = self.__to_bit(self.topology.random_untouched(self.rng))
+            else:
+                safest_cell = self.unknown_pool.random(self.rng)
+            safest_probability = 1 if others_probability is None else others_probability
+
+        if safest_cell is None:
+            safest_cell = min(flagged, key=lambda cell: probabilities.get(cell, 1))
+            safest_probability = probabilities.get(safest_cell, 1)
+
+        if (safest_probability == 1):
+            logger.info("Making a random move, but can't calculate probability, because of unknown number of mines")
         else:
-            print(f"Making a random move with probability of finding mine: {round(safest_sentence_probability, 2) * 100 : .0f}%")
-        return safest_sentence.get_random_cell()
-            
+            logger.info(f"Making a random move with probability of finding mine: {round(safest_probability, 2) * 100 : .0f}%")
+
+        if instrumentation is not None:
+            instrumentation.add_time("random_move", perf_counter() - start)
+            instrumentation.count("guesses")
+            instrumentation.set("guess_probability", safest_probability)
+        return self.__to_cell(safest_cell)
+
+    def __guess_probabilities(self) -> tuple[dict[int, float], float]:
+        """Returns probabilities of cells of all sentences being mines and probability of any other cell being a mine"""
+        mines_left = None if self.num_of_mines == 0 else self.mines_left
+        return self.probability_engine.mine_probabilities(list(self.knowledge), self.unknown_cells, mines_left)
+
+    def snapshot(self) -> tuple:
+        """
+        Returns a snapshot of the AI, which can be restored later, e.g. to undo a move or to try a move and take it back.
+        Sets of cells and counters are integers, which are never changed, so the snapshot refers to them instead of copying,
+        changes of the knowledge base and the unknown cell pool are recorded in the trail while any snapshot is held.
+        Sets of cells changed later are new integers, so every held snapshot keeps its own masks as big as the board
+        in memory (a few kB on an expert board), hold only as many snapshots as needed (see GameState.enable_undo).
+        Snapshot has to be released, once it won't be restored anymore.
+        """
+        if self.__prepared_snapshot is not None:
+            # the state before the move was prepared, deductions of prepare are taken back together with it
+            snapshot = self.__prepared_snapshot
+            self.__snapshots[snapshot[0]] += 1
+            return snapshot
+        if self.__trail is None:
+            self.__trail = []
+            self.knowledge.trail = self.unknown_pool.trail = self.__trail
+        position = self.__trail_start + len(self.__trail)
+        self.__snapshots[position] = self.__snapshots.get(position, 0) + 1
+        return (position, self.moves_made, self.flags_placed, self.mines, self.safes,
+                self.pending_safes, self.pending_mines, self.mines_left, self.unknown_cells, self.guesses,
+                len(self.topology.cells) if self.sparse else 0)
+
+    def restore(self, snapshot: tuple):
+        """
+        Brings the AI back to the state of the snapshot, only changes made since the snapshot are undone.
+        Snapshots taken after this one can't be restored anymore, but they still have to be released.
+        """
+        # a prepared move is the newest change, it is taken back first
+        self.__drop_prepared()
+        (position, self.moves_made, self.flags_placed, self.mines, self.safes,
+         self.pending_safes, self.pending_mines, self.mines_left, self.unknown_cells, self.guesses, indexed) = snapshot
+        trail = self.__trail
+        position -= self.__trail_start
+        for undo, *args in reversed(trail[position:]):
+            undo(*args)
+        del trail[position:]
+        self.knowledge.restore_order()
+        if self.sparse:
+            self.topology.truncate(indexed)
+
+    def release(self, snapshot: tuple):
+        """
+        Forgets a snapshot, changes are no longer recorded, once all snapshots are released.
+        Changes made before the oldest held snapshot are dropped from the trail, so releasing
+        the oldest snapshots (e.g. to keep a limited number of moves to undo) keeps the trail short.
+        """
+        position = snapshot[0]
+        self.__snapshots[position] -= 1
+        if self.__snapshots[position] == 0:
+            del self.__snapshots[position]
+        if not self.__snapshots:
+            self.__trail = None
+            self.__trail_start = 0
+            self.knowledge.trail = self.unknown_pool.trail = None
+            return
+        # the trail is trimmed, once most of it is not needed, so trimming takes O(1) per change on average
+        # (snapshots taken after a restored one may point past the end of the trail)
+        unused = min(min(self.__snapshots) - self.__trail_start, len(self.__trail))
+        if unused > len(self.__trail) // 2:
+            del self.__trail[:unused]
+            self.__trail_start += unused
+
     def flag_placed(self, cell: tuple[int, int]):
-        self.flags_placed.add(cell)
+        if self.sparse and cell in self.topology.retired:
+            return
+        self.__drop_prepared()
+        bit = self.__to_bit(cell)
+        self.flags_placed |= 1 << bit
+        self.unknown_pool.discard(bit)
 
     def flag_removed(self, cell: tuple[int, int]):
-        self.flags_placed.remove(cell)
+        if self.sparse and cell in self.topology.retired:
+            # retired cell is a known mine or a revealed cell, AI has nothing more to do with it
+            return
+        self.__drop_prepared()
+        bit = self.__to_bit(cell)
+        self.flags_placed &= ~(1 << bit)
+        if not ((self.safes | self.mines) >> bit) & 1 and not self.knowledge.containing(bit):
+            self.unknown_pool.add(bit)
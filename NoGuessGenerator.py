@@ -0,0 +1,296 @@
+"""
+Generator of boards, that can be solved by pure deduction from a guaranteed safe first click.
+Every candidate layout is played by MinesweeperAI without guessing, when the AI gets stuck,
+the layout is repaired by moving a mine around the stuck frontier and checked again.
+Produced boards are cached on disk, so every board size is generated only once.
+Run `python NoGuessGenerator.py --help` to see all options.
+"""
+import argparse
+import itertools
+import logging
+import os
+import random
+import struct
+import threading
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass
+
+from Bitset import bits, pack_cells, unpack_cells
+from BoardTopology import get_topology
+from DeductionStrategy import SUBSET_STRATEGY
+from GameState import GameState
+from Minesweeper import Minesweeper, NumpyMinesweeper
+from ProbabilityEngine import DEFAULT_MAX_COMPONENT_SIZE
+
+logger = logging.getLogger(__name__)
+
+DEFAULT_CACHE_DIR = '.board_cache'
+# layout is dropped, if it still can't be solved after this many repairs
+DEFAULT_MAX_REPAIRS = 200
+# generation gives up, if this many layouts in a row are dropped (e.g. the board is too small for so many mines)
+DEFAULT_MAX_ATTEMPTS = 1000
+
+MAGIC = b'MSNG'
+VERSION = 1
+# magic, version, height, width, mines
+HEADER = struct.Struct('<4sBIII')
+START = struct.Struct('<I')
+
+
+@dataclass
+class NoGuessBoard():
+    height: int
+    width: int
+    mines: set[tuple[int, int]]
+    # first click, which reveals a cell without nearby mines
+    start: tuple[int, int]
+
+    def game_state(self, ai_knows_number_of_mines: bool, ai_search_asap: bool,
+                   ai_max_component_size: int = DEFAULT_MAX_COMPONENT_SIZE, numpy_board: bool = False,
+                   seed: int = None, ai_strategy: int = SUBSET_STRATEGY) -> GameState:
+        """Returns a new game on this board with the first click already made"""
+        board_class = NumpyMinesweeper if numpy_board else Minesweeper
+        game = board_class.from_mines(self.height, self.width, self.mines)
+        game_state = GameState(self.height, self.width, len(self.mines), ai_knows_number_of_mines, ai_search_asap,
+                               ai_max_component_size, seed=seed, game=game, ai_strategy=ai_strategy)
+        game_state.make_move(self.start, False)
+        return game_state
+
+
+def solve(height: int, width: int, mines: set[tuple[int, int]], start: tuple[int, int]) -> GameState:
+    """Plays the layout by deduction only, the returned game is won if no guess was needed"""
+    game = Minesweeper.from_mines(height, width, mines)
+    game_state = GameState(height, width, len(mines), True, True, game=game, ai_seed=0)
+    game_state.make_move(start, False)
+    while not game_state.is_over():
+        move, place_flag = game_state.ai.move(guess=False)
+        if move is None:
+            # deduction is stuck, no need to play any further
+            break
+        game_state.make_move(move, place_flag, by_ai=True)
+    return game_state
+
+
+def repair(game_state: GameState, mines: set[tuple[int, int]], start_zone: set[tuple[int, int]], rng: random.Random) -> bool:
+    """
+    Changes the layout where the AI got stuck: a random undecided cell next to revealed cells
+    swaps its content (mine or not) with a random cell away from the revealed area. Returns False if no swap is possible.
+    """
+    ai = game_state.ai
+    revealed = game_state.revealed
+    known_mines = {ai.topology.cell(bit) for bit in bits(ai.mines)}
+    topology = get_topology(game_state.game.height, game_state.game.width)
+
+    frontier = set()
+    for cell in revealed:
+        for neighbour in topology.neighbour_cells(cell):
+            if neighbour not in revealed and neighbour not in known_mines:
+                frontier.add(neighbour)
+    if len(frontier) == 0:
+        return False
+    cell = rng.choice(sorted(frontier))
+
+    far = [
+        (i, j)
+        for i in range(game_state.game.height)
+        for j in range(game_state.game.width)
+        if (i, j) not in revealed and (i, j) not in frontier and (i, j) not in known_mines and (i, j) not in start_zone
+    ]
+    if cell in mines:
+        targets = [other for other in far if other not in mines]
+    else:
+        targets = [other for other in far if other in mines]
+    if len(targets) == 0:
+        return False
+    other = rng.choice(targets)
+
+    if cell in mines:
+        mines.remove(cell)
+        mines.add(other)
+    else:
+        mines.remove(other)
+        mines.add(cell)
+    return True
+
+
+def generate_board(height: int, width: int, mines: int, seed: int, max_repairs: int = DEFAULT_MAX_REPAIRS) -> NoGuessBoard:
+    """Returns a board, that needs no guess, or None if the layout drawn with the seed could not be repaired"""
+    rng = random.Random(seed)
+    topology = get_topology(height, width)
+    start = (rng.randrange(height), rng.randrange(width))
+    # the first click has no mine around, so it opens an area to deduce from
+    start_zone = {start, *topology.neighbour_cells(start)}
+    cells = [cell for cell in (divmod(index, width) for index in range(height * width)) if cell not in start_zone]
+    if mines > len(cells):
+        raise ValueError(f"{mines} mines don't fit into a {height}x{width} board with a safe first click")
+    layout = set(rng.sample(cells, mines))
+
+    for _ in range(max_repairs + 1):
+        game_state = solve(height, width, layout, start)
+        if game_state.is_won():
+            return NoGuessBoard(height, width, layout, start)
+        if not repair(game_state, layout, start_zone, rng):
+            break
+    return None
+
+
+def check_size(height: int, width: int, mines: int):
+    """Raises ValueError, if mines don't fit into the board with a first click anywhere and no mine around it"""
+    if height < 1 or width < 1 or mines < 0:
+        raise ValueError(f"Board {height}x{width} with {mines} mines is not valid")
+    start_zone = min(height, 3) * min(width, 3)
+    if mines > height * width - start_zone:
+        raise ValueError(f"At most {height * width - start_zone} mines fit into a {height}x{width} no-guess board, "
+                         f"{start_zone} cells around the first click are safe")
+
+
+class NoGuessGenerator():
+    """Generates no-guess boards of one size on a pool of processes and keeps them in a file in the cache directory"""
+
+    def __init__(self, height: int, width: int, mines: int, max_repairs: int = DEFAULT_MAX_REPAIRS,
+                 cache_dir: str = DEFAULT_CACHE_DIR, max_attempts: int = DEFAULT_MAX_ATTEMPTS):
+        """Raises ValueError, if the mines don't fit into the board (see check_size)"""
+        check_size(height, width, mines)
+        self.height = height
+        self.width = width
+        self.mines = mines
+        self.max_repairs = max_repairs
+        self.max_attempts = max_attempts
+        self.cache_path = None
+        if cache_dir is not None:
+            self.cache_path = os.path.join(cache_dir, f"no_guess_{height}x{width}x{mines}.bin")
+        # cached boards, that were not yet handed out by next_board
+        self.__unused: list[NoGuessBoard] = None
+        # next_board is called by the background thread of BoardPool as well as the user interface
+        self.__lock = threading.Lock()
+
+    def generate(self, count: int, seed: int = None, workers: int = None) -> list[NoGuessBoard]:
+        """
+        Generates (count) new boards and adds them to the cache.
+        Layouts are drawn with seeds seed, seed + 1, ..., so the same seed gives the same boards with any number of workers.
+        Raises ValueError, if (max_attempts) layouts in a row can't be solved without guessing.
+        """
+        boards = self.__generate(count, seed, workers)
+        self.__save(boards)
+        return boards
+
+    def __generate(self, count: int, seed: int = None, workers: int = None) -> list[NoGuessBoard]:
+        if seed is None:
+            seed = random.getrandbits(32)
+        workers = workers or os.cpu_count() or 1
+        seeds = itertools.count(seed)
+        boards = []
+        # layouts dropped since the last board was found
+        failed = 0
+
+        def add(board: NoGuessBoard):
+            nonlocal failed
+            if board is not None:
+                boards.append(board)
+                failed = 0
+                return
+            failed += 1
+            if failed >= self.max_attempts:
+                raise ValueError(f"No {self.height}x{self.width} board with {self.mines} mines, that can be solved "
+                                 f"without guessing, was found in {self.max_attempts} layouts")
+
+        if workers == 1:
+            while len(boards) < count:
+                add(generate_board(self.height, self.width, self.mines, next(seeds), self.max_repairs))
+        else:
+            with ProcessPoolExecutor(max_workers=workers) as executor:
+                while len(boards) < count:
+                    batch = [next(seeds) for _ in range(workers * 4)]
+                    n = len(batch)
+                    results = executor.map(generate_board, [self.height] * n, [self.width] * n, [self.mines] * n,
+                                           batch, [self.max_repairs] * n)
+                    # boards are taken in the order of seeds, so the result doesn't depend on the number of workers
+                    for board in results:
+                        if len(boards) == count:
+                            break
+                        add(board)
+        return boards
+
+    def boards(self, count: int, seed: int = None, workers: int = None) -> list[NoGuessBoard]:
+        """
+        Returns (count) different boards chosen from the cache by the seed, missing ones are generated first.
+        The same seed chooses the same boards, as long as the cache doesn't change.
+        """
+        if seed is None:
+            seed = random.getrandbits(32)
+        boards = self.load()
+        if len(boards) < count:
+            boards += self.generate(count - len(boards), seed, workers)
+        return random.Random(seed).sample(boards, count)
+
+    def next_board(self, seed: int = None) -> NoGuessBoard:
+        """
+        Returns a cached board, that was not returned before, or a newly generated one once the cache is used up.
+        A board for a seed is generated from the seed (see generate), so the same seed gives the same board
+        whatever is cached, it is not added to the cache.
+        """
+        if seed is not None:
+            return self.__generate(1, seed, workers=1)[0]
+        with self.__lock:
+            if self.__unused is None:
+                self.__unused = self.load()
+                random.shuffle(self.__unused)
+            if self.__unused:
+                return self.__unused.pop()
+            return self.generate(1, workers=1)[0]
+
+    def load(self) -> list[NoGuessBoard]:
+        """Returns all cached boards"""
+        if self.cache_path is None or not os.path.exists(self.cache_path):
+            return []
+        with open(self.cache_path, 'rb') as f:
+            data = f.read()
+        magic, version, height, width, mines = HEADER.unpack_from(data)
+        if magic != MAGIC or version != VERSION or (height, width, mines) != (self.height, self.width, self.mines):
+            logger.warning(f"Ignoring invalid board cache {self.cache_path}")
+            return []
+        size = (height * width + 7) // 8
+        boards = []
+        for offset in range(HEADER.size, len(data) - START.size - size + 1, START.size + size):
+            start, = START.unpack_from(data, offset)
+            mines = unpack_cells(data[offset + START.size:offset + START.size + size], width)
+            boards.append(NoGuessBoard(height, width, mines, divmod(start, width)))
+        return boards
+
+    def __save(self, boards: list[NoGuessBoard]):
+        if self.cache_path is None or len(boards) == 0:
+            return
+        os.makedirs(os.path.dirname(self.cache_path) or '.', exist_ok=True)
+        new_file = not os.path.exists(self.cache_path)
+        with open(self.cache_path, 'ab') as f:
+            if new_file:
+                f.write(HEADER.pack(MAGIC, VERSION, self.height, self.width, self.mines))
+            for board in boards:
+                f.write(START.pack(board.start[0] * self.width + board.start[1]))
+                f.write(pack_cells(board.mines, self.width, self.height * self.width))
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Generates boards, that can be solved without guessing, into the board cache")
+    parser.add_argument("-n", "--boards", type=int, default=100, help="number of boards to generate")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes, all cores by default")
+    parser.add_argument("--height", type=int, default=16)
+    parser.add_argument("--width", type=int, default=16)
+    parser.add_argument("--mines", type=int, default=40)
+    parser.add_argument("-s", "--seed", type=int, default=None, help="seed of the first layout, layout n uses seed + n")
+    parser.add_argument("--max-repairs", type=int, default=DEFAULT_MAX_REPAIRS,
+                        help="number of local repairs of a layout, before it is dropped")
+    parser.add_argument("--cache-dir", default=DEFAULT_CACHE_DIR)
+    args = parser.parse_args()
+
+    generator = NoGuessGenerator(args.height, args.width, args.mines, args.max_repairs, args.cache_dir)
+    start = time.perf_counter()
+    generator.generate(args.boards, args.seed, args.workers)
+    elapsed = time.perf_counter() - start
+    print(f"Generated {args.boards} boards in {elapsed : .2f} s ({args.boards / elapsed : .2f} boards/s), "
+          f"{len(generator.load())} boards cached in {generator.cache_path}")
+
+
+if __name__ == "__main__":
+    main()
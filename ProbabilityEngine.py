@@ -0,0 +1,253 @@
+from Bitset import bits
+from Sentence import Sentence
+
+# components with more cells are not enumerated, their probabilities are only approximated
+DEFAULT_MAX_COMPONENT_SIZE = 48
+
+
+class Component():
+    """
+    Independent part of the frontier: cells and sentences, that share no cell with the rest of the frontier.
+    After enumeration holds, for every possible number of mines (k) in the component,
+    number of consistent mine assignments and for each cell number of those assignments, where the cell is a mine.
+    """
+
+    def __init__(self, cells: list[int], sentences: list[Sentence]):
+        self.cells = cells
+        self.sentences = sentences
+        self.ways: dict[int, int] = {}
+        self.mine_ways: dict[int, list[int]] = {}
+        # probabilities of cells, when the component was too large to enumerate
+        self.approximation: list[float] = None
+
+    def enumerate(self):
+        """Counts all mine assignments consistent with the sentences using backtracking with memoization"""
+        position = {cell: i for i, cell in enumerate(self.cells)}
+        n = len(self.cells)
+        # constraints of every cell and for every constraint its first and last cell
+        cell_constraints = [[] for _ in range(n)]
+        first, last = [], []
+        remaining = []
+        for c, sentence in enumerate(self.sentences):
+            positions = [position[cell] for cell in bits(sentence.cells)]
+            for i in positions:
+                cell_constraints[i].append(c)
+            first.append(min(positions))
+            last.append(max(positions))
+            remaining.append(sentence.count)
+        # constraints partially assigned before a cell, their remaining counts form the memoization key
+        active = [[c for c in range(len(self.sentences)) if first[c] < i <= last[c]] for i in range(n + 1)]
+        # number of cells of a constraint after a cell
+        cells_after = [{c: 0 for c in cell_constraints[i]} for i in range(n)]
+        for c, sentence in enumerate(self.sentences):
+            positions = sorted(position[cell] for cell in bits(sentence.cells))
+            for k, i in enumerate(positions):
+                cells_after[i][c] = len(positions) - k - 1
+
+        memo = {}
+
+        def solve(i: int) -> dict[int, tuple[int, list[int]]]:
+            """Returns for cells from i on: number of mines -> (number of assignments, mine counts of cells)"""
+            if i == n:
+                return {0: (1, [])}
+            key = (i, tuple(remaining[c] for c in active[i]))
+            if key in memo:
+                return memo[key]
+
+            result = {}
+            constraints = cell_constraints[i]
+            after = cells_after[i]
+            # cell i is a mine, every constraint must still need a mine
+            if all(remaining[c] > 0 and remaining[c] - 1 <= after[c] for c in constraints):
+                for c in constraints:
+                    remaining[c] -= 1
+                for k, (ways, mine_ways) in solve(i + 1).items():
+                    result[k + 1] = (ways, [ways] + mine_ways)
+                for c in constraints:
+                    remaining[c] += 1
+            # cell i is safe, every constraint must still have enough cells left for its mines
+            if all(remaining[c] <= after[c] for c in constraints):
+                for k, (ways, mine_ways) in solve(i + 1).items():
+                    if k in result:
+                        other_ways, other_mine_ways = result[k]
+                        result[k] = (
+                            ways + other_ways,
+                            [other_mine_ways[0]] + [a + b for a, b in zip(mine_ways, other_mine_ways[1:])]
+                        )
+                    else:
+                        result[k] = (ways, [0] + mine_ways)
+
+            memo[key] = result
+            return result
+
+        for k, (ways, mine_ways) in solve(0).items():
+            self.ways[k] = ways
+            self.mine_ways[k] = mine_ways
+
+    def approximate(self):
+        """Approximates probability of every cell as the average of naive probabilities of its sentences"""
+        totals = {cell: [0.0, 0] for cell in self.cells}
+        for sentence in self.sentences:
+            probability = sentence.mine_probability()
+            for cell in bits(sentence.cells):
+                totals[cell][0] += probability
+                totals[cell][1] += 1
+        self.approximation = [totals[cell][0] / totals[cell][1] for cell in self.cells]
+
+
+class ProbabilityEngine():
+    """
+    Calculates exact probability of every unknown cell being a mine.
+    Frontier (cells in sentences) is split into independent components, consistent mine assignments
+    of every component are enumerated and components are combined together with the global number of mines.
+    """
+
+    def __init__(self, max_component_size: int = DEFAULT_MAX_COMPONENT_SIZE):
+        self.max_component_size = max_component_size
+
+    def __split(self, sentences: list[Sentence]) -> list[Component]:
+        """Splits sentences into components connected by shared cells"""
+        parent = list(range(len(sentences)))
+
+        def find(i):
+            while parent[i] != i:
+                parent[i] = parent[parent[i]]
+                i = parent[i]
+            return i
+
+        owner = {}
+        for i, sentence in enumerate(sentences):
+            for cell in bits(sentence.cells):
+                if cell in owner:
+                    parent[find(i)] = find(owner[cell])
+                else:
+                    owner[cell] = i
+
+        groups: dict[int, list[Sentence]] = {}
+        for i, sentence in enumerate(sentences):
+            groups.setdefault(find(i), []).append(sentence)
+
+        components = []
+        for group in groups.values():
+            # order cells as they are reached through sentences, so constraints get closed early
+            seen = set()
+            cells = []
+            for sentence in group:
+                for cell in bits(sentence.cells):
+                    if cell not in seen:
+                        seen.add(cell)
+                        cells.append(cell)
+            components.append(Component(cells, group))
+        return components
+
+    def mine_probabilities(self, sentences: list[Sentence], unknown: int,
+                           mines_left: int = None) -> tuple[dict[int, float], float]:
+        """
+        Returns probability of every frontier cell being a mine and probability of any other unknown cell being a mine.
+        Unknown is the number of all cells, that are not known to be safe or mines, frontier cells included.
+        If the number of remaining mines is not known (None), other cells probability is None.
+        """
+        components = self.__split([sentence for sentence in sentences if sentence.cells])
+        frontier_size = 0
+        for component in components:
+            frontier_size += len(component.cells)
+            if len(component.cells) > self.max_component_size:
+                component.approximate()
+            else:
+                component.enumerate()
+        others = unknown - frontier_size
+
+        probabilities = {}
+        exact = [component for component in components if component.approximation is None]
+        for component in components:
+            if component.approximation is not None:
+                probabilities.update(zip(component.cells, component.approximation))
+
+        if mines_left is not None:
+            # mines in approximated components are estimated by their expected count
+            approximated_mines = round(sum(sum(c.approximation) for c in components if c.approximation is not None))
+            combined = self.__combine(exact, others, mines_left - approximated_mines)
+            if combined is not None:
+                exact_probabilities, others_probability = combined
+                probabilities.update(exact_probabilities)
+                return probabilities, others_probability
+
+        # without the global number of mines, every assignment of a component is equally likely
+        for component in exact:
+            total = sum(component.ways.values())
+            if total == 0:
+                # inconsistent knowledge (e.g. player placed wrong flags), nothing better is known
+                probabilities.update((cell, 1) for cell in component.cells)
+                continue
+            mine_ways = [sum(column) for column in zip(*component.mine_ways.values())]
+            probabilities.update((cell, ways / total) for cell, ways in zip(component.cells, mine_ways))
+        return probabilities, None
+
+    def __combine(self, components: list[Component], others: int, mines_left: int) -> tuple[dict[int, float], float]:
+        """
+        Combines components with the global number of mines.
+        Every combination of component assignments with K mines in total is weighted by
+        number of ways, how the remaining mines can be placed into other cells: comb(others, mines_left - K).
+        """
+        # prefix[i] and suffix[i] are distributions of total mines in components before and after component i
+        prefix = [{0: 1}]
+        for component in components:
+            prefix.append(self.__convolve(prefix[-1], component.ways))
+        suffix = [{0: 1}]
+        for component in reversed(components):
+            suffix.append(self.__convolve(suffix[-1], component.ways))
+        suffix.reverse()
+
+        total_distribution = prefix[-1]
+        # weights[K] is proportional to comb(others, mines_left - K)
+        weights = self.__binomial_weights(others, mines_left, max(total_distribution))
+        total = sum(ways * weights[k] for k, ways in total_distribution.items())
+        if total == 0:
+            return None
+
+        probabilities = {}
+        for i, component in enumerate(components):
+            rest = self.__convolve(prefix[i], suffix[i + 1])
+            # weight of component having k mines, given all other components and other cells
+            component_weights = {k: sum(ways * weights[k + j] for j, ways in rest.items()) for k in component.ways}
+            for j, cell in enumerate(component.cells):
+                mine_weight = sum(component.mine_ways[k][j] * weight for k, weight in component_weights.items())
+                probabilities[cell] = mine_weight / total
+
+        others_probability = None
+        if others > 0:
+            # comb(others - 1, n - 1) = comb(others, n) * n / others
+            others_mine_weight = sum(ways * weights[k] * (mines_left - k) for k, ways in total_distribution.items())
+            others_probability = others_mine_weight / (total * others)
+        return probabilities, others_probability
+
+    @staticmethod
+    def __binomial_weights(others: int, mines_left: int, max_mines: int) -> list[int]:
+        """
+        Returns weights[K] for K from 0 to max_mines, proportional to comb(others, mines_left - K) (0 if it is out of range).
+        On huge boards comb itself is a number with millions of digits, so all weights are divided by
+        a common factor, which leaves only products of (max_mines) small numbers.
+        """
+        weights = [0] * (max_mines + 1)
+        low = max(0, mines_left - max_mines)
+        high = min(others, mines_left)
+        if low > high:
+            return weights
+        # comb(others, n) / comb(others, low) * (low + 1) * ... * high
+        # = (others - low) * ... * (others - n + 1) * (n + 1) * ... * high
+        falling = [1]
+        for n in range(low + 1, high + 1):
+            falling.append(falling[-1] * (others - n + 1))
+        rising = 1
+        for n in range(high, low - 1, -1):
+            weights[mines_left - n] = falling[n - low] * rising
+            rising *= n
+        return weights
+
+    @staticmethod
+    def __convolve(a: dict[int, int], b: dict[int, int]) -> dict[int, int]:
+        result = {}
+        for i, x in a.items():
+            for j, y in b.items():
+                result[i + j] = result.get(i + j, 0) + x * y
+        return result
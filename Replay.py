@@ -0,0 +1,158 @@
+"""
+Compact binary replay of a game: board dimensions, packed mine bitmap, AI settings and the sequence of moves.
+Replaying a game re-runs the AI with the same seed, so it makes the same moves again, without user interface.
+Run `python Replay.py --help` to see all options.
+"""
+import argparse
+import logging
+import struct
+import time
+from collections.abc import Collection
+from dataclasses import dataclass
+
+from Bitset import pack_cells, unpack_cells
+from DeductionStrategy import SUBSET_STRATEGY
+from GameState import GameState, decode_move
+from Minesweeper import Minesweeper, SparseMinesweeper
+
+MAGIC = b'MSRP'
+VERSION = 2
+# magic, version, height, width, ai flags, ai seed, ai max component size
+HEADER = struct.Struct('<4sBIIBQI')
+COUNT = struct.Struct('<I')
+# encoded moves are 64 bit, version 1 stored them in 32 bits, which overflows on boards of more than 2^30 cells
+MOVE_FORMATS = {1: 'I', 2: 'Q'}
+
+KNOWS_NUMBER_OF_MINES = 1
+SEARCH_ASAP = 2
+SPARSE_BOARD = 4
+# the rest of the flags holds the number of the AI deduction strategy
+STRATEGY_SHIFT = 3
+
+
+@dataclass
+class Replay():
+    height: int
+    width: int
+    # set of mines, or mines of the game the replay was made from (e.g. PermutedMines of a sparse board)
+    mines: Collection[tuple[int, int]]
+    ai_knows_number_of_mines: bool
+    ai_search_asap: bool
+    ai_seed: int
+    ai_max_component_size: int
+    # moves encoded by GameState.encode_move
+    moves: list[int]
+    sparse_board: bool = False
+    ai_strategy: int = SUBSET_STRATEGY
+
+    @staticmethod
+    def from_game_state(game_state: GameState) -> 'Replay':
+        game = game_state.game
+        return Replay(
+            height=game.height,
+            width=game.width,
+            # mines of a game never change, they are packed without copying them (see to_bytes)
+            mines=game.mines,
+            ai_knows_number_of_mines=game_state.ai_knows_number_of_mines,
+            ai_search_asap=game_state.ai.search_asap,
+            ai_seed=game_state.ai_seed,
+            ai_max_component_size=game_state.ai.probability_engine.max_component_size,
+            moves=list(game_state.history),
+            sparse_board=game_state.ai.sparse,
+            ai_strategy=game_state.ai.strategy_number
+        )
+
+    def to_bytes(self) -> bytes:
+        flags = ((KNOWS_NUMBER_OF_MINES if self.ai_knows_number_of_mines else 0)
+                 | (SEARCH_ASAP if self.ai_search_asap else 0)
+                 | (SPARSE_BOARD if self.sparse_board else 0)
+                 | self.ai_strategy << STRATEGY_SHIFT)
+        header = HEADER.pack(MAGIC, VERSION, self.height, self.width, flags, self.ai_seed, self.ai_max_component_size)
+        # one bit per cell, cell (i, j) is bit i * width + j
+        bitmap = pack_cells(self.mines, self.width, self.height * self.width)
+        moves = struct.pack(f'<I{len(self.moves)}Q', len(self.moves), *self.moves)
+        return header + bitmap + moves
+
+    @staticmethod
+    def from_bytes(data: bytes) -> 'Replay':
+        magic, version, height, width, flags, ai_seed, ai_max_component_size = HEADER.unpack_from(data)
+        if magic != MAGIC:
+            raise ValueError("Not a Minesweeper replay")
+        if version not in MOVE_FORMATS:
+            raise ValueError(f"Unsupported replay version {version}")
+        offset = HEADER.size
+        size = (height * width + 7) // 8
+        mines = unpack_cells(data[offset:offset + size], width)
+        offset += size
+        count, = COUNT.unpack_from(data, offset)
+        moves = list(struct.unpack_from(f'<{count}{MOVE_FORMATS[version]}', data, offset + COUNT.size))
+        return Replay(height, width, mines, bool(flags & KNOWS_NUMBER_OF_MINES), bool(flags & SEARCH_ASAP),
+                      ai_seed, ai_max_component_size, moves, bool(flags & SPARSE_BOARD), flags >> STRATEGY_SHIFT)
+
+    def save(self, path: str):
+        with open(path, 'wb') as f:
+            f.write(self.to_bytes())
+
+    @staticmethod
+    def load(path: str) -> 'Replay':
+        with open(path, 'rb') as f:
+            return Replay.from_bytes(f.read())
+
+    def new_game_state(self) -> GameState:
+        """Returns the game at its start"""
+        board_class = SparseMinesweeper if self.sparse_board else Minesweeper
+        game = board_class.from_mines(self.height, self.width, self.mines)
+        return GameState(self.height, self.width, len(self.mines), self.ai_knows_number_of_mines, self.ai_search_asap,
+                         self.ai_max_component_size, game=game, ai_seed=self.ai_seed,
+                         ai_strategy=self.ai_strategy)
+
+    def replay(self, verify: bool = True) -> GameState:
+        """
+        Makes all moves of the replay again. Moves made by AI are asked from AI again,
+        if verify is True, it is checked that AI made the same move as in the recorded game.
+        """
+        game_state = self.new_game_state()
+        for encoded in self.moves:
+            cell, place_flag, by_ai = decode_move(self.width, encoded)
+            if by_ai:
+                move = game_state.ai.move()
+                if verify and move != (cell, place_flag):
+                    raise ValueError(f"AI made move {move} instead of recorded move {(cell, place_flag)}")
+                game_state.make_move(cell, place_flag, by_ai)
+            elif place_flag:
+                # flags of the player are toggled, a second flag on the same cell removes it
+                game_state.toggle_flag(cell)
+            else:
+                game_state.make_move(cell, place_flag)
+        return game_state
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Replays a recorded game and re-runs the AI deterministically")
+    parser.add_argument("path", help="replay file, e.g. written by Simulator.py --save-slowest")
+    parser.add_argument("--no-verify", action="store_true", help="don't check, that AI makes the recorded moves")
+    parser.add_argument("--profile", action="store_true", help="profile the replay and print the slowest functions")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.WARNING, format="%(message)s")
+
+    replay = Replay.load(args.path)
+    print(f"Board {replay.height}x{replay.width} with {len(replay.mines)} mines, {len(replay.moves)} moves")
+    profiler = None
+    if args.profile:
+        # profiler is imported only when it is used, so replaying starts fast
+        import cProfile
+        profiler = cProfile.Profile()
+    start = time.perf_counter()
+    if profiler is not None:
+        profiler.enable()
+    game_state = replay.replay(not args.no_verify)
+    if profiler is not None:
+        profiler.disable()
+    print(f"Replayed in {(time.perf_counter() - start) * 1000 : .2f} ms, game {'won' if game_state.is_won() else 'lost' if game_state.lost else 'unfinished'}")
+    if profiler is not None:
+        import pstats
+        pstats.Stats(profiler).sort_stats(pstats.SortKey.CUMULATIVE).print_stats(20)
+
+
+if __name__ == "__main__":
+    main()
@@ -1,5 +1,10 @@
+import logging
 import random
 
+from Bitset import bits, random_bit
+
+logger = logging.getLogger(__name__)
+
 
 class Sentence():
     """
@@ -8,92 +13,96 @@ class Sentence():
         If we know that A and B are mines, then C is safe.
         If we know that A and C are mines, then B is safe.
         If we know that B and C are mines, then A is safe.
+    Cells are stored as bits of an integer (see Bitset).
+    Sentences are never changed, marking cells returns a new sentence (or the same one, if nothing changed),
+    so they can be kept in dictionaries and their hash is computed only once.
     """
+    __slots__ = ("cells", "count", "__hash")
 
-    def __init__(self, cells: set[tuple[int, int]], count: int):
+    def __init__(self, cells: int, count: int):
         self.cells = cells
         self.count = count
+        self.__hash = hash(cells)
 
     def __hash__(self):
-        return hash((tuple(self.cells), self.count))
+        return self.__hash
 
     def __eq__(self, other):
-        return self.cells == other.cells
+        return self.cells == other.cells and self.count == other.count
+
+    def __len__(self):
+        return self.cells.bit_count()
 
     def __str__(self):
-        return f"{self.cells} = {self.count}"
+        return f"{set(bits(self.cells))} = {self.count}"
 
-    def known_mines(self):
+    def known_mines(self) -> int:
         """Returns cells, that are known to be mines."""
-        if len(self.cells) == self.count:
+        if len(self) == self.count:
             return self.cells
-        return set()
+        return 0
 
-    def known_safes(self):
+    def known_safes(self) -> int:
         """Returns cells, that are known to be safe."""
         if self.count == 0:
             return self.cells
-        return set()
-
-    def mark_mines(self, mines: set[tuple[int, int]]) -> bool:
-        """Removes mines from cells and updates count. Returns True if new mines were marked."""
-        len_of_cells_with_mines = len(self.cells)
-        self.cells -= mines
-        len_of_cells = len(self.cells)
-        self.count -= len_of_cells_with_mines - len_of_cells
-        return len_of_cells_with_mines != len_of_cells
-
-    def mark_safes(self, safes: set[tuple[int, int]]) -> bool:
-        """Removes safes from cells. Returns True if new safes were marked."""
-        len_of_cells_with_safes = len(self.cells)
-        self.cells -= safes
-        return len_of_cells_with_safes != len(self.cells)
-
-    def mark_mine(self, cell):
-        """Marks a cell as a mine. Updates internal knowledge representation."""
-        if cell in self.cells:
-            self.cells.remove(cell)
-            self.count -= 1
-
-    def mark_safe(self, cell):
-        """Marks a cell as safe. Updates internal knowledge representation."""
-        if cell in self.cells:
-            self.cells.remove(cell)
+        return 0
+
+    def mark_mines(self, mines: int) -> 'Sentence':
+        """Returns the sentence without mines and with count lowered by their number."""
+        marked = self.cells & mines
+        if marked == 0:
+            return self
+        return Sentence(self.cells ^ marked, self.count - marked.bit_count())
+
+    def mark_safes(self, safes: int) -> 'Sentence':
+        """Returns the sentence without safes."""
+        marked = self.cells & safes
+        if marked == 0:
+            return self
+        return Sentence(self.cells ^ marked, self.count)
+
+    def mark_mine(self, cell: int) -> 'Sentence':
+        """Returns the sentence with a cell marked as a mine."""
+        return self.mark_mines(1 << cell)
+
+    def mark_safe(self, cell: int) -> 'Sentence':
+        """Returns the sentence with a cell marked as safe."""
+        return self.mark_safes(1 << cell)
 
     def is_resolved(self):
         """
-        Returns True if the sentence is solved. 
+        Returns True if the sentence is solved.
         1) Number of mines is equal to number of cells.
         2) Count of mines is 0.
         """
-        return len(self.cells) == self.count or self.count == 0
+        return self.count == 0 or len(self) == self.count
 
     def is_subset(self, other):
         """
-        Given: 
+        Given:
             Sentence 1 with cells (A, B, C) and count 2
             Sentence 2 with cells (A, B) and count 1
         Sentence 2 is a subset of Sentence 1, because all cells of Sentence 2 are in Sentence 1.
         """
-        return self.cells.issubset(other.cells)
+        return self.cells & other.cells == self.cells
 
-    def minus_subset(self, subset):
+    def minus_subset(self, subset: 'Sentence') -> 'Sentence':
         """
         Sentence 1 with cells (A, B, C) and count 2
         Sentence 2 with cells (A, B) and count 1
         Sentence 1 minus Sentence 2 is a sentence with cells (C) and count 1.
         """
-        self.cells -= subset.cells
-        self.count -= subset.count
+        return Sentence(self.cells & ~subset.cells, self.count - subset.count)
 
     def mine_probability(self):
         """Returns probability of choosing a mine, when choosing a random cell from the sentence."""
-        cell_count = len(self.cells)
+        cell_count = len(self)
         if (cell_count == 0):
-            print("Error: cell count is 0")
+            logger.error("Cell count is 0")
             return 1  # return 1 as a highest chance
         return self.count / cell_count
 
-    def get_random_cell(self):
+    def get_random_cell(self, rng: random.Random = random) -> int:
         """Returns a random cell from the sentence."""
-        return random.choice(tuple(self.cells))
+        return random_bit(self.cells, rng)
@@ -0,0 +1,219 @@
+import argparse
+import csv
+import logging
+import os
+import random
+import time
+from concurrent.futures import ProcessPoolExecutor
+from dataclasses import dataclass, astuple, fields, replace
+
+from Config import Config
+from DeductionStrategy import SUBSET_STRATEGY, GAUSSIAN_STRATEGY
+from GameState import GameState
+from Instrumentation import Instrumentation, JsonLinesSink, MemorySink
+from NoGuessGenerator import NoGuessBoard, NoGuessGenerator
+from ProbabilityEngine import DEFAULT_MAX_COMPONENT_SIZE
+from Replay import Replay
+
+CONFIG_FILE_PATH = 'config.txt'
+
+
+@dataclass
+class GameResult():
+    """Outcome of one game played by the AI without user interface"""
+    won: bool
+    moves: int
+    guesses: int
+    wall_time: float
+    seed: int = None
+    # instrumentation records of all AI updates and moves, if requested
+    metrics: list[dict] = None
+    # the whole game encoded by Replay, if requested (only of the slowest game, see simulate)
+    replay: bytes = None
+
+
+@dataclass
+class GameSettings():
+    height: int
+    width: int
+    mines: int
+    ai_knows_number_of_mines: bool
+    ai_search_asap: bool
+    ai_max_component_size: int = DEFAULT_MAX_COMPONENT_SIZE
+    numpy_board: bool = False
+    sparse_board: bool = False
+    # play boards, that can be solved without guessing (see NoGuessGenerator)
+    no_guess: bool = False
+    ai_strategy: int = SUBSET_STRATEGY
+    metrics: bool = False
+    replays: bool = False
+
+
+def play_game(settings: GameSettings, seed: int = None, board: NoGuessBoard = None) -> GameResult:
+    """
+    Plays one complete game, where AI chooses every move. Game with the same seed is played the same way.
+    If a no-guess board is given, the game is played on it starting with its first click.
+    """
+    start = time.perf_counter()
+    if board is not None:
+        game_state = board.game_state(
+            ai_knows_number_of_mines=settings.ai_knows_number_of_mines,
+            ai_search_asap=settings.ai_search_asap,
+            ai_max_component_size=settings.ai_max_component_size,
+            numpy_board=settings.numpy_board,
+            seed=seed,
+            ai_strategy=settings.ai_strategy
+        )
+    else:
+        game_state = GameState(
+            height=settings.height,
+            width=settings.width,
+            mines=settings.mines,
+            ai_knows_number_of_mines=settings.ai_knows_number_of_mines,
+            ai_search_asap=settings.ai_search_asap,
+            ai_max_component_size=settings.ai_max_component_size,
+            numpy_board=settings.numpy_board,
+            seed=seed,
+            sparse_board=settings.sparse_board,
+            ai_strategy=settings.ai_strategy
+        )
+    sink = None
+    if settings.metrics:
+        sink = MemorySink()
+        game_state.ai.instrumentation = Instrumentation(sink)
+    moves = 0
+    while not game_state.is_over():
+        move, _ = game_state.ai_move()
+        if move is None:
+            # AI has no moves left, game can't be finished
+            break
+        moves += 1
+    return GameResult(
+        game_state.is_won(), moves, game_state.ai.guesses, time.perf_counter() - start, seed,
+        sink.records if sink is not None else None,
+        Replay.from_game_state(game_state).to_bytes() if settings.replays else None
+    )
+
+
+def simulate(settings: GameSettings, games: int, workers: int = None, seed: int = None) -> list[GameResult]:
+    """
+    Plays (games) games spread over a pool of (workers) processes, all cores by default.
+    Game n is seeded with seed + n, random seed is chosen if no seed is given.
+    If replays are requested, only the slowest game is recorded: it is played again with the same seed and board,
+    so games don't pay for packing their boards (e.g. millions of mines of a sparse board).
+    """
+    workers = workers or os.cpu_count() or 1
+    chunksize = max(1, games // (workers * 8))
+    if seed is None:
+        seed = random.getrandbits(32)
+    seeds = range(seed, seed + games)
+    boards = [None] * games
+    if settings.no_guess:
+        # boards are chosen from the board cache by the seed, missing ones are generated before the games start
+        generator = NoGuessGenerator(settings.height, settings.width, settings.mines)
+        boards = generator.boards(games, seed, workers)
+    game_settings = replace(settings, replays=False)
+    with ProcessPoolExecutor(max_workers=workers) as executor:
+        results = list(executor.map(play_game, [game_settings] * games, seeds, boards, chunksize=chunksize))
+    if settings.replays:
+        slowest = max(range(games), key=lambda n: results[n].wall_time)
+        results[slowest].replay = play_game(replace(settings, metrics=False), seeds[slowest], boards[slowest]).replay
+    return results
+
+
+def print_summary(results: list[GameResult], elapsed: float):
+    games = len(results)
+    wins = sum(result.won for result in results)
+    moves = sum(result.moves for result in results)
+    guesses = sum(result.guesses for result in results)
+    print(f"Games played: {games}")
+    print(f"Win rate: {wins / games * 100 : .2f}% ({wins}/{games})")
+    print(f"Average moves per game: {moves / games : .2f}")
+    print(f"Average guesses per game: {guesses / games : .2f}")
+    print(f"Average wall time per game: {sum(result.wall_time for result in results) / games * 1000 : .2f} ms")
+    print(f"Throughput: {games / elapsed : .2f} games/s ({elapsed : .2f} s total)")
+
+
+def write_results(results: list[GameResult], path: str):
+    with open(path, 'w', newline='') as f:
+        writer = csv.writer(f)
+        columns = [field.name for field in fields(GameResult) if field.name not in ("metrics", "replay")]
+        writer.writerow(columns)
+        for result in results:
+            writer.writerow(astuple(result)[:len(columns)])
+
+
+def write_metrics(results: list[GameResult], path: str):
+    """Writes instrumentation records of all games as JSON lines"""
+    # games are played in worker processes, which keep their records in memory, so they are written here
+    sink = JsonLinesSink(path)
+    try:
+        for game, result in enumerate(results):
+            for record in result.metrics:
+                record["game"] = game
+                sink.record(record)
+    finally:
+        sink.close()
+
+
+def main():
+    config = Config.from_file(CONFIG_FILE_PATH) if os.path.exists(CONFIG_FILE_PATH) else Config()
+    parser = argparse.ArgumentParser(description="Plays Minesweeper games with AI player without user interface")
+    parser.add_argument("-n", "--games", type=int, default=1000, help="number of games to play")
+    parser.add_argument("-j", "--workers", type=int, default=None, help="number of worker processes, all cores by default")
+    parser.add_argument("--height", type=int, default=config.height or 8)
+    parser.add_argument("--width", type=int, default=config.width or 8)
+    parser.add_argument("--mines", type=int, default=config.mines or 8)
+    parser.add_argument("--ai-knows-number-of-mines", type=int, choices=(0, 1),
+                        default=int(config.ai_knows_number_of_mines if config.ai_knows_number_of_mines is not None else True))
+    parser.add_argument("--ai-search-asap", type=int, choices=(0, 1),
+                        default=int(config.ai_search_asap if config.ai_search_asap is not None else True))
+    parser.add_argument("--ai-max-component-size", type=int, default=config.ai_max_component_size or DEFAULT_MAX_COMPONENT_SIZE,
+                        help="largest frontier component, for which exact mine probabilities are calculated")
+    parser.add_argument("--ai-strategy", type=int, choices=(SUBSET_STRATEGY, GAUSSIAN_STRATEGY), default=config.ai_strategy,
+                        help="deduction of the AI, 0 for subset reduction, 1 for Gaussian elimination")
+    parser.add_argument("--numpy-board", type=int, choices=(0, 1), default=int(config.numpy_board),
+                        help="1 to store the board in NumPy arrays with precomputed numbers of nearby mines")
+    parser.add_argument("--sparse-board", type=int, choices=(0, 1), default=int(config.sparse_board),
+                        help="1 to store only mines of the board and only explored cells in the AI, for huge boards")
+    parser.add_argument("--no-guess", type=int, choices=(0, 1), default=int(config.no_guess),
+                        help="1 to play boards, that can be solved without guessing, from the board cache")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="seed of the first game, game n uses seed + n")
+    parser.add_argument("-o", "--output", default=None, help="CSV file to write per-game results to")
+    parser.add_argument("--metrics", default=None, help="JSON lines file to write AI timings and counters of every move to")
+    parser.add_argument("--save-slowest", default=None, metavar="PATH",
+                        help="file to write replay of the slowest game to, see Replay.py")
+    parser.add_argument("-v", "--verbose", action="store_true", help="show AI log messages (e.g. about random moves)")
+    args = parser.parse_args()
+    logging.basicConfig(level=logging.INFO if args.verbose else logging.WARNING, format="%(message)s")
+
+    settings = GameSettings(
+        height=args.height,
+        width=args.width,
+        mines=args.mines,
+        ai_knows_number_of_mines=bool(args.ai_knows_number_of_mines),
+        ai_search_asap=bool(args.ai_search_asap),
+        ai_max_component_size=args.ai_max_component_size,
+        numpy_board=bool(args.numpy_board),
+        sparse_board=bool(args.sparse_board),
+        no_guess=bool(args.no_guess),
+        ai_strategy=args.ai_strategy,
+        metrics=args.metrics is not None,
+        replays=args.save_slowest is not None
+    )
+    start = time.perf_counter()
+    results = simulate(settings, args.games, args.workers, args.seed)
+    print_summary(results, time.perf_counter() - start)
+    if args.output:
+        write_results(results, args.output)
+    if args.metrics:
+        write_metrics(results, args.metrics)
+    if args.save_slowest:
+        slowest = max(results, key=lambda result: result.wall_time)
+        with open(args.save_slowest, 'wb') as f:
+            f.write(slowest.replay)
+        print(f"Replay of the slowest game (seed {slowest.seed}, {slowest.wall_time * 1000 : .2f} ms) written to {args.save_slowest}")
+
+
+if __name__ == "__main__":
+    main()
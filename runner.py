@@ -1,247 +1,147 @@
-import pygame
-import sys
+"""
+Starts the game. Config values are read from config.txt and can be overridden by arguments.
+With --headless the AI plays games without a window and pygame is never imported.
+Run `python runner.py --help` to see all options.
+"""
+import argparse
+import logging
+import os
+import random
 import time
+from typing import Callable
 
+from Config import (
+    Config, WINDOW_WIDTH_KEY, WINDOW_HEIGHT_KEY, HEIGHT_KEY, WIDTH_KEY, MINES_KEY, AI_KNOWS_NUMBER_OF_MINES_KEY,
+    AI_SEARCH_ASAP_KEY, AI_MAX_COMPONENT_SIZE_KEY, NUMPY_BOARD_KEY, SPARSE_BOARD_KEY, NO_GUESS_KEY,
+    AUTO_PLAY_SPEED_KEY, AI_STRATEGY_KEY
+)
 from GameState import GameState
-from Config import Config
+from ProbabilityEngine import DEFAULT_MAX_COMPONENT_SIZE
 
 CONFIG_FILE_PATH = 'config.txt'
 
+# command line options, which override config keys
+CONFIG_OPTIONS = [
+    ("--window-width", WINDOW_WIDTH_KEY),
+    ("--window-height", WINDOW_HEIGHT_KEY),
+    ("--height", HEIGHT_KEY),
+    ("--width", WIDTH_KEY),
+    ("--mines", MINES_KEY),
+    ("--ai-knows-number-of-mines", AI_KNOWS_NUMBER_OF_MINES_KEY),
+    ("--ai-search-asap", AI_SEARCH_ASAP_KEY),
+    ("--ai-max-component-size", AI_MAX_COMPONENT_SIZE_KEY),
+    ("--ai-strategy", AI_STRATEGY_KEY),
+    ("--numpy-board", NUMPY_BOARD_KEY),
+    ("--sparse-board", SPARSE_BOARD_KEY),
+    ("--no-guess", NO_GUESS_KEY),
+    ("--auto-play-speed", AUTO_PLAY_SPEED_KEY),
+]
 
-def read_config_file() -> Config:
-    config = Config()
-    lines = None
-    with open(CONFIG_FILE_PATH, 'r') as f:
-        lines = f.readlines()
-    for line in lines:
-        config.set_from_file(line)
-        if config.is_setup():
-            break
-    return config
-
-
-config = read_config_file()
-
-def create_game_state() -> GameState:
-    return GameState(
-        height=config.height,
-        width=config.width,
-        mines=config.mines,
-        ai_knows_number_of_mines=config.ai_knows_number_of_mines,
-        ai_search_asap=config.ai_search_asap
-    )
 
-# Colors
-BLACK = (0, 0, 0)
-GRAY = (180, 180, 180)
-WHITE = (255, 255, 255)
+def game_state_factory(config: Config) -> Callable[[int], GameState]:
+    """
+    Returns a function, which creates a new game from the config, optionally with a seed.
+    Raises ValueError, if the mines don't fit into a no-guess board.
+    """
+    no_guess = None
+    if config.no_guess:
+        # boards solvable without guessing are taken from the board cache, a seed always chooses the same board,
+        # the generator (and multiprocessing) is imported only when it is used, so other games start faster
+        from NoGuessGenerator import NoGuessGenerator
+        no_guess = NoGuessGenerator(config.height, config.width, config.mines)
+
+    def create_game_state(seed: int = None) -> GameState:
+        if no_guess is not None:
+            return no_guess.next_board(seed).game_state(
+                ai_knows_number_of_mines=config.ai_knows_number_of_mines,
+                ai_search_asap=config.ai_search_asap,
+                ai_max_component_size=config.ai_max_component_size or DEFAULT_MAX_COMPONENT_SIZE,
+                numpy_board=config.numpy_board,
+                seed=seed,
+                ai_strategy=config.ai_strategy
+            )
+        return GameState(
+            height=config.height,
+            width=config.width,
+            mines=config.mines,
+            ai_knows_number_of_mines=config.ai_knows_number_of_mines,
+            ai_search_asap=config.ai_search_asap,
+            ai_max_component_size=config.ai_max_component_size or DEFAULT_MAX_COMPONENT_SIZE,
+            numpy_board=config.numpy_board,
+            seed=seed,
+            sparse_board=config.sparse_board,
+            ai_strategy=config.ai_strategy
+        )
+
+    return create_game_state
+
+
+def add_config_options(parser: argparse.ArgumentParser):
+    """Adds command line options, which override config keys, to the parser"""
+    for option, key in CONFIG_OPTIONS:
+        parser.add_argument(option, type=int, default=None, help=f"overrides {key}")
+
+
+def load_config(args: argparse.Namespace) -> Config:
+    """Returns config read from the config file of the arguments (empty if it doesn't exist) and overridden by the options"""
+    config = Config.from_file(args.config) if os.path.exists(args.config) else Config()
+    for option, key in CONFIG_OPTIONS:
+        value = getattr(args, option[2:].replace('-', '_'))
+        if value is not None:
+            config.set(key, value)
+    return config
 
-# Rules
-RULES = [
-    "Click a cell to reveal it.",
-    "Right-click a cell to mark it as a mine.",
-    "Mark all mines successfully to win!"
-]
 
-# Create game
-pygame.init()
-size = width, height = config.window_width, config.window_height
-screen = pygame.display.set_mode(size)
-
-# Fonts
-OPEN_SANS = "assets/fonts/OpenSans-Regular.ttf"
-smallFont = pygame.font.Font(OPEN_SANS, 20)
-mediumFont = pygame.font.Font(OPEN_SANS, 28)
-largeFont = pygame.font.Font(OPEN_SANS, 40)
-
-# Compute board size
-BOARD_PADDING = 20
-board_width = ((2 / 3) * width) - (BOARD_PADDING * 2)
-board_height = height - (BOARD_PADDING * 2)
-cell_size = int(min(board_width / config.width, board_height / config.height))
-board_origin = (BOARD_PADDING, BOARD_PADDING)
-
-# Add images
-flag = pygame.image.load("assets/images/flag.png")
-flag = pygame.transform.scale(flag, (cell_size, cell_size))
-mine = pygame.image.load("assets/images/mine.png")
-mine = pygame.transform.scale(mine, (cell_size, cell_size))
-
-gameState = create_game_state()
-
-# Show instructions initially
-instructions = True
-
-while True:
-
-    # Check if game quit
-    for event in pygame.event.get():
-        if event.type == pygame.QUIT:
-            sys.exit()
-
-    screen.fill(BLACK)
-
-    # Show game instructions
-    if instructions:
-
-        # Title
-        title = largeFont.render("Play Minesweeper", True, WHITE)
-        titleRect = title.get_rect()
-        titleRect.center = ((width / 2), 50)
-        screen.blit(title, titleRect)
-
-        # Rules
-        for i, rule in enumerate(RULES):
-            line = smallFont.render(rule, True, WHITE)
-            lineRect = line.get_rect()
-            lineRect.center = ((width / 2), 150 + 30 * i)
-            screen.blit(line, lineRect)
-
-        # Play game button
-        buttonRect = pygame.Rect((width / 4), (3 / 4) * height, width / 2, 50)
-        buttonText = mediumFont.render("Play Game", True, BLACK)
-        buttonTextRect = buttonText.get_rect()
-        buttonTextRect.center = buttonRect.center
-        pygame.draw.rect(screen, WHITE, buttonRect)
-        screen.blit(buttonText, buttonTextRect)
-
-        # Check if play button clicked
-        click, _, _ = pygame.mouse.get_pressed()
-        if click == 1:
-            mouse = pygame.mouse.get_pos()
-            if buttonRect.collidepoint(mouse):
-                instructions = False
-                time.sleep(0.3)
-
-        pygame.display.flip()
-        continue
-
-    # Draw board
-    cells = []
-    for i in range(config.height):
-        row = []
-        for j in range(config.width):
-
-            # Draw rectangle for cell
-            rect = pygame.Rect(
-                board_origin[0] + j * cell_size,
-                board_origin[1] + i * cell_size,
-                cell_size, cell_size
-            )
-            pygame.draw.rect(screen, GRAY, rect)
-            pygame.draw.rect(screen, WHITE, rect, 3)
-
-            # Add a mine, flag, or number if needed
-            if gameState.game.is_mine((i, j)) and gameState.lost:
-                if (i, j) == gameState.losing_move:
-                    red_background = mine.copy()  # just for size
-                    red_background.fill((255, 0, 0, 100))
-                    screen.blit(red_background, rect)
-                    screen.blit(mine, rect)
-                else:
-                    screen.blit(mine, rect)
-            elif (i, j) in gameState.flags:
-                screen.blit(flag, rect)
-            elif (i, j) in gameState.revealed:
-                neighbors = smallFont.render(
-                    str(gameState.game.nearby_mines((i, j))),
-                    True, BLACK
-                )
-                neighborsTextRect = neighbors.get_rect()
-                neighborsTextRect.center = rect.center
-                screen.blit(neighbors, neighborsTextRect)
-
-            row.append(rect)
-        cells.append(row)
-
-    # AI Move button
-    aiButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height - 50,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("AI Move", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = aiButton.center
-    pygame.draw.rect(screen, WHITE, aiButton)
-    screen.blit(buttonText, buttonRect)
-
-    # Reset button
-    resetButton = pygame.Rect(
-        (2 / 3) * width + BOARD_PADDING, (1 / 3) * height + 20,
-        (width / 3) - BOARD_PADDING * 2, 50
-    )
-    buttonText = mediumFont.render("Reset", True, BLACK)
-    buttonRect = buttonText.get_rect()
-    buttonRect.center = resetButton.center
-    pygame.draw.rect(screen, WHITE, resetButton)
-    screen.blit(buttonText, buttonRect)
-
-    def isGameWon(gameState: GameState):
-        return gameState.game.mines == gameState.flags or (gameState.game.width * gameState.game.height - len(gameState.game.mines)) == len(gameState.revealed)
-
-    # Display text
-    text = "Lost" if gameState.lost else "Won" if isGameWon(gameState) else ""
-    text = mediumFont.render(text, True, WHITE)
-    textRect = text.get_rect()
-    textRect.center = ((5 / 6) * width, (2 / 3) * height)
-    screen.blit(text, textRect)
-
-    move = None
-    place_flag = False
-
-    left, _, right = pygame.mouse.get_pressed()
-
-    # Check for a right-click to toggle flagging
-    if right == 1 and not gameState.lost:
-        mouse = pygame.mouse.get_pos()
-        for i in range(config.height):
-            for j in range(config.width):
-                if cells[i][j].collidepoint(mouse) and (i, j) not in gameState.revealed:
-                    if (i, j) in gameState.flags:
-                        gameState.flags.remove((i, j))
-                        gameState.ai.flag_removed((i, j))
-                    else:
-                        gameState.flags.add((i, j))
-                        gameState.ai.flag_placed((i, j))
-                    time.sleep(0.3)
-
-    elif left == 1:
-        mouse = pygame.mouse.get_pos()
-
-        # If AI button clicked, make an AI move
-        if aiButton.collidepoint(mouse) and not gameState.lost:
-            move, place_flag = gameState.ai.move()
-            time.sleep(0.3)
-
-        # Reset game state
-        elif resetButton.collidepoint(mouse):
-            gameState = create_game_state()
-            continue
-
-        # User-made move
-        elif not gameState.lost:
-            for i in range(config.height):
-                for j in range(config.width):
-                    if (cells[i][j].collidepoint(mouse)
-                            and (i, j) not in gameState.flags
-                            and (i, j) not in gameState.revealed):
-                        move = (i, j)
-
-    # Make move and update AI knowledge
-    if move:
-        if place_flag:
-            gameState.flags.add(move)
-            gameState.ai.flag_placed(move)
-        else:
-            if (move in gameState.flags):
-                gameState.flags.remove(move)
-                gameState.ai.flag_removed(move)
-            if gameState.game.is_mine(move):
-                gameState.lost = True
-                gameState.losing_move = move
-            else:
-                nearby = gameState.game.nearby_mines(move)
-                gameState.revealed.add(move)
-                gameState.ai.add_knowledge(move, nearby)
-
-    pygame.display.flip()
+def play_headless(create_game_state: Callable[[int], GameState], games: int, seed: int = None, print_board: bool = False):
+    """Lets the AI play games without a window and prints their results"""
+    if seed is None:
+        seed = random.getrandbits(32)
+    for game in range(games):
+        start = time.perf_counter()
+        game_state = create_game_state(seed + game)
+        while not game_state.is_over():
+            move, _ = game_state.ai_move()
+            if move is None:
+                # AI has no moves left, game can't be finished
+                break
+        result = "won" if game_state.is_won() else "lost" if game_state.lost else "unfinished"
+        print(f"Game {game + 1} (seed {seed + game}): {result} in {len(game_state.history)} moves "
+              f"with {game_state.ai.guesses} guesses, {(time.perf_counter() - start) * 1000 : .2f} ms")
+        if print_board:
+            game_state.game.print()
+
+
+def main():
+    parser = argparse.ArgumentParser(description="Minesweeper game with an AI player")
+    parser.add_argument("-c", "--config", default=CONFIG_FILE_PATH, help="config file, arguments override its values")
+    add_config_options(parser)
+    parser.add_argument("--headless", action="store_true", help="let the AI play without a window")
+    parser.add_argument("-n", "--games", type=int, default=1, help="number of games played in headless mode")
+    parser.add_argument("-s", "--seed", type=int, default=None, help="seed of the first headless game, game n uses seed + n")
+    parser.add_argument("--print-board", action="store_true", help="print mines of every headless game")
+    parser.add_argument("-q", "--quiet", action="store_true", help="hide AI log messages (e.g. about random moves)")
+    args = parser.parse_args()
+
+    config = load_config(args)
+    if not config.is_setup(window=not args.headless):
+        parser.error(f"config is not complete, set missing values in {args.config} or by arguments")
+
+    # AI reports its random moves through logging
+    logging.basicConfig(level=logging.WARNING if args.quiet else logging.INFO, format="%(message)s")
+
+    try:
+        create_game_state = game_state_factory(config)
+    except ValueError as e:
+        parser.error(str(e))
+    if args.headless:
+        play_headless(create_game_state, args.games, args.seed, args.print_board)
+        return
+
+    # pygame is imported only when a window is shown
+    from BoardPool import BoardPool
+    from GameWindow import GameWindow
+    GameWindow(config, BoardPool(create_game_state)).run()
+
+
+if __name__ == "__main__":
+    main()
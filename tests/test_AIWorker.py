@@ -0,0 +1,92 @@
+import logging
+import time
+import unittest
+
+from AIWorker import PLAY, REVEAL, TOGGLE_FLAG, UNDO, AIWorker
+from GameState import GameState
+
+
+class AIWorkerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def setUp(self):
+        self.worker = AIWorker()
+
+    def tearDown(self):
+        self.worker.close()
+
+    def result(self) -> tuple:
+        return self.worker.results.get(timeout=30)
+
+    def test_requests_are_made_in_order(self):
+        reference = GameState(16, 16, 40, True, False, seed=5)
+        game_state = GameState(16, 16, 40, True, False, seed=5)
+        game_state.enable_undo()
+        # the same moves are made directly on the reference game
+        reference.ai_move()
+        reference.toggle_flag((15, 15))
+        for _ in range(3):
+            reference.ai_move()
+
+        self.worker.play(game_state, moves=1)
+        self.worker.toggle_flag(game_state, (15, 15))
+        self.worker.play(game_state, moves=3)
+        self.assertEqual(self.result(), (PLAY, game_state, 1, False))
+        self.assertEqual(self.result()[:2], (TOGGLE_FLAG, game_state))
+        self.assertEqual(self.result()[::2], (PLAY, 3))
+        with self.worker.lock:
+            self.assertEqual(game_state.history, reference.history)
+
+        self.worker.undo(game_state)
+        self.assertEqual(self.result()[:2], (UNDO, game_state))
+        with self.worker.lock:
+            self.assertEqual(game_state.history, reference.history[:-1])
+
+    def test_moves_are_checked_when_made(self):
+        game_state = GameState(8, 8, 10, True, False, seed=6)
+        cell = next((i, j) for i in range(8) for j in range(8) if (i, j) not in game_state.game.mines)
+        self.worker.reveal(game_state, cell)
+        # the cell is already revealed when the second request is made, so nothing happens
+        self.worker.reveal(game_state, cell)
+        self.worker.toggle_flag(game_state, cell)
+        for action in (REVEAL, REVEAL, TOGGLE_FLAG):
+            self.assertEqual(self.result()[0], action)
+        with self.worker.lock:
+            self.assertEqual(len(game_state.history), 1)
+            self.assertNotIn(cell, game_state.flags)
+
+    def test_play_until_over(self):
+        game_state = GameState(9, 9, 10, True, True, seed=7)
+        self.worker.play(game_state)
+        action, _, moves_made, over = self.result()
+        self.assertEqual(action, PLAY)
+        self.assertTrue(over)
+        with self.worker.lock:
+            self.assertTrue(game_state.is_over())
+            self.assertEqual(len(game_state.history), moves_made)
+
+    def test_prepared_move_is_the_next_move(self):
+        reference = GameState(30, 30, 180, True, False, seed=8)
+        game_state = GameState(30, 30, 180, True, False, seed=8)
+        for _ in range(6):
+            reference.ai_move()
+        self.worker.play(game_state, moves=1)
+        self.result()
+        for _ in range(5):
+            # the worker is idle in between, so it prepares the next move
+            time.sleep(0.05)
+            self.worker.play(game_state, moves=1)
+            self.result()
+        with self.worker.lock:
+            self.assertEqual(game_state.history, reference.history)
+
+
+if __name__ == "__main__":
+    unittest.main()
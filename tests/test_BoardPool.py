@@ -0,0 +1,57 @@
+import itertools
+import threading
+import unittest
+
+from BoardPool import BoardPool
+from GameState import GameState
+
+
+class BoardPoolTest(unittest.TestCase):
+
+    def test_games_are_created_in_the_background(self):
+        seeds = itertools.count()
+        created = threading.Semaphore(0)
+
+        def create_game_state() -> GameState:
+            game_state = GameState(8, 8, 10, True, False, seed=next(seeds))
+            created.release()
+            return game_state
+
+        pool = BoardPool(create_game_state, size=3)
+        try:
+            # the pool is filled and one more game waits for a free place
+            for _ in range(4):
+                self.assertTrue(created.acquire(timeout=5))
+            games = [pool.get() for _ in range(6)]
+        finally:
+            pool.close()
+        # every game is new, games of the pool come in the order they were created
+        self.assertEqual(len({id(game) for game in games}), 6)
+        self.assertEqual([game.ai_seed for game in games[:3]],
+                         [GameState(8, 8, 10, True, False, seed=seed).ai_seed for seed in range(3)])
+        for game in games:
+            self.assertEqual(game.history, [])
+
+    def test_empty_pool_creates_game_right_away(self):
+        busy = threading.Event()
+        release = threading.Event()
+
+        def create_game_state() -> GameState:
+            if threading.current_thread().name == "BoardPool":
+                # the background thread is kept busy, so the pool stays empty
+                busy.set()
+                release.wait(timeout=5)
+            return GameState(8, 8, 10, True, False)
+
+        pool = BoardPool(create_game_state, size=2)
+        try:
+            self.assertTrue(busy.wait(timeout=5))
+            self.assertIsInstance(pool.get(), GameState)
+            self.assertTrue(pool.games.empty())
+        finally:
+            release.set()
+            pool.close()
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,44 @@
+import random
+import unittest
+
+from CellPool import CHUNK_SIZE, CellPool
+
+
+class CellPoolTest(unittest.TestCase):
+
+    def test_pools_dont_share_changes(self):
+        size = 3 * CHUNK_SIZE + 5
+        first, second = CellPool(size), CellPool(size)
+        rng = random.Random(0)
+        removed = set(rng.sample(range(size), 1000))
+        for cell in removed:
+            first.discard(cell)
+        self.assertEqual(set(first), set(range(size)) - removed)
+        self.assertEqual(list(second), list(range(size)))
+        self.assertEqual(list(CellPool(size)), list(range(size)))
+        self.assertNotIn(size, first)
+        self.assertNotIn(size, second)
+
+    def test_undo_restores_order(self):
+        rng = random.Random(1)
+        pool = CellPool(2 * CHUNK_SIZE)
+        for cell in rng.sample(range(2 * CHUNK_SIZE), 500):
+            pool.discard(cell)
+        before = list(pool)
+        pool.trail = []
+        for _ in range(2000):
+            cell = rng.randrange(3 * CHUNK_SIZE)
+            if rng.random() < 0.5:
+                pool.add(cell)
+            else:
+                pool.discard(cell)
+        self.assertEqual(set(pool), {cell for cell in range(3 * CHUNK_SIZE) if cell in pool})
+        while pool.trail:
+            undo, *args = pool.trail.pop()
+            undo(*args)
+        self.assertEqual(list(pool), before)
+        self.assertEqual({cell for cell in range(3 * CHUNK_SIZE) if cell in pool}, set(before))
+
+
+if __name__ == "__main__":
+    unittest.main()
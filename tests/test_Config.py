@@ -0,0 +1,52 @@
+import os
+import tempfile
+import unittest
+
+from Config import Config
+
+
+def config_from_text(text: str) -> Config:
+    with tempfile.TemporaryDirectory() as directory:
+        path = os.path.join(directory, "config.txt")
+        with open(path, 'w') as f:
+            f.write(text)
+        return Config.from_file(path)
+
+
+class ConfigTest(unittest.TestCase):
+
+    def test_from_file(self):
+        config = config_from_text("WINDOW_WIDTH = 600\nWINDOW_HEIGHT=400\n\n  HEIGHT_TILES = 16  \nWIDTH_TILES = 30\n"
+                                  "MINE_TILES = 99\nAI_KNOWS_NUMBER_OF_MINES = 1\nAI_SEARCH_ASAP = 0\n"
+                                  "NO_GUESS = 1\nAI_STRATEGY = 1")
+        self.assertEqual((config.window_width, config.window_height), (600, 400))
+        self.assertEqual((config.height, config.width, config.mines), (16, 30, 99))
+        self.assertIs(config.ai_knows_number_of_mines, True)
+        self.assertIs(config.ai_search_asap, False)
+        self.assertTrue(config.no_guess)
+        self.assertEqual(config.ai_strategy, 1)
+        self.assertEqual(config.auto_play_speed, 10)
+        self.assertTrue(config.is_setup())
+
+    def test_window_is_optional_without_window(self):
+        config = config_from_text("HEIGHT_TILES = 8\nWIDTH_TILES = 8\nMINE_TILES = 10\n"
+                                  "AI_KNOWS_NUMBER_OF_MINES = 0\nAI_SEARCH_ASAP = 1\n")
+        self.assertFalse(config.is_setup())
+        self.assertTrue(config.is_setup(window=False))
+
+    def test_malformed_lines_are_reported(self):
+        with self.assertLogs("Config", "WARNING") as logs:
+            config = config_from_text("HEIGHT_TILES = 8\nWIDTH_TILES = -8\nMINE_TILES 10\nAI_SEARCH_ASAP = yes\n"
+                                      "\nUNKNOWN_KEY = 1\n")
+        self.assertEqual(config.height, 8)
+        self.assertIsNone(config.width)
+        self.assertIsNone(config.mines)
+        self.assertIsNone(config.ai_search_asap)
+        self.assertEqual(len(logs.output), 4)
+        for line_number, output in zip((2, 3, 4), logs.output):
+            self.assertIn(f"line {line_number}", output)
+        self.assertIn("UNKNOWN_KEY", logs.output[3])
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,94 @@
+import itertools
+import random
+import unittest
+
+from Bitset import bits
+from DeductionStrategy import (
+    GAUSSIAN_STRATEGY, SUBSET_STRATEGY, GaussianStrategy, SubsetStrategy, create_strategy, eliminate
+)
+from KnowledgeBase import KnowledgeBase
+from Sentence import Sentence
+
+
+def solutions(sentences: list[Sentence]) -> list[int]:
+    """Returns all mine placements (as masks of cells) consistent with the sentences"""
+    cells = sorted(set().union(*(bits(sentence.cells) for sentence in sentences)))
+    result = []
+    for size in range(len(cells) + 1):
+        for placement in itertools.combinations(cells, size):
+            mask = sum(1 << cell for cell in placement)
+            if all((sentence.cells & mask).bit_count() == sentence.count for sentence in sentences):
+                result.append(mask)
+    return result
+
+
+def board_sentences(rng: random.Random, height: int, width: int) -> list[Sentence]:
+    """Returns sentences of randomly revealed cells of a random board, their neighbours overlap without being nested"""
+    mines = set(rng.sample(range(height * width), rng.randint(1, height * width // 3)))
+    revealed = rng.sample([cell for cell in range(height * width) if cell not in mines], rng.randint(1, 6))
+    sentences = []
+    for cell in revealed:
+        i, j = divmod(cell, width)
+        neighbours = [y * width + x for y in range(max(i - 1, 0), min(i + 2, height))
+                      for x in range(max(j - 1, 0), min(j + 2, width))
+                      if (y, x) != (i, j) and y * width + x not in revealed]
+        if neighbours:
+            sentences.append(Sentence(sum(1 << n for n in neighbours), sum(n in mines for n in neighbours)))
+    return sentences
+
+
+class EliminateTest(unittest.TestCase):
+
+    def test_overlapping_sentences(self):
+        # a + b + c = 2 and b + c + d = 1, so a - d = 1: a is a mine and d is safe
+        safes, mines = eliminate([Sentence(0b0111, 2), Sentence(0b1110, 1)])
+        self.assertEqual(safes, 0b1000)
+        self.assertEqual(mines, 0b0001)
+
+    def test_nothing_follows(self):
+        self.assertEqual(eliminate([Sentence(0b11, 1), Sentence(0b110, 1)]), (0, 0))
+
+    def test_found_cells_are_forced_in_every_solution(self):
+        rng = random.Random(0)
+        found = 0
+        for _ in range(300):
+            sentences = board_sentences(rng, 4, 5)
+            if not sentences:
+                continue
+            safes, mines = eliminate(sentences)
+            self.assertEqual(safes & mines, 0)
+            placements = solutions(sentences)
+            with self.subTest(sentences=[str(sentence) for sentence in sentences]):
+                for placement in placements:
+                    self.assertEqual(placement & safes, 0)
+                    self.assertEqual(placement & mines, mines)
+            found += (safes | mines).bit_count()
+        # elimination has to find something on random boards, or the test proves nothing
+        self.assertGreater(found, 0)
+
+
+class StrategyTest(unittest.TestCase):
+
+    def test_create_strategy(self):
+        self.assertIsInstance(create_strategy(SUBSET_STRATEGY), SubsetStrategy)
+        self.assertIsInstance(create_strategy(GAUSSIAN_STRATEGY), GaussianStrategy)
+        with self.assertRaises(ValueError):
+            create_strategy(2)
+
+    def test_subset_reduction(self):
+        knowledge = KnowledgeBase()
+        knowledge.add(Sentence(0b011, 1))
+        knowledge.add(Sentence(0b111, 2))
+        self.assertEqual(SubsetStrategy().deduce(knowledge), (0, 0b100))
+
+    def test_gaussian_finds_what_subsets_miss(self):
+        knowledge = KnowledgeBase()
+        knowledge.add(Sentence(0b0111, 2))
+        knowledge.add(Sentence(0b1110, 1))
+        strategy = GaussianStrategy()
+        self.assertEqual(strategy.deduce(knowledge), (0, 0))
+        self.assertEqual(strategy.deduce_when_stuck(knowledge), (0b1000, 0b0001))
+
+
+if __name__ == "__main__":
+    unittest.main()
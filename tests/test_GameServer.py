@@ -0,0 +1,89 @@
+import asyncio
+import json
+import logging
+import unittest
+
+from Config import (
+    AI_KNOWS_NUMBER_OF_MINES_KEY, AI_MAX_COMPONENT_SIZE_KEY, AI_SEARCH_ASAP_KEY, AI_STRATEGY_KEY, HEIGHT_KEY,
+    MINES_KEY, NO_GUESS_KEY, WIDTH_KEY, Config
+)
+from GameServer import GameServer
+
+
+def request(server: GameServer, **fields) -> dict:
+    return asyncio.run(server.handle_line(json.dumps(fields).encode()))
+
+
+class GameServerTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def setUp(self):
+        config = Config()
+        for key, value in ((HEIGHT_KEY, 8), (WIDTH_KEY, 8), (MINES_KEY, 10),
+                           (AI_KNOWS_NUMBER_OF_MINES_KEY, 1), (AI_SEARCH_ASAP_KEY, 1)):
+            config.set(key, value)
+        self.server = GameServer(config, max_board_cells=100 * 100, max_mines=1000)
+
+    def test_new_game_limits(self):
+        self.assertEqual(request(self.server, command="new", seed=1)["session"], 1)
+        for config in ({HEIGHT_KEY: 100, WIDTH_KEY: 101}, {HEIGHT_KEY: 100, WIDTH_KEY: 100, MINES_KEY: 1001},
+                       {MINES_KEY: 64}, {HEIGHT_KEY: True}):
+            with self.subTest(config=config):
+                self.assertIn("error", request(self.server, command="new", config=config))
+        self.assertNotIn("error", request(self.server, command="new", config={HEIGHT_KEY: 100, WIDTH_KEY: 100}))
+        for config in ({AI_STRATEGY_KEY: 7}, {AI_MAX_COMPONENT_SIZE_KEY: 1000}, {NO_GUESS_KEY: 1, MINES_KEY: 56}):
+            with self.subTest(config=config):
+                self.assertIn("error", request(self.server, command="new", config=config))
+        self.assertNotIn("error", request(self.server, command="new", config={AI_MAX_COMPONENT_SIZE_KEY: 20}))
+        self.assertIn("error", request(self.server, command="new", seed=True))
+
+    def test_no_guess_game_without_solvable_layout(self):
+        session = request(self.server, command="new", seed=1,
+                          config={HEIGHT_KEY: 2, WIDTH_KEY: 6, MINES_KEY: 3, NO_GUESS_KEY: 1})["session"]
+        self.assertIn("without guessing", request(self.server, command="state", session=session)["error"])
+
+    def test_bool_is_not_an_integer(self):
+        session = request(self.server, command="new", seed=2)["session"]
+        self.assertIn("error", request(self.server, command="ai_move", session=session, moves=True))
+        self.assertIn("error", request(self.server, command="ai_move", session=True))
+        self.assertIn("error", request(self.server, command="reveal", session=session, cell=[True, 0]))
+        response = request(self.server, command="ai_move", session=session, moves=2)
+        self.assertNotIn("error", response)
+        self.assertEqual(len(response["moves"]), 2)
+
+    def test_sessions_dont_wait_for_each_other(self):
+        server = GameServer(self.server.config, max_live_sessions=1)
+
+        async def command(**fields) -> dict:
+            return await server.handle_line(json.dumps(fields).encode())
+
+        async def play():
+            large = (await command(command="new", seed=1, config={HEIGHT_KEY: 150, WIDTH_KEY: 150, MINES_KEY: 2250}))
+            small = (await command(command="new", seed=1))["session"]
+            await command(command="state", session=small)
+            # the AI plays the whole large game in one command
+            long_command = asyncio.create_task(command(command="ai_move", session=large["session"], moves=10 ** 6))
+            await asyncio.sleep(0.05)
+            for _ in range(5):
+                self.assertNotIn("error", await command(command="state", session=small))
+                self.assertFalse(long_command.done())
+            response = await long_command
+            self.assertNotIn("error", response)
+            self.assertGreater(len(response["moves"]), 100)
+            # once the large game is idle, it is packed in the background, the small game was used later
+            while server.compaction is not None and not server.compaction.done():
+                await asyncio.sleep(0.01)
+            self.assertEqual(list(server.live), [small])
+
+        asyncio.run(play())
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,86 @@
+import logging
+import random
+import unittest
+
+from Bitset import from_bits
+from GameState import GameState
+from Minesweeper import Minesweeper
+
+
+def flood_fill(game: Minesweeper, cell: tuple[int, int], flags: set) -> set:
+    """Returns cells revealed by a click on a cell: connected cells without nearby mines and their neighbours"""
+    revealed = {cell}
+    stack = [cell]
+    while stack:
+        i, j = stack.pop()
+        if game.nearby_mines((i, j)) != 0:
+            continue
+        for k in range(max(0, i - 1), min(game.height, i + 2)):
+            for l in range(max(0, j - 1), min(game.width, j + 2)):
+                if (k, l) not in revealed and (k, l) not in flags:
+                    revealed.add((k, l))
+                    stack.append((k, l))
+    return revealed
+
+
+class RevealTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_cascade(self):
+        # mines in the corner, the rest of the board opens with one click
+        game = Minesweeper.from_mines(5, 6, {(0, 0)})
+        game_state = GameState(5, 6, 1, True, False, game=game)
+        self.assertTrue(game_state.reveal((4, 5)))
+        self.assertEqual(game_state.revealed, {(i, j) for i in range(5) for j in range(6)} - {(0, 0)})
+        self.assertTrue(game_state.is_won())
+
+    def test_cell_with_nearby_mines_opens_alone(self):
+        game = Minesweeper.from_mines(4, 4, {(0, 0), (3, 3)})
+        game_state = GameState(4, 4, 2, True, False, game=game)
+        self.assertTrue(game_state.reveal((1, 1)))
+        self.assertEqual(game_state.revealed, {(1, 1)})
+
+    def test_flags_stop_the_cascade(self):
+        game = Minesweeper.from_mines(3, 5, {(0, 4)})
+        game_state = GameState(3, 5, 1, True, False, game=game)
+        game_state.toggle_flag((1, 1))
+        game_state.reveal((2, 0))
+        self.assertNotIn((1, 1), game_state.revealed)
+        self.assertEqual(game_state.revealed, flood_fill(game, (2, 0), {(1, 1)}))
+
+    def test_cascade_matches_flood_fill(self):
+        for seed in range(30):
+            with self.subTest(seed=seed):
+                rng = random.Random(seed)
+                game = Minesweeper(12, 15, 20, rng)
+                game_state = GameState(12, 15, 20, True, False, game=game)
+                game_state.watch_changes()
+                safe = [(i, j) for i in range(12) for j in range(15) if (i, j) not in game.mines]
+                cell = rng.choice(safe)
+                expected = flood_fill(game, cell, set())
+                self.assertTrue(game_state.reveal(cell))
+                self.assertEqual(game_state.revealed, expected)
+                self.assertEqual(game_state.pop_changed(), expected)
+                # the AI learns every revealed cell and never takes a revealed cell for a mine
+                ai = game_state.ai
+                self.assertEqual(ai.moves_made, from_bits([ai.topology.index(cell) for cell in expected]))
+                self.assertEqual(ai.mines & ai.moves_made, 0)
+
+    def test_hitting_a_mine_loses(self):
+        game = Minesweeper.from_mines(3, 3, {(1, 1)})
+        game_state = GameState(3, 3, 1, True, False, game=game)
+        self.assertFalse(game_state.reveal((1, 1)))
+        self.assertTrue(game_state.lost)
+        self.assertEqual(game_state.losing_move, (1, 1))
+        self.assertTrue(game_state.is_over())
+
+
+if __name__ == "__main__":
+    unittest.main()
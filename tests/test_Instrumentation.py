@@ -0,0 +1,59 @@
+import json
+import logging
+import os
+import tempfile
+import unittest
+
+from GameState import GameState
+from Instrumentation import Instrumentation, JsonLinesSink, MemorySink
+
+
+class InstrumentationTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_counters_of_a_game(self):
+        game_state = GameState(16, 16, 40, True, True, seed=2)
+        sink = MemorySink()
+        game_state.ai.instrumentation = Instrumentation(sink)
+        while not game_state.is_over():
+            if game_state.ai_move()[0] is None:
+                break
+
+        moves = [record for record in sink.records if record["event"] == "move"]
+        updates = [record for record in sink.records if record["event"] == "add_knowledge"]
+        self.assertEqual(len(moves), len(game_state.history))
+        # every update of the AI is one record, nested calls don't make records of their own
+        self.assertEqual(len(updates), sum(1 for record in moves if not record["flag"]) - game_state.lost)
+        self.assertEqual(sum(record["counters"].get("revealed", 0) for record in updates), len(game_state.revealed))
+        self.assertEqual(sum(record["counters"].get("guesses", 0) for record in moves), game_state.ai.guesses)
+        self.assertGreater(sum(record["counters"].get("propagation_rounds", 0) for record in sink.records), 0)
+        for record in sink.records:
+            self.assertGreaterEqual(record["time"]["total"], 0)
+
+    def test_json_lines_sink(self):
+        with tempfile.TemporaryDirectory() as directory:
+            path = os.path.join(directory, "metrics.jsonl")
+            for append in (False, True):
+                sink = JsonLinesSink(path, append=append)
+                instrumentation = Instrumentation(sink)
+                instrumentation.begin("move")
+                instrumentation.count("guesses")
+                instrumentation.count("guesses", 2)
+                instrumentation.end(knowledge_size=3)
+                sink.close()
+            with open(path) as f:
+                records = [json.loads(line) for line in f]
+        self.assertEqual(len(records), 2)
+        self.assertEqual(records[0]["counters"], {"guesses": 3})
+        self.assertEqual(records[0]["knowledge_size"], 3)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,110 @@
+import random
+import unittest
+
+from KnowledgeBase import KnowledgeBase
+from Sentence import Sentence
+
+
+def random_sentences(rng: random.Random, count: int, cells: int) -> list[Sentence]:
+    sentences = []
+    for _ in range(count):
+        mask = rng.getrandbits(cells) or 1
+        sentences.append(Sentence(mask, rng.randint(0, mask.bit_count())))
+    return sentences
+
+
+class KnowledgeBaseTest(unittest.TestCase):
+
+    def check_index(self, knowledge: KnowledgeBase):
+        """Index holds exactly the sentences of the knowledge base, under every cell they contain"""
+        expected = {}
+        for sentence in knowledge:
+            for cell in range(sentence.cells.bit_length()):
+                if sentence.cells >> cell & 1:
+                    expected.setdefault(cell, set()).add(sentence)
+        self.assertEqual({cell: set(sentences) for cell, sentences in knowledge.index.items()}, expected)
+
+    def test_add_and_remove(self):
+        knowledge = KnowledgeBase()
+        self.assertTrue(knowledge.add(Sentence(0b110, 1)))
+        self.assertFalse(knowledge.add(Sentence(0b110, 1)))
+        self.assertTrue(knowledge.add(Sentence(0b011, 1)))
+        self.assertEqual(len(knowledge), 2)
+        self.assertEqual(set(knowledge.containing(1)), {Sentence(0b110, 1), Sentence(0b011, 1)})
+        self.assertTrue(knowledge.remove(Sentence(0b110, 1)))
+        self.assertFalse(knowledge.remove(Sentence(0b110, 1)))
+        self.assertEqual(knowledge.containing(2), {})
+        self.check_index(knowledge)
+
+    def test_supersets_and_overlapping(self):
+        rng = random.Random(1)
+        for seed in range(20):
+            with self.subTest(seed=seed):
+                knowledge = KnowledgeBase()
+                for sentence in random_sentences(rng, 30, 24):
+                    knowledge.add(sentence)
+                for sentence in knowledge:
+                    others = [other for other in knowledge if other is not sentence]
+                    self.assertEqual(set(knowledge.supersets_of(sentence)),
+                                     {other for other in others if sentence.is_subset(other)})
+                    self.assertEqual(set(knowledge.overlapping(sentence)),
+                                     {other for other in others if other.cells & sentence.cells})
+
+    def test_replacing_keeps_index(self):
+        knowledge = KnowledgeBase()
+        sentence = Sentence(0b1111, 2)
+        subset = Sentence(0b0011, 1)
+        knowledge.add(sentence)
+        knowledge.add(subset)
+        shrunk = knowledge.minus_subset(sentence, subset)
+        self.assertEqual(shrunk, Sentence(0b1100, 1))
+        self.assertEqual(set(knowledge), {shrunk, subset})
+        marked = knowledge.mark_known(shrunk, safes=0b0100, mines=0)
+        self.assertEqual(set(knowledge), {Sentence(0b1000, 1), subset})
+        # a sentence, that is no longer known, is not brought back
+        self.assertEqual(knowledge.mark_known(shrunk, safes=0, mines=0b1000), Sentence(0b0100, 0))
+        self.assertEqual(set(knowledge), {marked, subset})
+        self.check_index(knowledge)
+
+    def test_dirty_sentences(self):
+        knowledge = KnowledgeBase()
+        first, second = Sentence(0b01, 1), Sentence(0b10, 0)
+        knowledge.add(first)
+        knowledge.add(second)
+        self.assertEqual(knowledge.pop_dirty(), second)
+        self.assertEqual(knowledge.pop_dirty(), first)
+        self.assertEqual(len(knowledge.dirty), 0)
+        self.assertEqual(len(knowledge), 2)
+
+    def test_undo_puts_sentences_back_in_order(self):
+        rng = random.Random(2)
+        knowledge = KnowledgeBase()
+        for sentence in random_sentences(rng, 20, 16):
+            knowledge.add(sentence)
+        before = (list(knowledge), list(knowledge.dirty), {cell: list(s) for cell, s in knowledge.index.items()})
+        knowledge.trail = []
+        for sentence in rng.sample(list(knowledge), 8):
+            if rng.random() < 0.5:
+                knowledge.mark_known(sentence, safes=sentence.cells & -sentence.cells, mines=0)
+            else:
+                knowledge.remove(sentence)
+        knowledge.pop_dirty()
+        knowledge.add(Sentence(0b1, 1))
+        for undo, *arguments in reversed(knowledge.trail):
+            undo(*arguments)
+        knowledge.trail = None
+        knowledge.restore_order()
+        self.assertEqual((list(knowledge), list(knowledge.dirty),
+                          {cell: list(s) for cell, s in knowledge.index.items()}), before)
+
+    def test_renumber(self):
+        knowledge = KnowledgeBase()
+        knowledge.add(Sentence(0b011, 1))
+        knowledge.add(Sentence(0b110, 1))
+        knowledge.renumber([2, 0, 1])
+        self.assertEqual(list(knowledge), [Sentence(0b101, 1), Sentence(0b011, 1)])
+        self.check_index(knowledge)
+
+
+if __name__ == "__main__":
+    unittest.main()
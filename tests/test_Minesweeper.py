@@ -0,0 +1,110 @@
+import random
+import unittest
+
+from BoardTopology import SparseTopology
+from Minesweeper import Minesweeper, NumpyMinesweeper, PermutedMines, SparseMinesweeper, load_numpy
+
+
+def count_nearby(mines: set, height: int, width: int, cell: tuple[int, int]) -> int:
+    i, j = cell
+    return sum((k, l) in mines for k in range(max(0, i - 1), min(height, i + 2))
+               for l in range(max(0, j - 1), min(width, j + 2)) if (k, l) != cell)
+
+
+class MinesweeperTest(unittest.TestCase):
+
+    def test_nearby_mines(self):
+        for height, width, mines in ((1, 1, 0), (1, 5, 2), (8, 8, 10), (16, 30, 99)):
+            with self.subTest(height=height, width=width, mines=mines):
+                game = Minesweeper(height, width, mines, random.Random(height))
+                self.assertEqual(len(game.mines), mines)
+                cells = [(i, j) for i in range(height) for j in range(width)]
+                expected = [count_nearby(game.mines, height, width, cell) for cell in cells]
+                self.assertEqual([game.nearby_mines(cell) for cell in cells], expected)
+                self.assertEqual(game.nearby_mines_many(cells), expected)
+                self.assertEqual([game.is_mine(cell) for cell in cells], [cell in game.mines for cell in cells])
+
+
+@unittest.skipUnless(load_numpy(), "NumPy is not installed")
+class NumpyMinesweeperTest(unittest.TestCase):
+
+    def test_matches_dense_board(self):
+        for height, width, mines in ((1, 1, 1), (1, 5, 2), (8, 8, 10), (16, 30, 99), (30, 16, 479)):
+            with self.subTest(height=height, width=width, mines=mines):
+                # the same seed places the same mines on both boards
+                game = NumpyMinesweeper(height, width, mines, random.Random(mines))
+                dense = Minesweeper(height, width, mines, random.Random(mines))
+                self.assertEqual(game.mines, dense.mines)
+                cells = [(i, j) for i in range(height) for j in range(width)]
+                self.assertEqual(game.nearby_mines_many(cells), dense.nearby_mines_many(cells))
+                self.assertEqual([game.nearby_mines(cell) for cell in cells], dense.nearby_mines_many(cells))
+                self.assertEqual([game.is_mine(cell) for cell in cells], [dense.is_mine(cell) for cell in cells])
+                self.assertEqual(game.nearby_mines_many([]), [])
+
+    def test_from_mines(self):
+        mines = {(0, 0), (2, 3), (3, 3)}
+        game = NumpyMinesweeper.from_mines(4, 4, mines)
+        self.assertEqual(game.mines, mines)
+        self.assertEqual(game.nearby_mines((2, 2)), 2)
+        self.assertIs(game.is_mine((0, 0)), True)
+
+
+class PermutedMinesTest(unittest.TestCase):
+
+    def test_mines_are_distinct_cells_of_the_board(self):
+        for height, width, mines in ((1, 1, 0), (1, 1, 1), (3, 7, 10), (16, 30, 99), (37, 23, 851)):
+            with self.subTest(height=height, width=width, mines=mines):
+                permuted = PermutedMines(height, width, mines, random.Random(0))
+                cells = list(permuted)
+                self.assertEqual(len(permuted), mines)
+                self.assertEqual(len(set(cells)), mines)
+                for i in range(height):
+                    for j in range(width):
+                        self.assertEqual((i, j) in permuted, (i, j) in cells)
+
+    def test_seed_chooses_mines(self):
+        first = set(PermutedMines(50, 50, 500, random.Random(1)))
+        self.assertEqual(set(PermutedMines(50, 50, 500, random.Random(1))), first)
+        self.assertNotEqual(set(PermutedMines(50, 50, 500, random.Random(2))), first)
+
+    def test_mines_are_spread_over_the_board(self):
+        mines = PermutedMines(100, 100, 2000, random.Random(3))
+        # every quarter of the board gets about a quarter of the mines
+        quarters = [0] * 4
+        for i, j in mines:
+            quarters[(i >= 50) * 2 + (j >= 50)] += 1
+        for count in quarters:
+            self.assertLess(abs(count - 500), 100)
+
+    def test_nearby_mines_match_dense_board(self):
+        game = SparseMinesweeper(20, 30, 150, random.Random(4))
+        dense = Minesweeper.from_mines(20, 30, game.mines)
+        for i in range(20):
+            for j in range(30):
+                self.assertEqual(game.is_mine((i, j)), dense.is_mine((i, j)))
+                self.assertEqual(game.nearby_mines((i, j)), dense.nearby_mines((i, j)))
+
+
+class SparseTopologyTest(unittest.TestCase):
+
+    def test_random_untouched_on_mostly_touched_board(self):
+        topology = SparseTopology(20, 20)
+        untouched = {(3, 4), (7, 19), (19, 0)}
+        for i in range(20):
+            for j in range(20):
+                if (i, j) not in untouched:
+                    topology.index((i, j))
+        # some cells are released, they stay touched
+        topology.compact((1 << 100) - 1, 0)
+        self.assertEqual(topology.untouched, len(untouched))
+        rng = random.Random(5)
+        drawn = {topology.random_untouched(rng) for _ in range(100)}
+        self.assertEqual(drawn, untouched)
+
+        topology.index((3, 4))
+        topology.truncate(len(topology.cells) - 1)
+        self.assertEqual({topology.random_untouched(rng) for _ in range(100)}, untouched)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,202 @@
+import logging
+import random
+import unittest
+
+from GameState import GameState
+from Minesweeper import Minesweeper
+from MinesweeperAI import MinesweeperAI
+
+
+def ai_state(ai: MinesweeperAI) -> tuple:
+    """Returns everything the AI knows, sentences and cells of the pool in the order, in which they are iterated"""
+    return (ai.moves_made, ai.flags_placed, ai.mines, ai.safes, ai.pending_safes, ai.pending_mines,
+            ai.mines_left, ai.unknown_cells, ai.guesses, list(ai.knowledge), list(ai.knowledge.dirty),
+            {cell: list(sentences) for cell, sentences in ai.knowledge.index.items()},
+            list(ai.unknown_pool), ai.rng.getstate(), list(ai.topology.cells) if ai.sparse else None)
+
+
+class SnapshotTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_restore_round_trip(self):
+        for seed in range(10):
+            for sparse_board in (False, True):
+                with self.subTest(seed=seed, sparse_board=sparse_board):
+                    game_state = GameState(16, 16, 40, True, seed % 2 == 0, seed=seed, sparse_board=sparse_board)
+                    for _ in range(seed % 4):
+                        game_state.ai_move()
+                    ai = game_state.ai
+                    before = ai_state(ai)
+                    snapshot = ai.snapshot()
+                    game_state.toggle_flag((15, 15))
+                    while not game_state.is_over():
+                        if game_state.ai_move()[0] is None:
+                            break
+                    ai.restore(snapshot)
+                    ai.release(snapshot)
+                    self.assertEqual(ai_state(ai), before)
+
+    def test_nested_snapshots(self):
+        game_state = GameState(16, 16, 40, True, True, seed=1)
+        ai = game_state.ai
+        first = ai.snapshot()
+        states = [ai_state(ai)]
+        snapshots = [first]
+        for _ in range(3):
+            game_state.ai_move()
+            states.append(ai_state(ai))
+            snapshots.append(ai.snapshot())
+        for snapshot, state in zip(reversed(snapshots), reversed(states)):
+            ai.restore(snapshot)
+            ai.release(snapshot)
+            self.assertEqual(ai_state(ai), state)
+
+    def test_play_after_undo(self):
+        # after moves are taken back, the AI plays exactly as if they were never made
+        for height, width, mines, seeds in ((8, 8, 12, 60), (16, 16, 40, 20)):
+            for seed in range(seeds):
+                with self.subTest(height=height, width=width, mines=mines, seed=seed):
+                    uninterrupted = GameState(height, width, mines, True, True, seed=seed)
+                    game_state = GameState(height, width, mines, True, True, seed=seed)
+                    game_state.enable_undo()
+                    taken_back = 3 + seed % 5
+                    for _ in range(7 + taken_back):
+                        if game_state.is_over() or game_state.ai_move()[0] is None:
+                            break
+                    for _ in range(taken_back):
+                        game_state.undo()
+                    for game in (uninterrupted, game_state):
+                        while not game.is_over():
+                            if game.ai_move()[0] is None:
+                                break
+                    self.assertEqual(game_state.history, uninterrupted.history)
+
+    def test_undo_depth(self):
+        # only the last moves can be taken back, they are taken back the same way as without a limit
+        reference = GameState(16, 16, 40, True, True, seed=4)
+        game_state = GameState(16, 16, 40, True, True, seed=4)
+        game_state.enable_undo(depth=5)
+        for _ in range(25):
+            reference.ai_move()
+        states = []
+        for _ in range(30):
+            states.append((list(game_state.history), ai_state(game_state.ai)))
+            game_state.ai_move()
+        self.assertEqual(states[25][0], reference.history)
+        for _ in range(5):
+            self.assertTrue(game_state.undo())
+        self.assertFalse(game_state.undo())
+        self.assertEqual((game_state.history, ai_state(game_state.ai)), states[25])
+        for game in (reference, game_state):
+            while not game.is_over():
+                if game.ai_move()[0] is None:
+                    break
+        self.assertEqual(game_state.history, reference.history)
+
+
+class MinesLeftTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    @staticmethod
+    def game_state(mines: set, ai_knows_number_of_mines: bool) -> GameState:
+        game = Minesweeper.from_mines(1, 5, mines)
+        return GameState(1, 5, len(mines), ai_knows_number_of_mines, False, game=game, ai_seed=0)
+
+    def test_other_cells_are_safe_when_sentences_hold_all_mines(self):
+        # after (0, 1) is revealed, its only mine is (0, 0) or (0, 2), so (0, 3) and (0, 4) are safe
+        for ai_knows_number_of_mines in (True, False):
+            with self.subTest(ai_knows_number_of_mines=ai_knows_number_of_mines):
+                game_state = self.game_state({(0, 0)}, ai_knows_number_of_mines)
+                game_state.make_move((0, 1), False)
+                move, place_flag = game_state.ai_move()
+                if ai_knows_number_of_mines:
+                    self.assertIn(move, ((0, 3), (0, 4)))
+                    self.assertFalse(place_flag)
+                    self.assertEqual(game_state.ai.guesses, 0)
+                else:
+                    self.assertEqual(game_state.ai.guesses, 1)
+
+    def test_other_cells_are_mines_when_they_need_all_other_mines(self):
+        # after (0, 1) is revealed, one mine is (0, 0) or (0, 2), so both other mines are (0, 3) and (0, 4)
+        game_state = self.game_state({(0, 0), (0, 3), (0, 4)}, True)
+        game_state.make_move((0, 1), False)
+        flags = {game_state.ai_move() for _ in range(2)}
+        self.assertEqual(flags, {((0, 3), True), ((0, 4), True)})
+        self.assertEqual(game_state.ai.guesses, 0)
+        self.assertEqual(game_state.ai.mines_left, 1)
+
+    def test_counters_follow_known_cells(self):
+        for seed in range(10):
+            with self.subTest(seed=seed):
+                game_state = GameState(16, 16, 40, True, seed % 2 == 0, seed=seed)
+                ai = game_state.ai
+                while not game_state.is_over():
+                    if game_state.ai_move()[0] is None:
+                        break
+                    self.assertEqual(ai.mines_left, 40 - ai.mines.bit_count())
+                    self.assertEqual(ai.unknown_cells, 16 * 16 - (ai.safes | ai.mines).bit_count())
+                    # no sentence spans the whole board
+                    self.assertLess(max((len(sentence) for sentence in ai.knowledge), default=0), 9)
+
+
+class PrepareTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_prepared_moves_dont_change_play(self):
+        # moves of the player come between prepared AI moves, the game goes the same way as without preparing
+        for seed in range(60):
+            for search_asap in (False, True):
+                with self.subTest(seed=seed, search_asap=search_asap):
+                    games = [GameState(16, 16, 40, True, search_asap, seed=seed) for _ in range(2)]
+                    games[1].enable_undo()
+                    rng = random.Random(seed)
+                    while not games[0].is_over() and len(games[0].history) < 300:
+                        games[1].ai.prepare()
+                        cell = (rng.randrange(16), rng.randrange(16))
+                        by_player = rng.random() < 0.3 and cell not in games[0].revealed and cell not in games[0].flags
+                        for game in games:
+                            if by_player:
+                                game.make_move(cell, False)
+                            else:
+                                game.ai_move()
+                        self.assertEqual(games[1].history, games[0].history)
+                        # a lost game doesn't tell the AI anything, so its prepared move is not taken back
+                        if not games[0].lost:
+                            self.assertEqual(ai_state(games[1].ai), ai_state(games[0].ai))
+
+    def test_interrupted_prepare_changes_nothing(self):
+        reference = GameState(30, 30, 180, True, False, seed=2)
+        game_state = GameState(30, 30, 180, True, False, seed=2)
+        for game in (reference, game_state):
+            game.ai_move()
+        before = ai_state(game_state.ai)
+        self.assertFalse(game_state.ai.prepare(interrupted=lambda: True))
+        self.assertEqual(ai_state(game_state.ai), before)
+        self.assertTrue(game_state.ai.prepare())
+        for _ in range(5):
+            self.assertEqual(game_state.ai_move(), reference.ai_move())
+        self.assertEqual(ai_state(game_state.ai), ai_state(reference.ai))
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,81 @@
+import logging
+import tempfile
+import unittest
+
+from Config import (
+    AI_KNOWS_NUMBER_OF_MINES_KEY, AI_SEARCH_ASAP_KEY, HEIGHT_KEY, MINES_KEY, NO_GUESS_KEY, WIDTH_KEY, Config
+)
+from NoGuessGenerator import NoGuessGenerator
+from runner import game_state_factory
+
+
+class NoGuessGeneratorTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_boards_are_solved_without_guessing(self):
+        for height, width, mines in ((8, 8, 10), (9, 9, 15), (16, 16, 40)):
+            generator = NoGuessGenerator(height, width, mines, cache_dir=None)
+            for number, board in enumerate(generator.generate(5, seed=height, workers=1)):
+                for ai_search_asap in (False, True):
+                    with self.subTest(height=height, width=width, mines=mines, board=number,
+                                      ai_search_asap=ai_search_asap):
+                        self.assertEqual(len(board.mines), mines)
+                        game_state = board.game_state(True, ai_search_asap, seed=number)
+                        self.assertEqual(game_state.game.nearby_mines(board.start), 0)
+                        while not game_state.is_over():
+                            if game_state.ai_move()[0] is None:
+                                break
+                        self.assertTrue(game_state.is_won())
+                        self.assertEqual(game_state.ai.guesses, 0)
+
+    def test_seed_chooses_cached_boards(self):
+        with tempfile.TemporaryDirectory() as directory:
+            generator = NoGuessGenerator(8, 8, 10, cache_dir=directory)
+            generator.generate(12, seed=0, workers=1)
+
+            def starts(seed: int) -> list:
+                return [(board.start, sorted(board.mines)) for board in generator.boards(4, seed, workers=1)]
+
+            self.assertEqual(starts(1), starts(1))
+            self.assertNotEqual(starts(1), starts(2))
+            self.assertEqual(len({str(board) for board in starts(3)}), 4)
+            # boards are only generated, when the cache has too few of them
+            self.assertEqual(len(generator.boards(12, 4, workers=1)), 12)
+            self.assertEqual(len(generator.load()), 12)
+            self.assertEqual(len(generator.boards(14, 4, workers=1)), 14)
+            self.assertEqual(len(generator.load()), 14)
+
+    def test_infeasible_board(self):
+        # mines don't fit around a safe first click
+        with self.assertRaises(ValueError):
+            NoGuessGenerator(8, 8, 56, cache_dir=None)
+        # mines fit, but no layout can be solved without guessing
+        generator = NoGuessGenerator(2, 6, 3, cache_dir=None, max_attempts=100)
+        with self.assertRaises(ValueError):
+            generator.next_board()
+        with self.assertRaises(ValueError):
+            generator.generate(1, seed=0, workers=1)
+
+    def test_seed_chooses_board_of_runner(self):
+        config = Config()
+        for key, value in ((HEIGHT_KEY, 8), (WIDTH_KEY, 8), (MINES_KEY, 10), (NO_GUESS_KEY, 1),
+                           (AI_KNOWS_NUMBER_OF_MINES_KEY, 1), (AI_SEARCH_ASAP_KEY, 1)):
+            config.set(key, value)
+
+        def board(seed: int) -> tuple:
+            game_state = game_state_factory(config)(seed)
+            return sorted(game_state.game.mines), sorted(game_state.revealed), game_state.ai_seed
+
+        self.assertEqual(board(5), board(5))
+        self.assertNotEqual(board(5), board(6))
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,93 @@
+import itertools
+import random
+import unittest
+
+from Bitset import bits
+from ProbabilityEngine import ProbabilityEngine
+from Sentence import Sentence
+
+
+def random_sentences(rng: random.Random, cells: int, mines: set[int]) -> list[Sentence]:
+    """Returns sentences about random groups of cells, which are true for the mines"""
+    sentences = []
+    for _ in range(rng.randint(1, 5)):
+        group = rng.sample(range(cells), rng.randint(1, min(cells, 5)))
+        mask = sum(1 << cell for cell in group)
+        sentences.append(Sentence(mask, sum(cell in mines for cell in group)))
+    return sentences
+
+
+def brute_force(sentences: list[Sentence], unknown: int, mines_left: int = None) -> tuple[dict[int, float], float]:
+    """
+    Returns probabilities of frontier cells and of other cells from all mine placements consistent with the sentences.
+    Cells of the frontier come first, the other unknown cells after them.
+    """
+    frontier = sorted(set().union(*(bits(sentence.cells) for sentence in sentences)))
+    others = unknown - len(frontier)
+    cells = frontier + list(range(max(frontier) + 1, max(frontier) + 1 + others))
+    counts = [0] * len(cells)
+    total = 0
+    sizes = range(len(cells) + 1) if mines_left is None else [mines_left]
+    for size in sizes:
+        for placement in itertools.combinations(range(len(cells)), size):
+            mask = sum(1 << cells[i] for i in placement)
+            if all((sentence.cells & mask).bit_count() == sentence.count for sentence in sentences):
+                total += 1
+                for i in placement:
+                    counts[i] += 1
+    probabilities = {cell: counts[i] / total for i, cell in enumerate(frontier)}
+    if mines_left is None or others == 0:
+        return probabilities, None
+    return probabilities, counts[len(frontier)] / total
+
+
+class ProbabilityEngineTest(unittest.TestCase):
+
+    def assertProbabilities(self, actual: tuple[dict[int, float], float], expected: tuple[dict[int, float], float]):
+        probabilities, others = actual
+        expected_probabilities, expected_others = expected
+        self.assertEqual(probabilities.keys(), expected_probabilities.keys())
+        for cell, probability in expected_probabilities.items():
+            self.assertAlmostEqual(probabilities[cell], probability)
+        if expected_others is None:
+            self.assertIsNone(others)
+        else:
+            self.assertAlmostEqual(others, expected_others)
+
+    def test_matches_brute_force_with_number_of_mines(self):
+        rng = random.Random(0)
+        for _ in range(200):
+            cells = rng.randint(1, 9)
+            others = rng.randint(0, 4)
+            mines = set(rng.sample(range(cells + others), rng.randint(0, cells + others)))
+            sentences = random_sentences(rng, cells, mines)
+            frontier = len(set().union(*(bits(sentence.cells) for sentence in sentences)))
+            unknown = frontier + others
+            # mines outside of the frontier are spread over the other cells
+            mines_left = sum(1 for cell in mines if cell < cells and any(sentence.cells >> cell & 1 for sentence in sentences))
+            mines_left += rng.randint(0, others)
+            with self.subTest(sentences=[str(sentence) for sentence in sentences], unknown=unknown, mines_left=mines_left):
+                self.assertProbabilities(ProbabilityEngine().mine_probabilities(sentences, unknown, mines_left),
+                                         brute_force(sentences, unknown, mines_left))
+
+    def test_matches_brute_force_without_number_of_mines(self):
+        rng = random.Random(1)
+        for _ in range(200):
+            cells = rng.randint(1, 9)
+            mines = set(rng.sample(range(cells), rng.randint(0, cells)))
+            sentences = random_sentences(rng, cells, mines)
+            unknown = len(set().union(*(bits(sentence.cells) for sentence in sentences))) + rng.randint(0, 4)
+            with self.subTest(sentences=[str(sentence) for sentence in sentences]):
+                self.assertProbabilities(ProbabilityEngine().mine_probabilities(sentences, unknown),
+                                         brute_force(sentences, unknown))
+
+    def test_independent_components(self):
+        # two cells share one mine, two other cells share one mine, the last cell gets the remaining mine
+        sentences = [Sentence(0b11, 1), Sentence(0b1100, 1)]
+        probabilities, others = ProbabilityEngine().mine_probabilities(sentences, 5, 3)
+        self.assertEqual(probabilities, {0: 0.5, 1: 0.5, 2: 0.5, 3: 0.5})
+        self.assertEqual(others, 1)
+
+
+if __name__ == "__main__":
+    unittest.main()
@@ -0,0 +1,57 @@
+import logging
+import unittest
+
+from DeductionStrategy import GAUSSIAN_STRATEGY
+from GameState import GameState
+from Replay import Replay
+
+
+def play(game_state: GameState, moves: int = None) -> GameState:
+    """Lets the AI play until the game is over, it has no move left or (moves) moves are made"""
+    while not game_state.is_over() and (moves is None or len(game_state.history) < moves):
+        move, _ = game_state.ai_move()
+        if move is None:
+            break
+    return game_state
+
+
+class ReplayTest(unittest.TestCase):
+
+    @classmethod
+    def setUpClass(cls):
+        logging.disable(logging.INFO)
+
+    @classmethod
+    def tearDownClass(cls):
+        logging.disable(logging.NOTSET)
+
+    def test_bytes_round_trip(self):
+        game_state = GameState(16, 30, 99, True, False, seed=3, ai_strategy=GAUSSIAN_STRATEGY)
+        game_state.toggle_flag((0, 0))
+        play(game_state)
+        replay = Replay.from_game_state(game_state)
+        self.assertEqual(Replay.from_bytes(replay.to_bytes()), replay)
+
+    def test_moves_of_huge_boards(self):
+        # cells of boards with more than 2^30 cells don't fit into 32 bit encoded moves
+        replay = Replay(2, 2, {(0, 1)}, True, False, 7, 20, [(1 << 31) << 2 | 3, 5 << 2])
+        self.assertEqual(Replay.from_bytes(replay.to_bytes()).moves, replay.moves)
+
+    def test_replay_makes_the_same_moves(self):
+        for seed in range(10):
+            for sparse_board in (False, True):
+                with self.subTest(seed=seed, sparse_board=sparse_board):
+                    game_state = GameState(16, 16, 40, True, seed % 2 == 0, seed=seed, sparse_board=sparse_board,
+                                           ai_strategy=seed % 3 % 2)
+                    # moves of the player are replayed as well
+                    game_state.make_move((seed % 16, 0), False)
+                    play(game_state)
+                    replayed = Replay.from_bytes(Replay.from_game_state(game_state).to_bytes()).replay()
+                    self.assertEqual(replayed.history, game_state.history)
+                    self.assertEqual(replayed.revealed, game_state.revealed)
+                    self.assertEqual(replayed.flags, game_state.flags)
+                    self.assertEqual(replayed.lost, game_state.lost)
+
+
+if __name__ == "__main__":
+    unittest.main()
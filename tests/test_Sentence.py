@@ -0,0 +1,64 @@
+import random
+import unittest
+
+from Bitset import bits, from_bits, lowest_bit, pack_cells, random_bit, remap, unpack_cells
+from Sentence import Sentence
+
+
+class BitsetTest(unittest.TestCase):
+
+    def test_bits_round_trip(self):
+        rng = random.Random(0)
+        # narrow masks and masks wide enough to be walked through their binary string
+        for size in (1, 8, 100, 256, 1000, 5000):
+            with self.subTest(size=size):
+                indices = sorted(rng.sample(range(size), rng.randint(0, size)))
+                mask = from_bits(indices)
+                self.assertEqual(list(bits(mask)), indices)
+                if indices:
+                    self.assertEqual(lowest_bit(mask), indices[0])
+                    self.assertIn(random_bit(mask, rng), indices)
+
+    def test_remap(self):
+        self.assertEqual(remap(0b1011, [2, -1, 5, 0]), 1 << 2 | 1 << 0)
+
+    def test_pack_cells(self):
+        cells = {(0, 0), (1, 2), (2, 1), (2, 2)}
+        self.assertEqual(unpack_cells(pack_cells(cells, 3, 9), 3), cells)
+
+
+class SentenceTest(unittest.TestCase):
+
+    def test_known_cells(self):
+        self.assertEqual(Sentence(0b111, 3).known_mines(), 0b111)
+        self.assertEqual(Sentence(0b111, 0).known_safes(), 0b111)
+        self.assertEqual(Sentence(0b111, 1).known_mines(), 0)
+        self.assertEqual(Sentence(0b111, 1).known_safes(), 0)
+        self.assertTrue(Sentence(0b11, 2).is_resolved())
+        self.assertFalse(Sentence(0b11, 1).is_resolved())
+
+    def test_marking_returns_new_sentence(self):
+        sentence = Sentence(0b1110, 2)
+        self.assertEqual(sentence.mark_mine(1), Sentence(0b1100, 1))
+        self.assertEqual(sentence.mark_safe(2), Sentence(0b1010, 2))
+        self.assertEqual(sentence.mark_mines(0b0110).mark_safes(0b1000), Sentence(0, 0))
+        # marking cells outside of the sentence returns the same sentence
+        self.assertIs(sentence.mark_mine(0), sentence)
+        self.assertIs(sentence.mark_safes(0b10001), sentence)
+        self.assertEqual(sentence, Sentence(0b1110, 2))
+
+    def test_subset(self):
+        sentence = Sentence(0b111, 2)
+        subset = Sentence(0b011, 1)
+        self.assertTrue(subset.is_subset(sentence))
+        self.assertFalse(sentence.is_subset(subset))
+        self.assertEqual(sentence.minus_subset(subset), Sentence(0b100, 1))
+
+    def test_equal_sentences_are_one_key(self):
+        self.assertEqual(len({Sentence(0b101, 1), Sentence(0b101, 1), Sentence(0b101, 2)}), 2)
+        self.assertEqual(len(Sentence(0b1011, 1)), 3)
+        self.assertEqual(Sentence(0b1011, 1).mine_probability(), 1 / 3)
+
+
+if __name__ == "__main__":
+    unittest.main()